@@ -0,0 +1,220 @@
+""" Benchmark the main API operations against an in-process chain.
+
+    Reports operations per second and JSON-RPC calls per operation. Results can be saved
+    with `--output`, and compared against a previous run with `--compare` to catch
+    regressions. RPC call counts are deterministic, so any increase is reported; the
+    throughput comparison allows for `--tolerance` of noise.
+
+    Run with::
+
+        python -m benchmarks.bench_api --output benchmark.json
+
+    With `--record` every JSON-RPC and IPFS call is saved to a fixture, which `--replay`
+    serves back instead of the local chain. Adding `--latency` to a replay simulates the
+    round trip to a remote node, showing how much fewer RPC calls help in practice.
+"""
+import argparse
+from collections import (
+    Counter,
+)
+import json
+import sys
+import time
+
+from benchmarks.chain import (
+    LocalChain,
+)
+from request_network.cache import (
+    get_call_cache,
+)
+from request_network.currencies import (
+    Currency,
+)
+from request_network.instrumentation import (
+    InstrumentationHook,
+    add_hook,
+    remove_hook,
+)
+from request_network.recording import (
+    Fixture,
+    RecordingIPFSClient,
+    RecordingProvider,
+    ReplayIPFSClient,
+    ReplayProvider,
+)
+from request_network.types import (
+    Payee,
+    Payer,
+    Roles,
+)
+from request_network.utils import (
+    set_ipfs_client,
+)
+
+ETH = Currency('Ethereum', 'ETH', 18, 'RequestEthereumService')
+EXPIRATION_DATE = 7952342400
+SUB_PAYEE_COUNTS = (1, 10, 100)
+
+
+class RPCCounter(InstrumentationHook):
+    def __init__(self):
+        self.calls = Counter()
+
+    def on_rpc(self, method, duration, error=None):
+        self.calls[method] += 1
+
+
+class APIBenchmark(object):
+    def __init__(self, chain, iterations, provider=None):
+        self.chain = chain
+        self.iterations = iterations
+        self.request_api = chain.get_request_api(provider)
+        self.payer = Payer(chain.accounts[1])
+
+    def get_payees(self, count):
+        """ Return `count` payees. The first payee is an account with a known key so it
+            can sign Requests.
+        """
+        return [
+            Payee(
+                id_address=self.chain.accounts[2] if i == 0 else '0x{:040x}'.format(i),
+                amount=1000)
+            for i in range(count)
+        ]
+
+    def create_request(self, payee_count=1):
+        return self.request_api.create_request(
+            role=Roles.PAYEE,
+            currency=ETH,
+            payees=self.get_payees(payee_count),
+            payer=self.payer,
+            data={'reason': 'benchmark'})
+
+    def create_signed_request(self):
+        return self.request_api.create_signed_request(
+            role=Roles.PAYEE,
+            currency=ETH,
+            payees=self.get_payees(1),
+            expiration_date=EXPIRATION_DATE,
+            data={'reason': 'benchmark'})
+
+    def measure(self, name, operation, setup=None):
+        """ Run `operation` `iterations` times, passing it the result of `setup` if given.
+            Time spent in `setup` is not measured.
+        """
+        arguments = [setup() if setup else None for _ in range(self.iterations)]
+        counter = RPCCounter()
+        # The call cache is cleared so every iteration does the same work
+        get_call_cache(self.request_api.web3).clear()
+        add_hook(counter)
+        try:
+            elapsed = 0
+            for argument in arguments:
+                get_call_cache(self.request_api.web3).clear()
+                start = time.perf_counter()
+                operation(argument) if setup else operation()
+                elapsed += time.perf_counter() - start
+        finally:
+            remove_hook(counter)
+
+        result = {
+            'operations_per_second': self.iterations / elapsed,
+            'rpc_calls_per_operation': sum(counter.calls.values()) / self.iterations,
+            'rpc_calls_by_method': {
+                method: count / self.iterations for method, count in sorted(counter.calls.items())
+            },
+        }
+        print('{:<48} {:>10.2f} ops/s {:>8.1f} RPC calls/op'.format(
+            name, result['operations_per_second'], result['rpc_calls_per_operation']))
+        return result
+
+    def run(self):
+        results = {}
+        results['create_request'] = self.measure('create_request', self.create_request)
+        results['create_signed_request'] = self.measure(
+            'create_signed_request', self.create_signed_request)
+        results['broadcast_signed_request'] = self.measure(
+            'broadcast_signed_request',
+            lambda signed_request: self.request_api.broadcast_signed_request(
+                signed_request=signed_request, payer_address=self.payer.id_address),
+            setup=self.create_signed_request)
+
+        for sub_payee_count in SUB_PAYEE_COUNTS:
+            tx_hash = self.create_request(payee_count=sub_payee_count + 1)
+            request_id = self.request_api.get_request_by_transaction_hash(tx_hash).id
+            name = 'get_request_by_id ({} sub-payees)'.format(sub_payee_count)
+            results[name] = self.measure(
+                name, lambda: self.request_api.get_request_by_id(request_id))
+
+        tx_hash = self.create_request()
+        results['get_request_by_transaction_hash'] = self.measure(
+            'get_request_by_transaction_hash',
+            lambda: self.request_api.get_request_by_transaction_hash(tx_hash))
+        return results
+
+
+def compare(results, baseline, tolerance):
+    """ Return a list of regressions in `results` compared to `baseline`.
+    """
+    regressions = []
+    for name, result in sorted(results.items()):
+        if name not in baseline:
+            continue
+        previous = baseline[name]
+        if result['rpc_calls_per_operation'] > previous['rpc_calls_per_operation']:
+            regressions.append('{}: RPC calls per operation increased from {} to {}'.format(
+                name, previous['rpc_calls_per_operation'], result['rpc_calls_per_operation']))
+        minimum = previous['operations_per_second'] * (1 - tolerance)
+        if result['operations_per_second'] < minimum:
+            regressions.append('{}: throughput dropped from {:.2f} to {:.2f} ops/s'.format(
+                name, previous['operations_per_second'], result['operations_per_second']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Request Network API.')
+    parser.add_argument('--iterations', type=int, default=5,
+                        help='Number of times to run each operation')
+    parser.add_argument('--output', type=str, help='Write results to this JSON file')
+    parser.add_argument('--compare', type=str,
+                        help='Compare results against a previous JSON results file')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed fractional drop in throughput when comparing')
+    parser.add_argument('--record', type=str,
+                        help='Record JSON-RPC and IPFS calls to this fixture file')
+    parser.add_argument('--replay', type=str,
+                        help='Replay JSON-RPC and IPFS calls from this fixture file')
+    parser.add_argument('--latency', type=float, default=0,
+                        help='Simulated seconds per JSON-RPC and IPFS call when replaying')
+    args = parser.parse_args()
+
+    with LocalChain() as chain:
+        provider = None
+        if args.record:
+            fixture = Fixture()
+            provider = RecordingProvider(chain.provider, fixture)
+            set_ipfs_client(RecordingIPFSClient(chain.ipfs, fixture))
+        elif args.replay:
+            fixture = Fixture.load(args.replay)
+            provider = ReplayProvider(fixture, latency=args.latency)
+            set_ipfs_client(ReplayIPFSClient(fixture, latency=args.latency))
+        results = APIBenchmark(chain, args.iterations, provider).run()
+
+    if args.record:
+        fixture.save(args.record)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print('REGRESSION {}'.format(regression))
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+""" Benchmark building currency contract transactions with web3's `ContractFunction`
+    and with the precompiled encoders in `request_network.encoders`.
+
+    No node is needed: only the time taken to produce the transaction dict is measured.
+
+    Run with::
+
+        python -m benchmarks.bench_encoders
+"""
+import timeit
+
+from web3 import Web3
+
+from request_network.artifact_manager import (
+    ArtifactManager,
+)
+from request_network.currencies import (
+    currencies_by_symbol,
+)
+from request_network.services import (
+    ServiceRegistry,
+)
+
+ID_ADDRESS = Web3.toChecksumAddress('0x821aea9a577a9b44299b9c15c88cf3087f3b5544')
+PAYMENT_ADDRESS = Web3.toChecksumAddress('0x6330a553fc93768f612722bb8c2ec78ac90b3bbc')
+IPFS_HASH = 'QmUuHsTJdB6bVdmVW2qEbyTdWYBnPSAWpfiTkqsbjG9krq'
+
+CALL_COUNT = 2000
+
+CALLS = (
+    ('collectEstimation', {'_expectedAmount': 10 ** 18}),
+    ('createRequestAsPayee', {
+        '_payeesIdAddress': [ID_ADDRESS],
+        '_payeesPaymentAddress': [PAYMENT_ADDRESS],
+        '_expectedAmounts': [10 ** 18],
+        '_payer': PAYMENT_ADDRESS,
+        '_payerRefundAddress': PAYMENT_ADDRESS,
+        '_data': IPFS_HASH,
+    }),
+    ('createRequestAsPayer', {
+        '_payeesIdAddress': [ID_ADDRESS],
+        '_expectedAmounts': [10 ** 18],
+        '_payerRefundAddress': PAYMENT_ADDRESS,
+        '_payeeAmounts': [10 ** 18],
+        '_additionals': [0],
+        '_data': IPFS_HASH,
+    }),
+    ('broadcastSignedRequestAsPayer', {
+        '_requestData': '0x' + 'ab' * 97,
+        '_payeesPaymentAddress': [PAYMENT_ADDRESS],
+        '_payeeAmounts': [0],
+        '_additionals': [0],
+        '_expirationDate': 1700000000,
+        '_signature': b'\x01' * 65,
+    }),
+)
+
+
+def measure(service, function_name, kwargs, count=CALL_COUNT):
+    """ Return the average number of microseconds taken to build one transaction.
+    """
+    service.send_transaction = lambda transaction: transaction
+    options = {'from': ID_ADDRESS, 'value': 0}
+    elapsed = timeit.timeit(
+        lambda: service._transact_currency_contract(function_name, options, **kwargs),
+        number=count)
+    return elapsed / count * 10 ** 6
+
+
+def main():
+    registry = ServiceRegistry(artifact_manager=ArtifactManager(ethereum_network='private'))
+    service = registry.get_service(currencies_by_symbol['ETH'])
+
+    print('{:<32} {:>12} {:>12} {:>8}'.format('function', 'web3', 'precompiled', 'speedup'))
+    for function_name, kwargs in CALLS:
+        service.use_precompiled_encoders = False
+        web3_time = measure(service, function_name, kwargs)
+        service.use_precompiled_encoders = True
+        precompiled_time = measure(service, function_name, kwargs)
+        print('{:<32} {:>10.1f}us {:>10.1f}us {:>7.1f}x'.format(
+            function_name, web3_time, precompiled_time, web3_time / precompiled_time))
+
+
+if __name__ == '__main__':
+    main()
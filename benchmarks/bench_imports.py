@@ -0,0 +1,123 @@
+""" Benchmark the time taken to import the library's modules and console scripts.
+
+    Each import runs in a fresh interpreter, and the median of `--repeat` runs is
+    reported together with any heavy optional dependencies the import pulled in.
+    Results can be saved and compared in the same way as `benchmarks.bench_api`.
+
+    Run with::
+
+        python -m benchmarks.bench_imports --output imports.json
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+MODULES = (
+    'request_network.types',
+    'request_network.ledger',
+    'request_network.api',
+    'request_network.scripts.create_qr_code',
+    'request_network.scripts.export_requests',
+)
+
+# Dependencies which should only be loaded when the features using them are used
+HEAVY_MODULES = (
+    'web3', 'web3.auto', 'eth_abi', 'eth_utils', 'unittest.mock', 'ipfsapi', 'pyqrcode')
+
+# Heavy modules which must never be loaded by importing a module, with or without a
+# baseline to compare against
+FORBIDDEN_MODULES = {
+    'request_network.types': ('web3', 'eth_abi'),
+    'request_network.api': ('web3', 'eth_abi'),
+    'request_network.scripts.create_qr_code': ('web3', 'eth_abi'),
+}
+
+MEASURE_IMPORT = '''
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps([elapsed, [m for m in {heavy_modules!r} if m in sys.modules]]))
+'''
+
+
+def measure_import(module, repeat):
+    """ Return the median time taken to import `module` in a new interpreter, and the
+        heavy modules loaded as a result.
+    """
+    times = []
+    for _ in range(repeat):
+        output = subprocess.check_output([
+            sys.executable, '-c',
+            MEASURE_IMPORT.format(module=module, heavy_modules=HEAVY_MODULES)])
+        elapsed, loaded = json.loads(output.decode())
+        times.append(elapsed)
+    return {'import_seconds': statistics.median(times), 'heavy_modules': loaded}
+
+
+def check_forbidden(results):
+    """ Return a list of the modules in `results` which loaded a forbidden module.
+    """
+    regressions = []
+    for name, result in sorted(results.items()):
+        loaded = sorted(set(result['heavy_modules']) & set(FORBIDDEN_MODULES.get(name, ())))
+        if loaded:
+            regressions.append('{}: must not import {}'.format(name, ', '.join(loaded)))
+    return regressions
+
+
+def compare(results, baseline, tolerance):
+    """ Return a list of regressions in `results` compared to `baseline`.
+    """
+    regressions = []
+    for name, result in sorted(results.items()):
+        if name not in baseline:
+            continue
+        previous = baseline[name]
+        added = sorted(set(result['heavy_modules']) - set(previous['heavy_modules']))
+        if added:
+            regressions.append('{}: now imports {}'.format(name, ', '.join(added)))
+        maximum = previous['import_seconds'] * (1 + tolerance)
+        if result['import_seconds'] > maximum:
+            regressions.append('{}: import time increased from {:.3f}s to {:.3f}s'.format(
+                name, previous['import_seconds'], result['import_seconds']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Request Network import times.')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Number of times to import each module')
+    parser.add_argument('--output', type=str, help='Write results to this JSON file')
+    parser.add_argument('--compare', type=str,
+                        help='Compare results against a previous JSON results file')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed fractional increase in import time when comparing')
+    args = parser.parse_args()
+
+    results = {}
+    for module in MODULES:
+        results[module] = measure_import(module, args.repeat)
+        print('{:<48} {:>8.3f}s  {}'.format(
+            module,
+            results[module]['import_seconds'],
+            ', '.join(results[module]['heavy_modules']) or '-'))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    regressions = check_forbidden(results)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions += compare(results, json.load(f), args.tolerance)
+    for regression in regressions:
+        print('REGRESSION {}'.format(regression))
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+""" Benchmark creating a batch of Requests one at a time with `create_request`, and
+    through the staged pipeline of `create_requests`, on the in-process test chain.
+
+    IPFS uploads go to an in-memory stub which can be given a simulated latency.
+
+    Run with::
+
+        python -m benchmarks.bench_pipeline --count 20 --ipfs-latency 0.05
+"""
+import argparse
+import time
+
+from benchmarks.chain import (
+    LocalChain,
+)
+from request_network.api import (
+    RequestNetwork,
+)
+from request_network.currencies import (
+    currencies_by_symbol,
+)
+from request_network.types import (
+    Payee,
+    Payer,
+    Roles,
+)
+from request_network.utils import (
+    set_ipfs_client,
+)
+
+
+class SlowIPFS(object):
+    """ Wraps an IPFS client, sleeping for `latency` seconds per upload.
+    """
+
+    def __init__(self, ipfs, latency):
+        self.ipfs = ipfs
+        self.latency = latency
+
+    def add_json(self, data):
+        time.sleep(self.latency)
+        return self.ipfs.add_json(data)
+
+    def cat(self, ipfs_hash):
+        return self.ipfs.cat(ipfs_hash)
+
+
+def get_batch(chain, count):
+    return [{
+        'role': Roles.PAYEE,
+        'currency': currencies_by_symbol['ETH'],
+        'payees': [Payee(id_address=chain.accounts[2], amount=1000)],
+        'payer': Payer(chain.accounts[1]),
+        'data': {'reason': 'benchmark', 'invoice': i},
+    } for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark bulk Request creation.')
+    parser.add_argument('--count', type=int, default=20, help='Number of Requests to create')
+    parser.add_argument('--ipfs-latency', type=float, default=0.05,
+                        help='Simulated seconds per IPFS upload')
+    parser.add_argument('--sign-locally', action='store_true',
+                        help='Sign transactions locally instead of on the node')
+    args = parser.parse_args()
+
+    with LocalChain() as chain:
+        set_ipfs_client(SlowIPFS(chain.ipfs, args.ipfs_latency))
+        request_api = RequestNetwork(provider=chain.provider, sign_locally=args.sign_locally)
+
+        start = time.perf_counter()
+        for arguments in get_batch(chain, args.count):
+            request_api.create_request(**arguments)
+        request_api.flush_transactions()
+        sequential = time.perf_counter() - start
+        print('{:<24} {:>10.2f} requests/s'.format('create_request', args.count / sequential))
+
+        start = time.perf_counter()
+        result = request_api.create_requests(get_batch(chain, args.count))
+        request_api.flush_transactions()
+        pipelined = time.perf_counter() - start
+        errors = [item.error for item in result.items if item.error]
+        print('{:<24} {:>10.2f} requests/s  {} errors'.format(
+            'create_requests', args.count / pipelined, len(errors)))
+        for name, stats in result.stages.items():
+            print('  {:<22} {:>10.2f} items/s  {:>8.3f}s busy  {} workers'.format(
+                name, stats.throughput, stats.busy_seconds, stats.max_workers))
+
+
+if __name__ == '__main__':
+    main()
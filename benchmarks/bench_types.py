@@ -0,0 +1,107 @@
+""" Memory, construction-time and payment gateway encoding benchmarks for
+    `request_network.types`.
+
+    Run with::
+
+        python -m benchmarks.bench_types
+"""
+import timeit
+import tracemalloc
+
+from web3 import Web3
+
+from request_network.types import (
+    Payee,
+    Payment,
+    Request,
+    get_payment_gateway_urls,
+)
+
+ID_ADDRESS = Web3.toChecksumAddress('0x821aea9a577a9b44299b9c15c88cf3087f3b5544')
+PAYMENT_ADDRESS = Web3.toChecksumAddress('0x6330a553fc93768f612722bb8c2ec78ac90b3bbc')
+CURRENCY_CONTRACT_ADDRESS = Web3.toChecksumAddress('0xf12b5dd4ead5f743c6baa640b0216200e89b60da')
+CALLBACK_URL = 'https://example.com'
+
+OBJECT_COUNT = 100000
+CONSTRUCTION_COUNT = 10000
+
+
+def make_payee():
+    return Payee(id_address=ID_ADDRESS, payment_address=PAYMENT_ADDRESS, amount=100)
+
+
+def make_normalized_payee():
+    return Payee.from_normalized(
+        id_address=ID_ADDRESS, payment_address=PAYMENT_ADDRESS, amount=100)
+
+
+def make_payment():
+    return Payment(payee_index=0, delta_amount=100)
+
+
+def make_request():
+    return Request(
+        currency_contract_address=CURRENCY_CONTRACT_ADDRESS,
+        payees=[make_normalized_payee()],
+        ipfs_hash=None,
+        payments=[make_payment()])
+
+
+def make_signed_request():
+    request = make_request()
+    request.ipfs_hash = 'QmbFpULNpMJEj9LfvhH4hSTfTse5YrS2JvhbHW6bRSo9n7'
+    request.expiration_date = 7952342400000
+    request.signature = '0x' + '11' * 65
+    request.hash = '0x' + '22' * 32
+    return request
+
+
+def measure_memory(factory, count=OBJECT_COUNT):
+    """ Return the average number of bytes allocated per object created by `factory`.
+    """
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    objects = [factory() for _ in range(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(s.size_diff for s in after.compare_to(before, 'filename'))
+    del objects
+    return allocated / count
+
+
+def measure_construction(factory, count=CONSTRUCTION_COUNT):
+    """ Return the average construction time of `factory` in microseconds.
+    """
+    return min(timeit.repeat(factory, number=count, repeat=5)) / count * 10 ** 6
+
+
+def main():
+    benchmarks = [
+        ('Payee', make_payee),
+        ('Payee.from_normalized', make_normalized_payee),
+        ('Payment', make_payment),
+        ('Request (1 payee, 1 payment)', make_request),
+    ]
+    print('{:<32} {:>14} {:>14}'.format('Type', 'bytes/object', 'us/object'))
+    for name, factory in benchmarks:
+        print('{:<32} {:>14.1f} {:>14.2f}'.format(
+            name, measure_memory(factory), measure_construction(factory)))
+
+    request = make_signed_request()
+    requests = [make_signed_request() for _ in range(CONSTRUCTION_COUNT)]
+    encoders = [
+        ('get_payment_gateway_url (memoised)',
+         lambda: request.get_payment_gateway_url(CALLBACK_URL, 4), CONSTRUCTION_COUNT),
+        ('get_payment_gateway_urls (batch)',
+         lambda: get_payment_gateway_urls(requests, CALLBACK_URL, 4), 1),
+    ]
+    print()
+    print('{:<47} {:>14}'.format('Gateway URL encoding', 'us/request'))
+    for name, function, number in encoders:
+        print('{:<47} {:>14.2f}'.format(
+            name, min(timeit.repeat(function, number=number, repeat=5)) /
+            CONSTRUCTION_COUNT * 10 ** 6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+""" An in-process test chain with the bundled Request Network contracts deployed, and
+    a stub IPFS node, so the API can be benchmarked without any external services.
+
+    Requires the `web3[tester]` extra.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from unittest import (
+    mock,
+)
+
+from eth_tester import (
+    EthereumTester,
+)
+import eth_tester.backends.pyevm.main as pyevm_main
+from web3 import Web3
+from web3.providers.eth_tester import (
+    EthereumTesterProvider,
+)
+
+from request_network.api import (
+    RequestNetwork,
+)
+from request_network.constants import (
+    ARTIFACT_DIRECTORY_ENVIRONMENT_VARIABLE,
+    NETWORK_NAME_ENVIRONMENT_VARIABLE,
+)
+from request_network.utils import (
+    set_ipfs_client,
+)
+
+NETWORK_NAME = 'benchmark'
+# The default genesis gas limit is too low to deploy RequestCore, or to create Requests
+# with many payees. Match the limit used for Ganache in CI.
+GAS_LIMIT = 90000000
+DEPLOYMENT_GAS = 8000000
+
+BUNDLED_ARTIFACT_DIRECTORY = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.realpath(__file__))),
+    'request_network', 'artifacts')
+ARTIFACTS = {
+    'core': 'RequestCore/RequestCore-0.0.5-test.json',
+    'ethereum': 'RequestEthereum/RequestEthereum-0.0.5-test.json',
+    'erc20': 'RequestERC20/RequestERC20-0.2.2-test-test.json',
+}
+
+
+class StubIPFS(object):
+    """ In-memory replacement for an `ipfsapi` client.
+    """
+
+    def __init__(self):
+        self.files = {}
+
+    def add_json(self, data):
+        content = json.dumps(data, sort_keys=True).encode()
+        ipfs_hash = 'Qm' + hashlib.sha256(content).hexdigest()[:44]
+        self.files[ipfs_hash] = content
+        return ipfs_hash
+
+    def cat(self, ipfs_hash):
+        return self.files[ipfs_hash]
+
+
+class LocalChain(object):
+    """ Deploys RequestCore, RequestEthereum and RequestERC20 to an in-process chain, and
+        writes an artifact directory describing the deployment.
+
+        Use as a context manager: while active, the library's network name and artifact
+        directory point to the local deployment, and IPFS calls go to a `StubIPFS`.
+    """
+
+    def __init__(self):
+        pyevm_main.GENESIS_GAS_LIMIT = GAS_LIMIT
+        self.tester = EthereumTester()
+        self.provider = EthereumTesterProvider(self.tester)
+        self.web3 = Web3(self.provider)
+        self.accounts = self.web3.eth.accounts
+        self.owner = self.accounts[0]
+        # Accounts whose private keys are available to the signer, for signed Requests
+        self.private_keys = {
+            Web3.toChecksumAddress(key.public_key.to_checksum_address()): key.to_hex()
+            for key in self.tester.backend.account_keys
+        }
+        self.ipfs = StubIPFS()
+        self.artifact_directory = tempfile.mkdtemp()
+        self.contracts = {}
+        self._environment_patch = None
+
+    def _deploy(self, name, *constructor_args):
+        with open(os.path.join(BUNDLED_ARTIFACT_DIRECTORY, ARTIFACTS[name])) as f:
+            artifact = json.load(f)
+        factory = self.web3.eth.contract(abi=artifact['abi'], bytecode=artifact['bytecode'])
+        tx_hash = factory.constructor(*constructor_args).transact(
+            {'from': self.owner, 'gas': DEPLOYMENT_GAS})
+        receipt = self.web3.eth.getTransactionReceipt(tx_hash)
+        contract = self.web3.eth.contract(abi=artifact['abi'], address=receipt.contractAddress)
+        self.contracts[name] = contract
+
+        artifact['networks'] = {
+            NETWORK_NAME: {'address': receipt.contractAddress, 'blockNumber': 0}
+        }
+        path = os.path.join(self.artifact_directory, ARTIFACTS[name])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(artifact, f)
+        return contract
+
+    def deploy(self):
+        burner = self.accounts[9]
+        # Any address can stand in for the token, as benchmarks do not transfer tokens
+        self.token_address = self.accounts[8]
+
+        core = self._deploy('core')
+        ethereum = self._deploy('ethereum', core.address, burner)
+        erc20 = self._deploy('erc20', core.address, burner, self.token_address)
+        for currency_contract in (ethereum, erc20):
+            core.functions.adminAddTrustedCurrencyContract(currency_contract.address).transact(
+                {'from': self.owner})
+
+        artifacts = {
+            'last-requestcore': ARTIFACTS['core'],
+            'last-requestethereum': ARTIFACTS['ethereum'],
+            'last-requesterc20-{}'.format(self.token_address.lower()): ARTIFACTS['erc20'],
+        }
+        for name, contract in self.contracts.items():
+            artifacts[contract.address.lower()] = ARTIFACTS[name]
+        with open(os.path.join(self.artifact_directory, 'artifacts.json'), 'w') as f:
+            json.dump({NETWORK_NAME: artifacts}, f)
+
+    def get_request_api(self, provider=None):
+        """ Return a `RequestNetwork` using the local chain, or `provider` if given.
+        """
+        return RequestNetwork(provider=provider or self.provider)
+
+    def __enter__(self):
+        environment = {
+            NETWORK_NAME_ENVIRONMENT_VARIABLE: NETWORK_NAME,
+            ARTIFACT_DIRECTORY_ENVIRONMENT_VARIABLE: self.artifact_directory,
+        }
+        for address, private_key in self.private_keys.items():
+            environment['REQUEST_NETWORK_PRIVATE_KEY_{}'.format(address)] = private_key
+        self._environment_patch = mock.patch.dict(os.environ, environment)
+        self._environment_patch.start()
+        set_ipfs_client(self.ipfs)
+        self.deploy()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        set_ipfs_client(None)
+        self._environment_patch.stop()
+        shutil.rmtree(self.artifact_directory)
+        return False
@@ -0,0 +1,98 @@
+from collections import (
+    OrderedDict,
+)
+import sys
+import threading
+
+from request_network.constants import (
+    ADDRESS_CACHE_SIZE,
+)
+
+
+class AddressCache(object):
+    """ Bounded, thread-safe LRU cache mapping addresses to their interned checksum
+        string and 20 byte canonical form.
+
+        Checksumming an address requires a keccak hash, and the same handful of
+        addresses (contracts, payees, payers) are normalised over and over, so the
+        result is cached. Hit and miss counters are kept to help size the cache.
+    """
+
+    def __init__(self, max_size=ADDRESS_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_entry(self, address):
+        """ Return a (checksum_address, canonical_address) tuple for `address`.
+
+            Raises ValueError if `address` is not a valid Ethereum address.
+        """
+        with self._lock:
+            try:
+                entry = self._entries[address]
+            except KeyError:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(address)
+                return entry
+
+        # Compute outside the lock; two threads missing on the same address will
+        # both compute the same value, which is harmless.
+        from eth_utils import to_checksum_address
+        checksum_address = sys.intern(to_checksum_address(address))
+        entry = (checksum_address, bytes.fromhex(checksum_address[2:]))
+
+        with self._lock:
+            self._entries[address] = entry
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return entry
+
+    def to_checksum_address(self, address):
+        return self._get_entry(address)[0]
+
+    def to_canonical_address(self, address):
+        return self._get_entry(address)[1]
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        """ Return a dict of counters describing cache usage.
+        """
+        with self._lock:
+            size = len(self._entries)
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate,
+            'size': size,
+            'max_size': self.max_size,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+address_cache = AddressCache()
+
+
+def to_checksum_address(address):
+    """ Return the interned checksum version of `address`, using the shared cache.
+    """
+    return address_cache.to_checksum_address(address)
+
+
+def to_canonical_address(address):
+    """ Return the 20 byte representation of `address`, using the shared cache.
+    """
+    return address_cache.to_canonical_address(address)
@@ -1,54 +1,230 @@
 from collections import (
     namedtuple,
 )
-from unittest import (
-    mock,
+from concurrent.futures import (
+    ThreadPoolExecutor,
 )
-
-from eth_abi import (
-    decode_abi,
-)
-from eth_abi.decoding import (
-    StringDecoder,
-    decode_uint_256,
-)
-from eth_utils import (
-    event_abi_to_log_topic,
-)
-from web3 import Web3
-from web3.auto import (
-    w3,
-)
-from web3.utils.events import (
-    get_event_data,
+from contextlib import (
+    contextmanager,
 )
+import functools
+import threading
 
-from request_network.artifact_manager import (
-    ArtifactManager,
+from request_network.addresses import (
+    to_canonical_address,
+    to_checksum_address,
+)
+from request_network.cache import (
+    get_call_cache,
 )
 from request_network.constants import (
     EMPTY_BYTES_20,
 )
+from request_network.currencies import (
+    get_currency_registry,
+)
 from request_network.exceptions import (
     RequestNotFound,
     RoleNotSupported,
     TransactionNotFound,
 )
+from request_network.instrumentation import (
+    install_middleware,
+    span,
+)
+from request_network.pipeline import (
+    Pipeline,
+    PipelineItem,
+    Stage,
+)
+from request_network.single_flight import (
+    SingleFlight,
+)
 from request_network.types import (
     Payee,
     Payment,
     Request,
     Roles,
 )
-from request_network.utils import (
-    get_service_for_currency,
-    retrieve_ipfs_data,
-)
+
+# Converts the data returned from 'RequestCore:getRequest' into a friendly object
+RequestContractData = namedtuple('RequestContractData', [
+    'payer_address', 'currency_contract_address', 'state',
+    'payee_id_address', 'amount', 'balance'
+])
+
+
+# The outcome of `RequestNetwork.create_requests`: the batch's `RequestCreationItem`s, in
+# input order, and the `pipeline.StageStats` of each stage, keyed by stage name.
+CreateRequestsResult = namedtuple('CreateRequestsResult', ['items', 'stages'])
+
+
+class RequestCreationItem(PipelineItem):
+    """ A Request passing through the `RequestNetwork.create_requests` pipeline.
+
+        Once the pipeline has run, `transaction_hash` is set if the Request's transaction
+        was sent, otherwise `error` and `failed_stage` describe why it was not.
+    """
+
+    def __init__(self, index, role, currency, payees, payer, data=None):
+        super().__init__()
+        self.index = index
+        self.role = role
+        self.currency = currency
+        self.payees = payees
+        self.payer = payer
+        self.data = data
+        self.service = None
+        self.creation = None
+        self.ipfs_hash = None
+        self.fee = None
+        self.transaction = None
+        self.transaction_hash = None
+
+
+def _lower(value):
+    return value.lower() if isinstance(value, str) else value
+
+
+def _run_in_executor(function, *args, **kwargs):
+    import asyncio
+    return asyncio.get_event_loop().run_in_executor(
+        None, functools.partial(function, *args, **kwargs))
+
+
+def _get_event_topic(event):
+    """ Return the topic of a contract event's logs, as a hex string.
+    """
+    from eth_utils import event_abi_to_log_topic
+    return '0x' + event_abi_to_log_topic(event_abi=event().abi).hex()
 
 
 class RequestNetwork(object):
     """ The main interaction point with the Request Network API.
+
+        Each instance owns its `Web3` instance, artifacts, contract instances and
+        services, so clients for different networks can be used side by side, e.g.::
+
+            mainnet = RequestNetwork(network='main', provider=HTTPProvider(MAINNET_URL))
+            rinkeby = RequestNetwork(network='rinkeby', provider=HTTPProvider(RINKEBY_URL))
+
+        Instances are safe to share between threads, and should be long-lived.
     """
+    web3 = None
+    artifact_manager = None
+
+    def __init__(self, provider_config=None, provider=None, network=None, artifact_dir=None,
+                 sign_locally=False, signing_pool_config=None, cache_gas_estimates=False,
+                 gas_price_oracle_config=None, coalesce_reads=False):
+        """
+        :param provider_config: Optional dict of `PooledHTTPProvider` arguments. If given,
+            JSON-RPC requests are spread over the configured endpoints instead of the
+            automatically detected provider, e.g.
+            `{'endpoints': ['http://node-1:8545', 'http://node-2:8545'], 'hedge_after': 0.5}`
+        :type provider_config: dict
+        :param provider: Optional web3 provider instance to use instead of the
+            automatically detected provider
+        :param network: Optional name of the Ethereum network whose contracts are used.
+            Defaults to the `REQUEST_NETWORK_ETHEREUM_NETWORK_NAME` environment variable.
+        :param artifact_dir: Optional directory containing `artifacts.json`. Defaults to
+            the `REQUEST_NETWORK_ARTIFACT_DIRECTORY` environment variable, or the bundled
+            artifacts.
+        :param sign_locally: If True, transactions are signed locally with the private
+            keys used by `signers.private_key_environment_variable_signer`, and submitted
+            with `eth_sendRawTransaction`, so the node does not need an unlocked account.
+            Submission is pipelined: methods sending transactions return the transaction
+            hash once it is signed, and `flush_transactions` waits for the node to accept
+            them.
+        :param signing_pool_config: Optional dict of `transactions.LocalSigningPool`
+            arguments, e.g. `{'max_workers': 4, 'max_in_flight': 16}`
+        :param cache_gas_estimates: If True, gas limits are learned per currency contract
+            function, payee count and presence of data, rather than estimated by the node
+            for every transaction. Estimates are refined from the receipts seen by this
+            client's `ConfirmationTracker`s. Transactions which run out of gas are not
+            retried, their `Confirmation.out_of_gas` is set and they must be resubmitted.
+        :param gas_price_oracle_config: Optional dict of `gas.GasPriceOracle` arguments,
+            e.g. `{'default_tier': 'fast'}`. If given, transactions pay a percentile of
+            recently mined gas prices instead of the node's default gas price. If it
+            includes `'start': True`, or a number of seconds as `'start'`, the oracle
+            samples blocks in a background thread from now on, so sending a transaction
+            never waits for them, until `gas_price_oracle.stop()` is called.
+        :param coalesce_reads: If True, concurrent calls to `get_request_by_id` (with the
+            same block arguments) or `get_request_by_transaction_hash` for the same
+            Request share a single lookup, and return the same Request instance. Counters
+            are available from `read_calls.stats()`.
+        """
+        # web3 and the modules using it are imported here, rather than with this module,
+        # so importing the library stays cheap for code which never creates a client
+        from web3 import Web3
+
+        from request_network.artifact_manager import ArtifactManager
+        from request_network.gas import GasEstimateCache, GasPriceOracle
+        from request_network.providers import PooledHTTPProvider, get_default_web3
+        from request_network.services import ServiceRegistry
+        from request_network.transactions import LocalSigningPool
+
+        if provider_config:
+            self.web3 = Web3(PooledHTTPProvider(**provider_config))
+        elif provider:
+            self.web3 = Web3(provider)
+        else:
+            self.web3 = get_default_web3()
+        install_middleware(self.web3)
+
+        self.artifact_manager = ArtifactManager(
+            web3=self.web3, ethereum_network=network, artifact_directory=artifact_dir)
+        self.artifact_manager.preload()
+        self.currencies = get_currency_registry(self.artifact_manager)
+        self.transaction_pool = LocalSigningPool(
+            web3=self.web3, **(signing_pool_config if signing_pool_config else {})) \
+            if sign_locally else None
+        self.gas_estimates = GasEstimateCache(self.web3) if cache_gas_estimates else None
+        self.gas_price_oracle = None
+        if gas_price_oracle_config is not None:
+            gas_price_oracle_config = dict(gas_price_oracle_config)
+            start = gas_price_oracle_config.pop('start', False)
+            self.gas_price_oracle = GasPriceOracle(self.web3, **gas_price_oracle_config)
+            if start:
+                # A number of seconds is the sampling interval, True uses `max_age`
+                self.gas_price_oracle.start(None if start is True else start)
+        self.services = ServiceRegistry(
+            artifact_manager=self.artifact_manager,
+            currencies=self.currencies,
+            transaction_pool=self.transaction_pool,
+            gas_estimates=self.gas_estimates,
+            gas_price_oracle=self.gas_price_oracle)
+        self.read_calls = SingleFlight() if coalesce_reads else None
+
+    @property
+    def network(self):
+        return self.artifact_manager.ethereum_network
+
+    def flush_transactions(self):
+        """ Wait until every locally signed transaction has been accepted by the node,
+            raising the first submission error, if any. Does nothing unless the client
+            was created with `sign_locally=True`.
+        """
+        if self.transaction_pool:
+            self.transaction_pool.flush()
+
+    def get_confirmation_tracker(self, **kwargs):
+        """ Return a `ConfirmationTracker` for transactions sent by this client.
+
+        :param kwargs: `ConfirmationTracker` arguments, e.g. `confirmations`
+        :rtype: request_network.confirmations.ConfirmationTracker
+        """
+        from request_network.confirmations import ConfirmationTracker
+        kwargs.setdefault('gas_estimates', self.gas_estimates)
+        return ConfirmationTracker(
+            web3=self.web3, artifact_manager=self.artifact_manager, **kwargs)
+
+    def get_service(self, currency):
+        """ Return this client's service for `currency`.
+
+        :type currency: currencies.Currency
+        :rtype: request_network.services.RequestCoreService
+        """
+        return self.services.get_service(currency)
 
     def create_request(self, role, currency, payees, payer, data=None):
         """ Create a Request.
@@ -85,7 +261,7 @@ class RequestNetwork(object):
             'amounts': [payee.amount for payee in payees],
             'data': data
         }
-        service = get_service_for_currency(currency)
+        service = self.get_service(currency)
         if role == Roles.PAYEE:
             method = getattr(service, 'create_request_as_payee')
         elif role == Roles.PAYER:
@@ -97,6 +273,83 @@ class RequestNetwork(object):
 
         return method(**service_args)
 
+    def _prepare_request_creation(self, item):
+        item.service = self.get_service(item.currency)
+        service_args = {
+            'payer_id_address': item.payer.id_address,
+            'payer_refund_address': item.payer.refund_address,
+            'id_addresses': [payee.id_address for payee in item.payees],
+            'payment_addresses': [payee.payment_address for payee in item.payees],
+            'amounts': [payee.amount for payee in item.payees],
+        }
+        if item.role == Roles.PAYEE:
+            item.creation = item.service.prepare_request_as_payee(**service_args)
+        elif item.role == Roles.PAYER:
+            item.creation = item.service.prepare_request_as_payer(
+                additional_payments=[p.additional_amount for p in item.payees],
+                creation_payments=[p.payment_amount for p in item.payees],
+                **service_args)
+        else:
+            raise RoleNotSupported('{} is not a valid role'.format(item.role))
+
+    def create_requests(self, batch, ipfs_workers=8, fee_workers=4, max_queued=None):
+        """ Create many Requests, running the stages of `create_request` as a pipeline.
+
+        The stages are validation, IPFS upload, fee estimation, transaction encoding and
+        submission. Each stage has its own threads and a bounded queue, so a slow stage
+        holds back the stages feeding it rather than letting work pile up. Fees are
+        estimated once per currency contract and amount. Transactions are submitted by
+        a single thread in the order they are encoded, so each sender's nonces are
+        assigned without gaps. With `sign_locally=True` they are signed and submitted
+        through the client's `LocalSigningPool`.
+
+        A Request which fails a stage skips the remaining stages, and does not stop the
+        rest of the batch.
+
+        :param batch: Iterable of dicts of `create_request` arguments, i.e. `role`,
+            `currency`, `payees`, `payer` and optionally `data`
+        :param ipfs_workers: Maximum number of concurrent IPFS uploads
+        :param fee_workers: Maximum number of concurrent fee estimations
+        :param max_queued: Maximum number of Requests waiting for each stage, defaults to
+            twice the stage's number of workers
+        :rtype: CreateRequestsResult
+        """
+        items = [RequestCreationItem(index, **arguments) for index, arguments in enumerate(batch)]
+
+        fees = {}
+        fees_lock = threading.Lock()
+
+        def estimate_fee(item):
+            key = (item.service.currency_contract_data['address'], item.creation.fee_amount)
+            with fees_lock:
+                fee = fees.get(key)
+            if fee is None:
+                fee = item.service.estimate_fee(item.creation.fee_amount)
+                with fees_lock:
+                    fees[key] = fee
+            item.fee = fee
+
+        from request_network.utils import store_ipfs_data
+
+        def store_data(item):
+            item.ipfs_hash = store_ipfs_data(item.data) if item.data else ''
+
+        def build_transaction(item):
+            item.transaction = item.service.build_request_transaction(
+                item.creation, item.ipfs_hash, item.fee)
+
+        def send_transaction(item):
+            item.transaction_hash = item.service.send_transaction(item.transaction)
+
+        pipeline = Pipeline([
+            Stage('validation', self._prepare_request_creation, max_queued=max_queued),
+            Stage('ipfs', store_data, max_workers=ipfs_workers, max_queued=max_queued),
+            Stage('fee', estimate_fee, max_workers=fee_workers, max_queued=max_queued),
+            Stage('encoding', build_transaction, max_queued=max_queued),
+            Stage('submission', send_transaction, max_queued=max_queued),
+        ])
+        return CreateRequestsResult(items=items, stages=pipeline.run(items))
+
     def create_signed_request(self, role, currency, payees,
                               expiration_date, data=None):
         """ Create a signed Request instance
@@ -125,8 +378,10 @@ class RequestNetwork(object):
             'expiration_date': expiration_date,
             'data': data
         }
-        service = get_service_for_currency(currency)
-        return service.sign_request_as_payee(**service_args)
+        service = self.get_service(currency)
+        signed_request = service.sign_request_as_payee(**service_args)
+        signed_request._client = self
+        return signed_request
 
     def broadcast_signed_request(self, signed_request, payer_address, payment_amounts=None,
                                  additional_payments=None):
@@ -150,82 +405,120 @@ class RequestNetwork(object):
             included in a block, will create (and possibly pay, depending on `payment_amounts`)
             this Request.
         """
-        am = ArtifactManager()
-        service_class = am.get_service_class_by_address(signed_request.currency_contract_address)
-        # currency = signed_request.currency_cont
         service_args = {
             'signed_request': signed_request,
             'creation_payments': payment_amounts,  # TODO decide naming convention, stick to it
             'additional_payments': additional_payments,
             'payer_address': payer_address
         }
-        service = service_class()
+        service = self.services.get_service_by_address(signed_request.currency_contract_address)
         return service.broadcast_signed_request_as_payer(**service_args)
 
-    def get_request_by_id(self, request_id, block_number=None):
+    def get_request_by_id(self, request_id, block_number=None, block_identifier=None):
         """ Get a Request from its ID.
 
         :param request_id: The Request ID as a 32 byte hex string
         :param block_number: If provided, only search for Created events from this block onwards.
+        :param block_identifier: If provided, return the Request as it was at this block
+            number. Contract reads pinned to a finalized block are cached permanently,
+            so repeated historical lookups do not hit the node.
         :return: A Request instance
         :rtype: request_network.types.Request
         """
-        core_contract_address = Web3.toChecksumAddress(request_id[:42])
-        am = ArtifactManager()
-        core_contract_data = am.get_contract_data(core_contract_address)
-
-        core_contract = w3.eth.contract(
-            address=core_contract_address,
-            abi=core_contract_data['abi'])
+        if self.read_calls is not None:
+            return self.read_calls.call(
+                ('request_id', _lower(request_id), block_number, block_identifier),
+                self._get_request,
+                request_id, block_number=block_number, block_identifier=block_identifier)
+        return self._get_request(
+            request_id, block_number=block_number, block_identifier=block_identifier)
+
+    async def get_request_by_id_async(self, request_id, block_number=None,
+                                      block_identifier=None):
+        """ Coroutine version of `get_request_by_id`, which runs it in the event loop's
+            default executor. Concurrent lookups are coalesced with those made from
+            threads when the client was created with `coalesce_reads=True`.
+        """
+        if self.read_calls is not None:
+            return await self.read_calls.call_async(
+                ('request_id', _lower(request_id), block_number, block_identifier),
+                self._get_request,
+                request_id, block_number=block_number, block_identifier=block_identifier)
+        return await _run_in_executor(
+            self._get_request,
+            request_id, block_number=block_number, block_identifier=block_identifier)
+
+    def _get_request(self, request_id, block_number=None, block_identifier=None,
+                     created_log=None, load_data=True, currency_contract_address=None):
+        """ Build a Request from the core contract.
+
+        :param created_log: The Request's raw `Created` log, if it has already been retrieved
+        :param load_data: If False the Request's IPFS data is only retrieved when first accessed
+        :param currency_contract_address: If given, return None instead of building the
+            Request if it does not use this currency contract
+        """
+        from web3.utils.events import get_event_data
 
-        # Converts the data returned from 'RequestCore:getRequest' into a friendly object
-        RequestContractData = namedtuple('RequestContractData', [
-            'payer_address', 'currency_contract_address', 'state',
-            'payee_id_address', 'amount', 'balance'
-        ])
+        core_contract_address = to_checksum_address(request_id[:42])
+        am = self.artifact_manager
+        core_contract_data = am.get_contract_data(core_contract_address)
 
-        try:
-            request_data = RequestContractData(*core_contract.functions.getRequest(
-                request_id).call())
-        except ValueError:
-            # web3 will raise a ValueError if the contract at core_contract_address is not
-            # a valid contract address. This could happen if the given Request ID contains
-            # an invalid core_contract_address, so we treat it as an invalid Request ID.
-            raise RequestNotFound('Request ID {} has an invalid core contract address {}'.format(
-                request_id,
-                core_contract_address
-            ))
-
-        if request_data.payer_address == EMPTY_BYTES_20:
-            raise RequestNotFound('Request ID {} not found on core contract {}'.format(
-                request_id,
-                core_contract_address
-            ))
-
-        # Payment addresses for payees are not stored with the Request in the contract,
-        # so they need to be looked up separately
-        service_contract = am.get_contract_instance(request_data.currency_contract_address)
-        payees = [
-            Payee(
-                id_address=request_data.payee_id_address,
-                amount=request_data.amount,
-                balance=request_data.balance,
-                payment_address=service_contract.functions.payeesPaymentAddress(
-                    request_id, 0).call()
-            )
-        ]
-
-        sub_payees_count = core_contract.functions.getSubPayeesCount(request_id).call()
-        for i in range(sub_payees_count):
-            (address, amount, balance) = core_contract.functions.subPayees(request_id, i).call()
-            payment_address = service_contract.functions.payeesPaymentAddress(
-                request_id, i + 1).call()
-            payees.append(Payee(
-                id_address=address,
-                payment_address=payment_address,
-                balance=balance,
-                amount=amount
-            ))
+        core_contract = core_contract_data['instance']
+        call_cache = get_call_cache(self.web3)
+
+        def call(contract_function):
+            return call_cache.call(contract_function, block_identifier)
+
+        with span('get_request_by_id', 'contract_reads'):
+            try:
+                request_data = RequestContractData(*call(core_contract.functions.getRequest(
+                    request_id)))
+            except ValueError:
+                # web3 will raise a ValueError if the contract at core_contract_address is not
+                # a valid contract address. This could happen if the given Request ID contains
+                # an invalid core_contract_address, so we treat it as an invalid Request ID.
+                raise RequestNotFound(
+                    'Request ID {} has an invalid core contract address {}'.format(
+                        request_id,
+                        core_contract_address
+                    ))
+
+            if request_data.payer_address == EMPTY_BYTES_20:
+                raise RequestNotFound('Request ID {} not found on core contract {}'.format(
+                    request_id,
+                    core_contract_address
+                ))
+
+            if currency_contract_address and \
+                    request_data.currency_contract_address != currency_contract_address:
+                return None
+
+            # Payment addresses for payees are not stored with the Request in the contract,
+            # so they need to be looked up separately
+            service_contract = am.get_contract_instance(request_data.currency_contract_address)
+            # Addresses returned by web3 contract calls are already checksummed
+            payees = [
+                Payee.from_normalized(
+                    id_address=request_data.payee_id_address,
+                    amount=request_data.amount,
+                    balance=request_data.balance,
+                    payment_address=call(service_contract.functions.payeesPaymentAddress(
+                        request_id, 0))
+                )
+            ]
+
+            sub_payees_count = call(core_contract.functions.getSubPayeesCount(request_id))
+            for i in range(sub_payees_count):
+                (address, amount, balance) = call(
+                    core_contract.functions.subPayees(request_id, i))
+                payment_address = call(service_contract.functions.payeesPaymentAddress(
+                    request_id, i + 1))
+                payees.append(Payee.from_normalized(
+                    id_address=address,
+                    payment_address=payment_address,
+                    balance=balance,
+                    amount=amount
+                ))
 
         # To find the creator and data for a Request we need to find the Created event
         # that was emitted when the Request was created
@@ -233,56 +526,64 @@ class RequestNetwork(object):
         # they rely on `eth_newFilter` which is not supported on Infura. As a workaround
         # the logs are retrieved with `web3.eth`getLogs` which does not require a new
         # filter to be created.
-        created_event_signature = Web3.toHex(event_abi_to_log_topic(
-            event_abi=core_contract.events.Created().abi
-        ))
-        logs = w3.eth.getLogs({
-            'fromBlock': block_number if block_number else core_contract_data['block_number'],
-            'address': core_contract_address,
-            'topics': [created_event_signature, request_id]
-        })
-        assert len(logs) == 1, "Incorrect number of logs returned"
-
-        # Work around Solidity bug. See note in read_padded_data_from_stream.
-        with mock.patch.object(
-                StringDecoder,
-                'read_data_from_stream',
-                new=read_padded_data_from_stream):
-            created_event_data = get_event_data(
-                event_abi=core_contract.events.Created().abi,
-                log_entry=logs[0]
-            )
+        if created_log is None:
+            with span('get_request_by_id', 'log_scan'):
+                created_event_signature = _get_event_topic(core_contract.events.Created)
+                logs = self.web3.eth.getLogs({
+                    'fromBlock':
+                        block_number if block_number else core_contract_data['block_number'],
+                    'address': core_contract_address,
+                    'topics': [created_event_signature, request_id]
+                })
+            assert len(logs) == 1, "Incorrect number of logs returned"
+            created_log = logs[0]
+
+        with span('get_request_by_id', 'event_decoding'):
+            # Work around Solidity bug. See note in read_padded_data_from_stream.
+            with padded_string_decoding():
+                created_event_data = get_event_data(
+                    event_abi=core_contract.events.Created().abi,
+                    log_entry=created_log
+                )
 
         # creator = log_data.args.creator
-        # See if we have an IPFS hash, and get the file if so
+        # See if we have an IPFS hash, and get the file if so. If the data is not loaded
+        # here the Request retrieves it when `Request.data` is first accessed.
         if created_event_data.args.data != '':
             ipfs_hash = created_event_data.args.data
-            data = retrieve_ipfs_data(ipfs_hash)
+            if load_data:
+                from request_network.utils import retrieve_ipfs_data
+                with span('get_request_by_id', 'ipfs'):
+                    data = retrieve_ipfs_data(ipfs_hash)
+            else:
+                data = None
         else:
             ipfs_hash = None
             data = {}
 
         # Iterate through UpdateBalance events to build a list of payments made for this request
-        updated_event_signature = Web3.toHex(event_abi_to_log_topic(
-            event_abi=core_contract.events.UpdateBalance().abi
-        ))
-        logs = w3.eth.getLogs({
-            'fromBlock': block_number if block_number else core_contract_data['block_number'],
-            'address': core_contract_address,
-            'topics': [updated_event_signature, request_id]
-        })
+        with span('get_request_by_id', 'log_scan'):
+            updated_event_signature = _get_event_topic(core_contract.events.UpdateBalance)
+            logs = self.web3.eth.getLogs({
+                'fromBlock': block_number if block_number else core_contract_data['block_number'],
+                # Only include payments made up to the pinned block, if given
+                'toBlock': block_identifier if block_identifier is not None else 'latest',
+                'address': core_contract_address,
+                'topics': [updated_event_signature, request_id]
+            })
 
         payments = []
-        for log in logs:
-            event_data = get_event_data(
-                event_abi=core_contract.events.UpdateBalance().abi,
-                log_entry=log
-            )
-            payments.append(Payment(
-                payee_index=event_data.args.payeeIndex,
-                delta_amount=event_data.args.deltaAmount
-            ))
-            payees[event_data.args.payeeIndex].paid_amount += event_data.args.deltaAmount
+        with span('get_request_by_id', 'event_decoding'):
+            for log in logs:
+                event_data = get_event_data(
+                    event_abi=core_contract.events.UpdateBalance().abi,
+                    log_entry=log
+                )
+                payments.append(Payment(
+                    payee_index=event_data.args.payeeIndex,
+                    delta_amount=event_data.args.deltaAmount
+                ))
+                payees[event_data.args.payeeIndex].paid_amount += event_data.args.deltaAmount
 
         # TODO set request state
         return Request(
@@ -294,7 +595,8 @@ class RequestNetwork(object):
             payments=payments,
             ipfs_hash=ipfs_hash,
             data=data,
-            transaction_hash=Web3.toHex(created_event_data.transactionHash)
+            transaction_hash=created_event_data.transactionHash.hex(),
+            client=self
         )
 
     def get_request_by_transaction_hash(self, transaction_hash):
@@ -304,19 +606,43 @@ class RequestNetwork(object):
         :return: A Request instance
         :rtype: request_network.types.Request
         """
-        tx_data = w3.eth.getTransaction(transaction_hash)
+        if self.read_calls is not None:
+            return self.read_calls.call(
+                ('transaction_hash', _lower(transaction_hash)),
+                self._get_request_by_transaction_hash, transaction_hash)
+        return self._get_request_by_transaction_hash(transaction_hash)
+
+    async def get_request_by_transaction_hash_async(self, transaction_hash):
+        """ Coroutine version of `get_request_by_transaction_hash`, see
+            `get_request_by_id_async`.
+        """
+        if self.read_calls is not None:
+            return await self.read_calls.call_async(
+                ('transaction_hash', _lower(transaction_hash)),
+                self._get_request_by_transaction_hash, transaction_hash)
+        return await _run_in_executor(self._get_request_by_transaction_hash, transaction_hash)
+
+    def _get_request_by_transaction_hash(self, transaction_hash):
+        from eth_abi import decode_abi
+        from web3 import Web3
+
+        with span('get_request_by_transaction_hash', 'transaction_lookup'):
+            tx_data = self.web3.eth.getTransaction(transaction_hash)
         if not tx_data:
             raise TransactionNotFound(transaction_hash)
 
-        am = ArtifactManager()
+        am = self.artifact_manager
         currency_contract = am.get_contract_instance(tx_data['to'])
 
-        # Decode the transaction input data to get the function arguments
-        func = currency_contract.get_function_by_selector(tx_data['input'][:10])
-        arg_types = [i['type'] for i in func.abi['inputs']]
-        arg_names = [i['name'] for i in func.abi['inputs']]
-        arg_values = decode_abi(arg_types, Web3.toBytes(hexstr=tx_data['input'][10:]))
-        function_args = dict(zip(arg_names, arg_values))
+        with span('get_request_by_transaction_hash', 'input_decoding'):
+            # Decode the transaction input data to get the function arguments.
+            # Some providers (e.g. eth-tester) return the input as `data`.
+            tx_input = tx_data['input'] if 'input' in tx_data else tx_data['data']
+            func = currency_contract.get_function_by_selector(tx_input[:10])
+            arg_types = [i['type'] for i in func.abi['inputs']]
+            arg_names = [i['name'] for i in func.abi['inputs']]
+            arg_values = decode_abi(arg_types, Web3.toBytes(hexstr=tx_input[10:]))
+            function_args = dict(zip(arg_names, arg_values))
 
         # If this is a 'simple' Request we can take the ID from the transaction input.
         if '_requestId' in function_args:
@@ -325,24 +651,138 @@ class RequestNetwork(object):
 
         # For more complex Requests (e.g. those created by broadcasting a signed Request)
         # we need to find the 'Created' event log that was emitted and take the ID from there.
-        tx_receipt = w3.eth.getTransactionReceipt(transaction_hash)
+        with span('get_request_by_transaction_hash', 'receipt'):
+            tx_receipt = self.web3.eth.getTransactionReceipt(transaction_hash)
         if not tx_receipt:
             raise Exception('TODO could not get tx receipt')
 
-        # Extract the event args from the tx_receipt to retrieve the request_id
-        core_contract = am.get_contract_instance(tx_receipt['logs'][0].address)
-        # Work around Solidity bug. See note in read_padded_data_from_stream.
-        with mock.patch.object(
-                StringDecoder,
-                'read_data_from_stream',
-                new=read_padded_data_from_stream):
-            logs = core_contract.events.Created().processReceipt(tx_receipt)
-        request_id = logs[0].args.requestId
+        with span('get_request_by_transaction_hash', 'event_decoding'):
+            # Extract the event args from the tx_receipt to retrieve the request_id
+            core_contract = am.get_contract_instance(tx_receipt['logs'][0].address)
+            # Work around Solidity bug. See note in read_padded_data_from_stream.
+            with padded_string_decoding():
+                logs = core_contract.events.Created().processReceipt(tx_receipt)
+            request_id = logs[0].args.requestId
 
         return self.get_request_by_id(
             Web3.toHex(request_id),
             block_number=tx_data['blockNumber'])
 
+    def iter_requests(self, payer=None, payee=None, currency_contract=None,
+                      from_block=None, to_block='latest', page_size=20):
+        """ Lazily iterate over Requests created on the current core contract.
+
+        The `Created` logs are filtered by the node using their indexed `payee` and
+        `payer` topics. Requests are built a page at a time, and the next page is
+        fetched in a background thread while the caller works on the current one.
+        IPFS data is only retrieved when `Request.data` is accessed.
+
+        :param payer: Only return Requests with this payer
+        :param payee: Only return Requests with this main payee. Sub-payees are not
+            indexed in the `Created` event so can not be used to filter Requests.
+        :param currency_contract: Only return Requests using this currency contract.
+            This is not an indexed field, so it is checked against each Request's
+            contract data before the rest of the Request is retrieved.
+        :param from_block: First block to search, defaults to the core contract's deployment
+        :param to_block: Last block to search
+        :param page_size: Number of Requests to retrieve per page
+        :return: A generator of Request instances
+        """
+        am = self.artifact_manager
+        core_contract_data = am.get_contract_data('last-requestcore')
+        created_event_signature = _get_event_topic(core_contract_data['instance'].events.Created)
+
+        def address_topic(address):
+            return '0x' + '00' * 12 + to_canonical_address(address).hex() if address else None
+
+        logs = self.web3.eth.getLogs({
+            'fromBlock': from_block if from_block else core_contract_data['block_number'],
+            'toBlock': to_block,
+            'address': core_contract_data['address'],
+            'topics': [created_event_signature, None, address_topic(payee), address_topic(payer)]
+        })
+        currency_contract_address = to_checksum_address(currency_contract) \
+            if currency_contract else None
+
+        def get_page(page_logs):
+            requests = [
+                self._get_request(
+                    log['topics'][1].hex(),
+                    # Payments can not be made before the Request is created
+                    block_number=log['blockNumber'],
+                    created_log=log,
+                    load_data=False,
+                    currency_contract_address=currency_contract_address)
+                for log in page_logs
+            ]
+            return [r for r in requests if r is not None]
+
+        pages = [logs[i:i + page_size] for i in range(0, len(logs), page_size)]
+        if not pages:
+            return
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(get_page, pages[0])
+            for next_page in pages[1:] + [None]:
+                page = future.result()
+                future = executor.submit(get_page, next_page) if next_page else None
+                for request in page:
+                    yield request
+
+    def get_payment_ledger(self, from_block=None, to_block='latest', request_id=None):
+        """ Load payments made to Requests on the current core contract into a `PaymentLedger`.
+
+            The `UpdateBalance` logs are appended to the ledger directly, without
+            decoding them through the ABI or creating a `types.Payment` per log.
+
+        :param from_block: First block to search, defaults to the core contract's deployment
+        :param to_block: Last block to search
+        :param request_id: If given, only load payments made to this Request
+        :return: A PaymentLedger instance
+        :rtype: request_network.ledger.PaymentLedger
+        """
+        am = self.artifact_manager
+        core_contract_data = am.get_contract_data('last-requestcore')
+        updated_event_signature = _get_event_topic(
+            core_contract_data['instance'].events.UpdateBalance)
+        logs = self.web3.eth.getLogs({
+            'fromBlock': from_block if from_block else core_contract_data['block_number'],
+            'toBlock': to_block,
+            'address': core_contract_data['address'],
+            'topics': [updated_event_signature, request_id]
+        })
+        from request_network.ledger import PaymentLedger
+        return PaymentLedger.from_logs(logs)
+
+
+# StringDecoder's own read_data_from_stream, saved when padded decoding is first used
+_read_data_from_stream = None
+_padded_decoding_lock = threading.Lock()
+_padded_decoding_users = 0
+
+
+@contextmanager
+def padded_string_decoding():
+    """ Decode strings with `read_padded_data_from_stream` while any thread is inside
+        this context manager.
+    """
+    from eth_abi.decoding import StringDecoder
+
+    global _padded_decoding_users, _read_data_from_stream
+    with _padded_decoding_lock:
+        if _read_data_from_stream is None:
+            # Taken from the class dict so the descriptor (e.g. a staticmethod) is
+            # restored intact
+            _read_data_from_stream = StringDecoder.__dict__['read_data_from_stream']
+        _padded_decoding_users += 1
+        StringDecoder.read_data_from_stream = read_padded_data_from_stream
+    try:
+        yield
+    finally:
+        with _padded_decoding_lock:
+            _padded_decoding_users -= 1
+            if not _padded_decoding_users:
+                StringDecoder.read_data_from_stream = _read_data_from_stream
+
 
 def read_padded_data_from_stream(self, stream):
     """ This function exists to work around a bug in Solidity:
@@ -358,6 +798,7 @@ def read_padded_data_from_stream(self, stream):
     :param stream:
     :return:
     """
+    from eth_abi.decoding import decode_uint_256
     from eth_abi.utils.numeric import ceil32
     data_length = decode_uint_256(stream)
     padded_length = ceil32(data_length)
@@ -1,11 +1,10 @@
 import json
 import os
+import threading
 
-from web3 import Web3
-from web3.auto import (
-    w3,
+from request_network.addresses import (
+    to_checksum_address,
 )
-
 from request_network.constants import (
     ARTIFACT_DIRECTORY_ENVIRONMENT_VARIABLE,
     NETWORK_NAME_ENVIRONMENT_VARIABLE,
@@ -13,34 +12,83 @@ from request_network.constants import (
 from request_network.exceptions import (
     ArtifactNotFound,
 )
+from request_network.providers import (
+    get_default_web3,
+)
+
+_json_cache = {}
+_json_cache_lock = threading.Lock()
+
+
+def load_json(path):
+    """ Return the parsed contents of the JSON file at `path`. Artifacts do not change
+        while the process runs, so each file is only parsed once and the result is shared.
+        Callers must not modify the returned object.
+    """
+    path = os.path.realpath(path)
+    with _json_cache_lock:
+        try:
+            return _json_cache[path]
+        except KeyError:
+            pass
+    with open(path) as f:
+        data = json.load(f)
+    with _json_cache_lock:
+        return _json_cache.setdefault(path, data)
 
 
 class ArtifactManager(object):
     """ Provides access to smart contract artifacts.
+
+        Contract data, including the `web3` contract instance, is built once per artifact
+        and network and then reused, so an `ArtifactManager` should be kept for as long
+        as its `Web3` instance.
     """
     artifacts = None
     artifact_directory = None
     ethereum_network = None
+    web3 = None
 
-    # TODO convert artifacts into lazy property
-    def __init__(self):
+    def __init__(self, web3=None, ethereum_network=None, artifact_directory=None):
         """
+        :param web3: The `Web3` instance used to create contract instances. Defaults to
+            the automatically detected provider.
+        :param ethereum_network: Name of the network whose artifacts are used, e.g.
+            `main` or `rinkeby`. Defaults to the `REQUEST_NETWORK_ETHEREUM_NETWORK_NAME`
+            environment variable, or `private`.
+        :param artifact_directory: Directory containing `artifacts.json`. Defaults to the
+            `REQUEST_NETWORK_ARTIFACT_DIRECTORY` environment variable, or the artifacts
+            bundled with this library.
         """
-        try:
-            self.ethereum_network = os.environ[NETWORK_NAME_ENVIRONMENT_VARIABLE]
-        except KeyError:
-            self.ethereum_network = 'private'
-
-        try:
-            self.artifact_directory = os.environ[ARTIFACT_DIRECTORY_ENVIRONMENT_VARIABLE]
-        except KeyError:
-            # Environment variable not set, using default
-            self.artifact_directory = os.path.join(
-                os.path.dirname(os.path.realpath(__file__)),
-                'artifacts')
-
-        with open(os.path.join(self.artifact_directory, 'artifacts.json')) as f:
-            self.artifacts = json.load(f)
+        self.web3 = web3 if web3 else get_default_web3()
+
+        if ethereum_network:
+            self.ethereum_network = ethereum_network
+        else:
+            self.ethereum_network = os.environ.get(NETWORK_NAME_ENVIRONMENT_VARIABLE, 'private')
+
+        if artifact_directory:
+            self.artifact_directory = artifact_directory
+        else:
+            self.artifact_directory = os.environ.get(
+                ARTIFACT_DIRECTORY_ENVIRONMENT_VARIABLE,
+                os.path.join(os.path.dirname(os.path.realpath(__file__)), 'artifacts'))
+
+        self.artifacts = load_json(os.path.join(self.artifact_directory, 'artifacts.json'))
+        # (network, artifact path) -> contract data
+        self._contract_data = {}
+        self._lock = threading.Lock()
+
+    def preload(self):
+        """ Build the contract data for every artifact deployed on the current network,
+            so later lookups do no parsing.
+        """
+        for name in self.artifacts.get(self.ethereum_network, {}):
+            try:
+                self.get_contract_data(name)
+            except ArtifactNotFound:
+                # Listed in artifacts.json but not deployed on this network
+                pass
 
     def get_service_class_by_address(self, address):
         """ Given the address of a currency contract, return the related service class.
@@ -59,11 +107,13 @@ class ArtifactManager(object):
                 'Could not find artifact for "{}" on {} network'.format(
                     address, self.ethereum_network))
 
-        if 'RequestERC20' in contract_artifact_path:
+        contract_name = load_json(
+            os.path.join(self.artifact_directory, contract_artifact_path))['contractName']
+        if contract_name == 'RequestERC20':
             return RequestERC20Service
-        if 'RequestEthereum' in contract_artifact_path:
+        if contract_name == 'RequestEthereum':
             return RequestEthereumService
-        if 'RequestBitcoinNodesValidation' in contract_artifact_path:
+        if contract_name == 'RequestBitcoinNodesValidation':
             raise NotImplementedError()
 
     def get_contract_instance(self, name):
@@ -98,8 +148,18 @@ class ArtifactManager(object):
                 'Could not find artifact for "{}" on {} network'.format(
                     name, self.ethereum_network))
 
-        with open(os.path.join(self.artifact_directory, contract_artifact_path)) as f:
-            contract_artifact = json.load(f)
+        cache_key = (self.ethereum_network, contract_artifact_path)
+        with self._lock:
+            contract_data = self._contract_data.get(cache_key)
+        if contract_data is None:
+            contract_data = self._build_contract_data(name, contract_artifact_path)
+            with self._lock:
+                contract_data = self._contract_data.setdefault(cache_key, contract_data)
+        return contract_data
+
+    def _build_contract_data(self, name, contract_artifact_path):
+        contract_artifact = load_json(
+            os.path.join(self.artifact_directory, contract_artifact_path))
 
         try:
             network_data = contract_artifact['networks'][self.ethereum_network]
@@ -108,13 +168,14 @@ class ArtifactManager(object):
                 'Could not find artifact for "{}" on {} network'.format(
                     name, self.ethereum_network))
 
+        contract_address = to_checksum_address(network_data['address'])
         return {
             'abi': contract_artifact['abi'],
             'version': contract_artifact['version'],
-            'address': Web3.toChecksumAddress(network_data['address']),
+            'address': contract_address,
             'block_number': network_data['blockNumber'],
-            'instance': w3.eth.contract(
+            'instance': self.web3.eth.contract(
                 abi=contract_artifact['abi'],
-                address=Web3.toChecksumAddress(network_data['address'])
+                address=contract_address
             )
         }
@@ -0,0 +1,374 @@
+""" Signing Requests and rendering their QR codes in bulk, for the batch mode of the
+    `request-network-qr-code` script.
+
+    Rows are read from a CSV or JSON lines file with the columns in `BATCH_FIELDS`, of
+    which only `payee` and `amount` are required. QR codes are written to a directory or
+    a zip file, and a manifest of the Request hashes and gateway URLs is written as JSON
+    lines. An interrupted batch is resumed by running it again with the same output: rows
+    already in the manifest, whose QR code exists, are skipped.
+"""
+from concurrent.futures import (
+    ProcessPoolExecutor,
+)
+import csv
+from decimal import (
+    Context,
+    Decimal,
+)
+import json
+import os
+import shutil
+import time
+import zipfile
+
+from request_network.exceptions import (
+    CATCHABLE_EXCEPTIONS,
+)
+from request_network.qr import (
+    render_qr_code,
+)
+from request_network.validation import (
+    validate_requests,
+)
+
+BATCH_FIELDS = ('payee', 'amount', 'payment_address', 'expiration', 'callback_url', 'data')
+MANIFEST_FILENAME = 'manifest.jsonl'
+DEFAULT_EXPIRATION = 3600
+DEFAULT_CHUNK_SIZE = 16
+
+# The ETH service used by this process, see `_get_service`
+_service = None
+# Whether this process has connected to IPFS, see `sign_batch_row`
+_ipfs_connected = False
+
+
+def read_batch_file(path):
+    """ Return the rows of a CSV or JSON lines file as dicts.
+
+        The format is chosen by the file's extension: `.csv`, or `.jsonl`/`.json` for JSON
+        lines. In a CSV file `data` is a JSON-encoded object.
+    """
+    if path.endswith('.csv'):
+        with open(path, newline='') as f:
+            rows = list(csv.DictReader(f))
+        for row in rows:
+            if row.get('data'):
+                row['data'] = json.loads(row['data'])
+        return rows
+    if path.endswith(('.jsonl', '.json')):
+        with open(path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+    raise ValueError('{} is not a .csv or .jsonl file'.format(path))
+
+
+def parse_batch_row(row, callback_url=None, expiration=DEFAULT_EXPIRATION):
+    """ Validate a row of a batch file, filling in the batch's defaults.
+
+    :param callback_url: Callback URL for rows without one
+    :param expiration: Number of seconds after which Requests expire, for rows without one
+    :return: A dict with the Payee's fields, `expiration`, `callback_url` and `data`
+    """
+    from request_network.addresses import to_checksum_address
+
+    unknown_fields = set(row) - set(BATCH_FIELDS)
+    if unknown_fields:
+        raise ValueError('Unknown fields: {}'.format(', '.join(sorted(unknown_fields))))
+    if not row.get('payee'):
+        raise ValueError('payee is required')
+    if row.get('amount') in (None, ''):
+        raise ValueError('amount is required')
+    amount = Decimal(str(row['amount']))
+    if not amount.is_finite():
+        raise ValueError('amount must be a number')
+    if amount < 0:
+        raise ValueError('amount must not be negative')
+    # Amounts are given in ETH. The default context would round them to 28 significant
+    # digits, so they are scaled with as many digits as the amount has.
+    wei = amount.scaleb(18, Context(prec=len(amount.as_tuple().digits)))
+    if wei != wei.to_integral_value():
+        raise ValueError('amount can not have more than 18 decimal places')
+    if not (row.get('callback_url') or callback_url):
+        raise ValueError('callback_url is required')
+
+    return {
+        'id_address': to_checksum_address(row['payee']),
+        'payment_address': to_checksum_address(row['payment_address'])
+        if row.get('payment_address') else None,
+        'amount': int(wei),
+        'expiration': int(row['expiration']) if row.get('expiration') else expiration,
+        'callback_url': row.get('callback_url') or callback_url,
+        'data': row.get('data') or None,
+    }
+
+
+def _get_service():
+    """ Return the ETH service used to sign Requests in this process.
+
+        The service is created on first use, which loads the contract artifacts, and is
+        then reused for every Request the process signs. Worker processes forked after
+        it has been created inherit it.
+    """
+    global _service
+    if _service is None:
+        from request_network.api import RequestNetwork
+        from request_network.currencies import currencies_by_symbol
+        _service = RequestNetwork().get_service(currencies_by_symbol['ETH'])
+    return _service
+
+
+def sign_batch_row(index, row, ethereum_network_id, image_format='png', pyqrcode_kwargs=None):
+    """ Sign the Request for a row parsed by `parse_batch_row`, and render its QR code.
+
+    :return: A tuple of the row's manifest entry and its QR code image data
+    """
+    global _ipfs_connected
+    if row['data'] and not _ipfs_connected:
+        from request_network.utils import get_ipfs, set_ipfs_client
+        # Reuse one IPFS connection for every row signed by this process
+        set_ipfs_client(get_ipfs())
+        _ipfs_connected = True
+    expiration_date = int(time.time()) + row['expiration']
+    signed_request = _get_service().sign_request_as_payee(
+        id_addresses=[row['id_address']],
+        amounts=[row['amount']],
+        payment_addresses=[row['payment_address']],
+        expiration_date=expiration_date,
+        data=row['data'])
+    gateway_url = signed_request.get_payment_gateway_url(
+        row['callback_url'], ethereum_network_id)
+    entry = {
+        'row': index,
+        'payee': row['id_address'],
+        'amount': str(row['amount']),
+        'expiration_date': expiration_date,
+        'request_hash': signed_request.hash,
+        'ipfs_hash': signed_request.ipfs_hash if signed_request.ipfs_hash else None,
+        'gateway_url': gateway_url,
+        'qr_code': '{:06d}.{}'.format(index, image_format),
+    }
+    return entry, render_qr_code(gateway_url, image_format, pyqrcode_kwargs)
+
+
+def _sign_batch_row(arguments):
+    index = arguments[0]
+    try:
+        return sign_batch_row(*arguments)
+    except CATCHABLE_EXCEPTIONS as e:
+        return {'row': index, 'error': '{}: {}'.format(type(e).__name__, e)}, None
+
+
+class DirectoryOutput(object):
+    """ Writes QR codes as files in a directory, along with the manifest.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.manifest_path = os.path.join(path, MANIFEST_FILENAME)
+
+    def exists(self, name):
+        return os.path.exists(os.path.join(self.path, name))
+
+    def write(self, name, image):
+        # Write to a temporary file first so an interruption can not leave a partial image
+        path = os.path.join(self.path, name)
+        with open(path + '.tmp', 'wb') as f:
+            f.write(image)
+        os.replace(path + '.tmp', path)
+
+    def finish(self):
+        pass
+
+
+class ZipOutput(object):
+    """ Writes QR codes into a zip file. The manifest is written next to it, with the
+        suffix `.manifest.jsonl`.
+
+        QR codes are written to a staging directory, with the suffix `.partial`, and
+        only added to the zip file once the batch finishes. A batch which is killed
+        leaves them in the staging directory, so running it again resumes it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.manifest_path = path + '.manifest.jsonl'
+        self.staging = DirectoryOutput(path + '.partial')
+        self.names = set()
+        if os.path.exists(path):
+            # The zip file is replaced rather than written in place, so it is only
+            # invalid if it was not written by this class
+            if not zipfile.is_zipfile(path):
+                raise ValueError(
+                    '{} is not a zip file, remove it and its manifest to start '
+                    'again'.format(path))
+            with zipfile.ZipFile(path) as zip_file:
+                self.names.update(zip_file.namelist())
+
+    def exists(self, name):
+        return name in self.names or self.staging.exists(name)
+
+    def write(self, name, image):
+        self.staging.write(name, image)
+
+    def finish(self):
+        """ Write the zip file with the existing and staged QR codes, and remove the
+            staging directory.
+        """
+        staged = sorted(
+            name for name in os.listdir(self.staging.path) if not name.endswith('.tmp'))
+        if not staged and os.path.exists(self.path):
+            shutil.rmtree(self.staging.path)
+            return
+        with zipfile.ZipFile(self.path + '.tmp', 'w') as zip_file:
+            if self.names:
+                with zipfile.ZipFile(self.path) as existing:
+                    for info in existing.infolist():
+                        zip_file.writestr(info, existing.read(info))
+            for name in staged:
+                zip_file.write(os.path.join(self.staging.path, name), name)
+        os.replace(self.path + '.tmp', self.path)
+        self.names.update(staged)
+        shutil.rmtree(self.staging.path)
+
+
+def load_manifest(path):
+    """ Return the entries of a manifest, discarding an incomplete last line left by an
+        interruption.
+    """
+    entries = []
+    try:
+        f = open(path, 'r+')
+    except FileNotFoundError:
+        return entries
+    with f:
+        offset = 0
+        for line in iter(f.readline, ''):
+            try:
+                if not line.endswith('\n'):
+                    raise ValueError('Incomplete line')
+                entries.append(json.loads(line))
+            except ValueError:
+                f.truncate(offset)
+                break
+            offset = f.tell()
+    return entries
+
+
+class QRCodeBatch(object):
+    """ Signs the Requests of a batch file on a pool of processes, and writes their QR
+        codes and manifest.
+
+        The ETH service, with its contract artifacts, is created before the pool so
+        every worker process inherits it, and each worker reuses it together with its
+        parsed signing keys and IPFS connection for all of the rows it signs.
+    """
+
+    def __init__(self, output, ethereum_network_id, callback_url=None,
+                 expiration=DEFAULT_EXPIRATION, image_format='png', pyqrcode_kwargs=None,
+                 max_workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        :param output: Directory, or path of a `.zip` file, to write the QR codes to
+        :param ethereum_network_id: Network ID included in the gateway URLs
+        :param callback_url: Callback URL for rows without one
+        :param expiration: Number of seconds after which Requests expire, for rows
+            without one
+        :param max_workers: Number of processes, defaults to the number of CPUs
+        :param chunk_size: Number of rows sent to a worker process at a time
+        """
+        self.output = output
+        self.ethereum_network_id = ethereum_network_id
+        self.callback_url = callback_url
+        self.expiration = expiration
+        self.image_format = image_format
+        self.pyqrcode_kwargs = pyqrcode_kwargs
+        self.max_workers = max_workers if max_workers else os.cpu_count()
+        self.chunk_size = chunk_size
+
+    def open_output(self):
+        return ZipOutput(self.output) if self.output.endswith('.zip') else \
+            DirectoryOutput(self.output)
+
+    def run(self, rows):
+        """ Sign and render every row of `rows` which is not already in the manifest.
+
+        :param rows: Rows as returned by `read_batch_file`
+        :return: A dict with the number of rows `signed`, `skipped` because they were
+            signed by a previous run, and `failed`
+        """
+        from request_network.signers import get_environment_signing_key
+
+        output = self.open_output()
+        counts = {'signed': 0, 'skipped': 0, 'failed': 0}
+        done = {
+            entry['row'] for entry in load_manifest(output.manifest_path)
+            if 'error' not in entry and output.exists(entry['qr_code'])
+        }
+        parsed_rows = []
+        with open(output.manifest_path, 'a') as manifest:
+            for index, row in enumerate(rows):
+                if index in done:
+                    counts['skipped'] += 1
+                    continue
+                try:
+                    parsed_rows.append(
+                        (index, parse_batch_row(row, self.callback_url, self.expiration)))
+                except Exception as e:
+                    self._write_failure(manifest, index, e, counts)
+
+            # Invalid rows fail here, rather than after being sent to a worker
+            now = int(time.time())
+            errors = validate_requests({
+                'id_addresses': [row['id_address']],
+                'amounts': [row['amount']],
+                'payment_addresses': [row['payment_address']],
+                'expiration_date': now + row['expiration'],
+            } for _, row in parsed_rows)
+            pending = []
+            for (index, row), error in zip(parsed_rows, errors):
+                if error is not None:
+                    self._write_failure(manifest, index, error, counts)
+                else:
+                    pending.append((
+                        index, row, self.ethereum_network_id, self.image_format,
+                        self.pyqrcode_kwargs))
+
+            if pending:
+                # Warm the service and signing keys before the worker processes fork
+                _get_service()
+                for address in {arguments[1]['id_address'] for arguments in pending}:
+                    try:
+                        get_environment_signing_key(address)
+                    except KeyError:
+                        pass
+            self._sign(pending, output, manifest, counts)
+        output.finish()
+        return counts
+
+    def _sign(self, pending, output, manifest, counts):
+        # Rows are submitted a window at a time, so finished images do not accumulate in
+        # memory while the manifest is written
+        window = self.max_workers * self.chunk_size * 4
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            for start in range(0, len(pending), window):
+                for entry, image in executor.map(
+                        _sign_batch_row, pending[start:start + window],
+                        chunksize=self.chunk_size):
+                    if image is None:
+                        counts['failed'] += 1
+                    else:
+                        # The image is written first, so a manifest entry implies its image
+                        output.write(entry['qr_code'], image)
+                        counts['signed'] += 1
+                    self._write_entry(manifest, entry)
+                manifest.flush()
+                os.fsync(manifest.fileno())
+
+    def _write_failure(self, manifest, index, error, counts):
+        self._write_entry(manifest, {
+            'row': index, 'error': '{}: {}'.format(type(error).__name__, error)})
+        counts['failed'] += 1
+
+    @staticmethod
+    def _write_entry(manifest, entry):
+        manifest.write(json.dumps(entry))
+        manifest.write('\n')
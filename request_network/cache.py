@@ -0,0 +1,109 @@
+from collections import (
+    OrderedDict,
+)
+import threading
+import time
+from weakref import (
+    WeakKeyDictionary,
+)
+
+from request_network.constants import (
+    CALL_CACHE_FINALITY_DEPTH,
+    CALL_CACHE_LATEST_TTL,
+    CALL_CACHE_SIZE,
+)
+
+
+class CallCache(object):
+    """ Cache of `eth_call` results keyed by (contract address, calldata, block).
+
+        A call pinned to a block number at least `finality_depth` blocks behind the
+        chain head always returns the same result, so it is kept until evicted by the
+        LRU bound. Results for any other block identifier (e.g. 'latest', or a recent
+        block which could still be reorganised) are kept for `latest_ttl` seconds.
+    """
+
+    def __init__(self, web3, latest_ttl=CALL_CACHE_LATEST_TTL,
+                 finality_depth=CALL_CACHE_FINALITY_DEPTH, max_size=CALL_CACHE_SIZE):
+        self.web3 = web3
+        self.latest_ttl = latest_ttl
+        self.finality_depth = finality_depth
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._head_block = None
+        self._head_block_expires = 0
+
+    def _get_head_block(self):
+        """ Return the latest block number, refreshing it at most once per `latest_ttl`.
+        """
+        now = time.monotonic()
+        if self._head_block is None or now >= self._head_block_expires:
+            self._head_block = self.web3.eth.blockNumber
+            self._head_block_expires = now + self.latest_ttl
+        return self._head_block
+
+    def is_final(self, block_identifier):
+        if not isinstance(block_identifier, int) or block_identifier < 0:
+            return False
+        if self._head_block is not None and \
+                block_identifier <= self._head_block - self.finality_depth:
+            return True
+        return block_identifier <= self._get_head_block() - self.finality_depth
+
+    def call(self, contract_function, block_identifier=None):
+        """ Return the result of `contract_function.call()` at the given block, from the
+            cache if possible.
+
+        :param contract_function: A bound contract function, e.g.
+            `contract.functions.getRequest(request_id)`
+        :param block_identifier: A block number or 'latest'. Defaults to 'latest'.
+        """
+        if block_identifier is None:
+            block_identifier = 'latest'
+        key = (
+            contract_function.address,
+            contract_function._encode_transaction_data(),
+            block_identifier
+        )
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > now):
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry[1]
+            self.misses += 1
+
+        result = contract_function.call(block_identifier=block_identifier)
+        expires = None if self.is_final(block_identifier) else now + self.latest_ttl
+
+        with self._lock:
+            self._entries[key] = (expires, result)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_call_caches = WeakKeyDictionary()
+_call_caches_lock = threading.Lock()
+
+
+def get_call_cache(web3):
+    """ Return the CallCache for the given `Web3` instance, creating it if necessary.
+
+        Each `Web3` instance has its own cache, as instances may be connected to
+        different chains.
+    """
+    with _call_caches_lock:
+        try:
+            return _call_caches[web3]
+        except KeyError:
+            cache = _call_caches[web3] = CallCache(web3)
+            return cache
@@ -0,0 +1,286 @@
+""" Tracking the confirmation of many Request transactions at once.
+"""
+from concurrent.futures import (
+    Future,
+    ThreadPoolExecutor,
+)
+import threading
+
+from eth_utils import (
+    event_abi_to_log_topic,
+)
+from web3 import Web3
+
+from request_network.artifact_manager import (
+    ArtifactManager,
+)
+from request_network.types import (
+    TransactionStates,
+)
+
+
+class Confirmation(object):
+    """ The outcome of a tracked transaction.
+
+        `request_id` is the ID of the Request created by the transaction, if it
+        created one. `out_of_gas` is True if the transaction FAILED because it ran out
+        of a gas limit from the tracker's `gas.GasEstimateCache`. It is not sent again,
+        so the caller must resubmit it.
+    """
+    __slots__ = (
+        'transaction_hash', 'state', 'request_id', 'block_number', 'receipt', 'out_of_gas')
+
+    def __init__(self, transaction_hash, state, request_id=None, block_number=None,
+                 receipt=None, out_of_gas=False):
+        self.transaction_hash = transaction_hash
+        self.state = state
+        self.request_id = request_id
+        self.block_number = block_number
+        self.receipt = receipt
+        self.out_of_gas = out_of_gas
+
+    def __repr__(self):
+        return '<Confirmation {} {} {}>'.format(
+            self.transaction_hash, self.state.name, self.request_id)
+
+
+class _TrackedTransaction(object):
+    __slots__ = ('transaction_hash', 'future', 'tracked_at_block', 'block_number')
+
+    def __init__(self, transaction_hash):
+        self.transaction_hash = transaction_hash
+        self.future = Future()
+        self.tracked_at_block = None
+        # Block the transaction was seen in, if any
+        self.block_number = None
+
+
+class ConfirmationTracker(object):
+    """ Waits for the confirmation of any number of transactions, e.g. those returned by
+        `RequestNetwork.create_request` or `broadcast_signed_request`.
+
+        Each call to `poll` fetches the blocks mined since the previous call, with
+        transaction hashes only, and matches them against the pending transactions.
+        Receipts are only fetched for transactions found in a block, so the number of
+        JSON-RPC calls depends on the number of new blocks and confirmed transactions,
+        not on the number of pending transactions multiplied by the number of polls.
+        Newly tracked transactions have their receipt checked once, in case they were
+        mined before they were tracked.
+
+        A transaction is resolved `confirmations` blocks after the block it was mined
+        in: as CONFIRMED with the ID of the Request it created, or as FAILED if it
+        reverted. A transaction which has not been mined after `drop_after_blocks`
+        blocks, and which the node no longer knows about, is resolved as DROPPED.
+
+        `poll` can be called directly, or from a background thread with `start`.
+    """
+
+    def __init__(self, web3=None, artifact_manager=None, confirmations=1,
+                 drop_after_blocks=50, poll_interval=1.0, max_workers=8, gas_estimates=None):
+        """
+        :param web3: The `Web3` instance used to query the node
+        :param artifact_manager: The `ArtifactManager` used to look up the core contract
+        :param confirmations: Number of blocks, including the block a transaction is
+            mined in, before it is resolved
+        :param drop_after_blocks: Number of blocks after which an unmined transaction is
+            checked for having been dropped by the node
+        :param poll_interval: Seconds between polls when running in the background
+        :param max_workers: Maximum number of concurrent JSON-RPC calls per poll
+        :param gas_estimates: Optional `gas.GasEstimateCache` to refine with the receipts
+            of resolved transactions. Transactions which ran out of their cached gas limit
+            are resolved with `Confirmation.out_of_gas` set.
+        """
+        self.artifact_manager = artifact_manager if artifact_manager else \
+            ArtifactManager(web3=web3)
+        self.web3 = web3 if web3 else self.artifact_manager.web3
+        self.confirmations = confirmations
+        self.drop_after_blocks = drop_after_blocks
+        self.poll_interval = poll_interval
+        self.gas_estimates = gas_estimates
+        core_contract = self.artifact_manager.get_contract_data('last-requestcore')['instance']
+        self.created_topic = Web3.toHex(event_abi_to_log_topic(
+            event_abi=core_contract.events.Created().abi))
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._lock = threading.Lock()
+        self._poll_lock = threading.Lock()
+        # lowercase transaction hash -> _TrackedTransaction
+        self._transactions = {}
+        self._new = []
+        self._last_block = None
+        self._thread = None
+        self._stopped = threading.Event()
+
+    @property
+    def pending_count(self):
+        with self._lock:
+            return len(self._transactions)
+
+    def track(self, transaction_hash, callback=None):
+        """ Start tracking `transaction_hash`.
+
+        :param callback: Optional function called with the transaction's `Confirmation`
+            once it is resolved
+        :return: A `Future` whose result is the transaction's `Confirmation`
+        """
+        key = Web3.toHex(hexstr=transaction_hash).lower() \
+            if isinstance(transaction_hash, str) else Web3.toHex(transaction_hash)
+        with self._lock:
+            try:
+                tracked = self._transactions[key]
+            except KeyError:
+                tracked = self._transactions[key] = _TrackedTransaction(key)
+                self._new.append(tracked)
+        if callback:
+            tracked.future.add_done_callback(lambda future: callback(future.result()))
+        return tracked.future
+
+    def track_many(self, transaction_hashes, callback=None):
+        """ Start tracking each of `transaction_hashes`, and return a list of `Future`s.
+        """
+        return [self.track(transaction_hash, callback) for transaction_hash in transaction_hashes]
+
+    def _get_block_transactions(self, block_number):
+        block = self.web3.eth.getBlock(block_number)
+        return [Web3.toHex(transaction_hash) for transaction_hash in block['transactions']]
+
+    def _get_receipt(self, tracked):
+        return self.web3.eth.getTransactionReceipt(tracked.transaction_hash)
+
+    def _get_request_id(self, receipt):
+        for log in receipt['logs']:
+            if log['topics'] and Web3.toHex(log['topics'][0]) == self.created_topic:
+                return Web3.toHex(log['topics'][1])
+        return None
+
+    def _resolve(self, tracked, state, receipt=None, out_of_gas=False):
+        confirmation = Confirmation(
+            tracked.transaction_hash,
+            state,
+            request_id=self._get_request_id(receipt) if receipt else None,
+            block_number=receipt['blockNumber'] if receipt else None,
+            receipt=receipt,
+            out_of_gas=out_of_gas)
+        with self._lock:
+            self._transactions.pop(tracked.transaction_hash, None)
+        tracked.future.set_result(confirmation)
+        return confirmation
+
+    def _resolve_receipt(self, tracked, receipt):
+        out_of_gas = self.gas_estimates is not None and \
+            self.gas_estimates.record_receipt(receipt)
+        # `status` is only present in receipts from Byzantium onwards, before which a
+        # failed transaction can only be told apart by its missing logs
+        succeeded = receipt.get('status', 1) == 1 and self._get_request_id(receipt) is not None
+        return self._resolve(
+            tracked, TransactionStates.CONFIRMED if succeeded else TransactionStates.FAILED,
+            receipt, out_of_gas)
+
+    def poll(self):
+        """ Check for transactions mined since the last poll, and resolve those which have
+            enough confirmations or have been dropped.
+
+        :return: A list of the `Confirmation`s resolved by this poll
+        """
+        with self._poll_lock:
+            return self._poll()
+
+    def _poll(self):
+        latest_block = self.web3.eth.blockNumber
+        with self._lock:
+            new = list(self._new)
+            transactions = dict(self._transactions)
+
+        # Blocks and receipts are all fetched before any state is updated, so if a call
+        # fails the next poll scans the same blocks and checks the same new transactions
+        first_block = latest_block + 1 if self._last_block is None else self._last_block + 1
+        block_numbers = list(range(first_block, latest_block + 1))
+        blocks = list(self._executor.map(self._get_block_transactions, block_numbers))
+        # Transactions tracked since the last poll may already have been mined
+        new_receipts = list(self._executor.map(self._get_receipt, new))
+
+        self._last_block = latest_block
+        with self._lock:
+            del self._new[:len(new)]
+        for block_number, block_transactions in zip(block_numbers, blocks):
+            for transaction_hash in block_transactions:
+                tracked = transactions.get(transaction_hash.lower())
+                if tracked is not None:
+                    tracked.block_number = block_number
+        receipts = {}
+        for tracked, receipt in zip(new, new_receipts):
+            tracked.tracked_at_block = latest_block
+            if receipt is not None:
+                tracked.block_number = receipt['blockNumber']
+                receipts[tracked.transaction_hash] = receipt
+
+        confirmed = [
+            t for t in transactions.values() if t.block_number is not None and
+            latest_block - t.block_number + 1 >= self.confirmations
+        ]
+        expired = [
+            t for t in transactions.values() if t.block_number is None and
+            t.tracked_at_block is not None and
+            latest_block - t.tracked_at_block >= self.drop_after_blocks
+        ]
+
+        resolved = []
+        # The receipt is fetched again once confirmed, in case the block was replaced
+        for tracked, receipt in zip(confirmed, self._executor.map(
+                lambda t: receipts.get(t.transaction_hash) or self._get_receipt(t),
+                confirmed)):
+            if receipt is None:
+                tracked.block_number = None
+            elif receipt['blockNumber'] != tracked.block_number:
+                tracked.block_number = receipt['blockNumber']
+            else:
+                resolved.append(self._resolve_receipt(tracked, receipt))
+
+        for tracked, transaction in zip(expired, self._executor.map(
+                lambda t: self.web3.eth.getTransaction(t.transaction_hash), expired)):
+            if transaction is None:
+                resolved.append(self._resolve(tracked, TransactionStates.DROPPED))
+                continue
+            # Still known to the node. It may have been mined in a block which was not
+            # scanned, so check its receipt before waiting for another period.
+            receipt = self._get_receipt(tracked)
+            if receipt is None:
+                tracked.tracked_at_block = latest_block
+            elif latest_block - receipt['blockNumber'] + 1 >= self.confirmations:
+                resolved.append(self._resolve_receipt(tracked, receipt))
+            else:
+                tracked.block_number = receipt['blockNumber']
+
+        return resolved
+
+    def _run(self):
+        while not self._stopped.wait(self.poll_interval):
+            try:
+                self.poll()
+            except Exception:
+                # Try again at the next interval, e.g. after a node timeout
+                pass
+
+    def start(self):
+        """ Poll in a background thread every `poll_interval` seconds until `stop` is called.
+        """
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread:
+            self._stopped.set()
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        self.stop()
+        self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
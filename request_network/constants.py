@@ -3,3 +3,32 @@ PAYMENT_GATEWAY_BASE_URL = 'https://app.request.network/#/pay-with-request/'
 
 NETWORK_NAME_ENVIRONMENT_VARIABLE = 'REQUEST_NETWORK_ETHEREUM_NETWORK_NAME'
 ARTIFACT_DIRECTORY_ENVIRONMENT_VARIABLE = 'REQUEST_NETWORK_ARTIFACT_DIRECTORY'
+
+# Maximum number of addresses held by the shared checksum address cache
+ADDRESS_CACHE_SIZE = 4096
+
+# Number of seconds for which contract call results at the 'latest' block are cached
+CALL_CACHE_LATEST_TTL = 1
+# Number of confirmations after which a block is treated as final, and calls pinned to it
+# are cached permanently
+CALL_CACHE_FINALITY_DEPTH = 12
+CALL_CACHE_SIZE = 65536
+
+# Fractional margin added to learned gas estimates
+GAS_ESTIMATE_MARGIN = 0.2
+# Maximum number of sent transactions whose receipts can refine gas estimates
+GAS_ESTIMATE_PENDING_SIZE = 4096
+
+# Percentiles of recently mined gas prices used for each gas price tier
+GAS_PRICE_TIERS = {
+    'slow': 30,
+    'standard': 60,
+    'fast': 90,
+}
+# Number of recent blocks whose transactions are sampled by the gas price oracle
+GAS_PRICE_SAMPLE_BLOCKS = 20
+# Number of seconds after which gas price samples are refreshed
+GAS_PRICE_MAX_AGE = 30
+
+# Maximum number of rendered QR codes held by the shared QR code cache
+QR_CODE_CACHE_SIZE = 1024
@@ -1,3 +1,26 @@
+import threading
+from types import (
+    MappingProxyType,
+)
+
+ERC20_ARTIFACT_PREFIX = 'last-requesterc20-'
+
+# Name, symbol and decimals of the tokens with RequestERC20 contracts in the bundled
+# artifacts, keyed by lowercase token address. The artifacts do not include them.
+KNOWN_TOKENS = {
+    # main
+    '0x89d24a6b4ccb1b6faa2625fe562bdd9a23260359': ('Dai', 'DAI', 18),
+    '0x4f3afec4e5a3f2a6a1a411def7d7dfe50ee057bf': ('Digix Gold Token', 'DGX', 9),
+    '0xdd974d5c2e2928dea5f71b9825b8b646686bd200': ('Kyber Network Crystal', 'KNC', 18),
+    '0xd26114cd6ee289accf82350c8d8487fedb8a0c07': ('OmiseGO', 'OMG', 18),
+    '0x8f8221afbb33998d8584a2b05749ba73c37a938a': ('Request Token', 'REQ', 18),
+    # rinkeby
+    '0x995d6a8c21f24be1dd04e105dd0d83758343e258': ('Central Bank Token', 'CTBK', 18),
+    # private
+    '0x345ca3e014aaf5dca488057592ee47305d9b3e10': ('Dai', 'DAI', 18),
+}
+
+
 class Currency(object):
     name = None
     symbol = None
@@ -53,3 +76,101 @@ currencies_by_symbol = {
 }
 
 currencies_by_name = {c.name: c for c in currencies_by_symbol.values()}
+
+
+class CurrencyRegistry(object):
+    """ Immutable set of currencies indexed by symbol, name, token address and the address
+        of the currency contract used to create Requests in that currency.
+
+        Token and contract addresses are looked up in lowercase.
+    """
+
+    def __init__(self, currencies, currency_contract_addresses=None):
+        """
+        :param currencies: Iterable of `Currency` instances
+        :param currency_contract_addresses: Optional dict mapping each currency to the
+            address of its currency contract
+        """
+        currencies = tuple(currencies)
+        currency_contract_addresses = currency_contract_addresses or {}
+        self.currencies = currencies
+        self.by_symbol = MappingProxyType({c.symbol: c for c in currencies})
+        self.by_name = MappingProxyType({c.name: c for c in currencies})
+        self.by_token_address = MappingProxyType({
+            c.token_address.lower(): c for c in currencies if isinstance(c, ERC20Currency)
+        })
+        self.by_contract_address = MappingProxyType({
+            address.lower(): c for c, address in currency_contract_addresses.items()
+        })
+
+    def __iter__(self):
+        return iter(self.currencies)
+
+    def __len__(self):
+        return len(self.currencies)
+
+    def get_by_token_address(self, token_address):
+        return self.by_token_address[token_address.lower()]
+
+    def get_by_contract_address(self, currency_contract_address):
+        """ Return the currency of Requests created by the given currency contract.
+        """
+        return self.by_contract_address[currency_contract_address.lower()]
+
+    @classmethod
+    def from_artifacts(cls, artifact_manager):
+        """ Build a registry of Ether and the ERC20 tokens with a RequestERC20 contract
+            on the artifact manager's network.
+
+            Tokens missing from `KNOWN_TOKENS` use their checksum address as their name
+            and symbol, and have unknown decimals.
+        """
+        # Local import, as loading artifacts pulls in web3
+        from request_network.addresses import to_checksum_address
+        from request_network.exceptions import ArtifactNotFound
+
+        network_artifacts = artifact_manager.artifacts.get(artifact_manager.ethereum_network, {})
+        currencies = []
+        currency_contract_addresses = {}
+
+        def add(currency, artifact_name):
+            try:
+                contract_data = artifact_manager.get_contract_data(artifact_name)
+            except ArtifactNotFound:
+                return
+            currencies.append(currency)
+            currency_contract_addresses[currency] = contract_data['address']
+
+        add(currencies_by_symbol['ETH'], 'last-requestethereum')
+        for artifact_name in sorted(network_artifacts):
+            if not artifact_name.startswith(ERC20_ARTIFACT_PREFIX):
+                continue
+            token_address = artifact_name[len(ERC20_ARTIFACT_PREFIX):]
+            try:
+                name, symbol, decimals = KNOWN_TOKENS[token_address]
+            except KeyError:
+                name = symbol = to_checksum_address(token_address)
+                decimals = None
+            add(
+                ERC20Currency(name, symbol, decimals, 'RequestERC20Service', token_address),
+                artifact_name)
+
+        return cls(currencies, currency_contract_addresses)
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def get_currency_registry(artifact_manager):
+    """ Return the `CurrencyRegistry` for the artifact manager's network and artifact
+        directory, building it on first use.
+    """
+    key = (artifact_manager.ethereum_network, artifact_manager.artifact_directory)
+    with _registries_lock:
+        registry = _registries.get(key)
+    if registry is None:
+        registry = CurrencyRegistry.from_artifacts(artifact_manager)
+        with _registries_lock:
+            registry = _registries.setdefault(key, registry)
+    return registry
@@ -0,0 +1,155 @@
+""" Precompiled encoders for calling currency contract functions.
+
+    Building a `web3` `ContractFunction` looks up the function ABI by name, matches the
+    arguments against it and runs web3's normalisers before any data is encoded. The
+    encoders here do that work once per function, and turn arguments straight into
+    calldata. Values which the encoders can not handle raise `EncodingError`, and
+    callers fall back to the `web3` path.
+"""
+from eth_abi.decoding import (
+    ContextFramesBytesIO,
+    TupleDecoder,
+)
+from eth_abi.encoding import (
+    TupleEncoder,
+)
+from eth_abi.exceptions import (
+    EncodingError,
+)
+from eth_abi.registry import (
+    registry,
+)
+from eth_utils import (
+    function_abi_to_4byte_selector,
+    to_checksum_address,
+)
+from web3 import Web3
+from web3.utils.empty import (
+    empty,
+)
+
+# Currency contract functions used by the services
+CURRENCY_CONTRACT_FUNCTIONS = (
+    'broadcastSignedRequestAsPayer',
+    'collectEstimation',
+    'createRequestAsPayee',
+    'createRequestAsPayer',
+)
+
+
+def _normalize_input(abi_type, value):
+    """ Accept hex strings for `bytes` arguments, as web3 does.
+    """
+    if abi_type.startswith('bytes') and isinstance(value, str):
+        return Web3.toBytes(hexstr=value)
+    return value
+
+
+def _normalize_output(abi_type, value):
+    """ Return addresses checksummed and strings decoded, as web3 does.
+    """
+    if abi_type == 'address':
+        return to_checksum_address(value)
+    if abi_type == 'string' and isinstance(value, bytes):
+        return value.decode('utf-8')
+    return value
+
+
+class FunctionEncoder(object):
+    """ Encodes calldata for, and decodes the result of, one contract function.
+    """
+
+    def __init__(self, function_abi):
+        self.name = function_abi['name']
+        self.input_names = [i['name'] for i in function_abi['inputs']]
+        self.input_types = [i['type'] for i in function_abi['inputs']]
+        self.output_types = [o['type'] for o in function_abi.get('outputs', [])]
+        self.selector = function_abi_to_4byte_selector(function_abi)
+        self._encoder = TupleEncoder(
+            encoders=[registry.get_encoder(t) for t in self.input_types])
+        self._decoder = TupleDecoder(
+            decoders=[registry.get_decoder(t) for t in self.output_types])
+
+    def encode(self, **kwargs):
+        """ Return the calldata for a call with the given keyword arguments, as a hex string.
+        """
+        if len(kwargs) != len(self.input_names):
+            raise EncodingError('{} expects arguments {}, got {}'.format(
+                self.name, self.input_names, sorted(kwargs)))
+        try:
+            values = [
+                _normalize_input(abi_type, kwargs[name])
+                for name, abi_type in zip(self.input_names, self.input_types)
+            ]
+        except KeyError as e:
+            raise EncodingError('{} has no argument {}'.format(self.name, e))
+        return Web3.toHex(self.selector + self._encoder(values))
+
+    def decode(self, return_data):
+        """ Decode the data returned by `eth_call`. A single output is returned directly.
+        """
+        values = [
+            _normalize_output(abi_type, value)
+            for abi_type, value
+            in zip(self.output_types, self._decoder(ContextFramesBytesIO(return_data)))
+        ]
+        return values[0] if len(values) == 1 else values
+
+
+class EncodedCall(object):
+    """ A contract call with precomputed calldata. Provides the parts of the
+        `ContractFunction` interface used by `CallCache`.
+    """
+    __slots__ = ('web3', 'address', 'data', 'function_encoder')
+
+    def __init__(self, web3, address, data, function_encoder):
+        self.web3 = web3
+        self.address = address
+        self.data = data
+        self.function_encoder = function_encoder
+
+    def _encode_transaction_data(self):
+        return self.data
+
+    def call(self, block_identifier='latest'):
+        transaction = {'to': self.address, 'data': self.data}
+        if self.web3.eth.defaultAccount is not empty:
+            transaction['from'] = self.web3.eth.defaultAccount
+        return self.function_encoder.decode(
+            self.web3.eth.call(transaction, block_identifier=block_identifier))
+
+
+class ContractEncoder(object):
+    """ Precompiled encoders for the functions of one deployed contract.
+    """
+
+    def __init__(self, web3, address, abi, function_names=CURRENCY_CONTRACT_FUNCTIONS):
+        self.web3 = web3
+        self.address = address
+        self.functions = {
+            item['name']: FunctionEncoder(item) for item in abi
+            if item.get('type') == 'function' and item['name'] in function_names
+        }
+
+    def get_function(self, name):
+        try:
+            return self.functions[name]
+        except KeyError:
+            raise EncodingError('No precompiled encoder for {}'.format(name))
+
+    def build_transaction(self, name, transaction_options, **kwargs):
+        """ Return the transaction dict that `ContractFunction.transact` would send.
+        """
+        transaction = dict(transaction_options)
+        if self.web3.eth.defaultAccount is not empty:
+            transaction.setdefault('from', self.web3.eth.defaultAccount)
+        transaction['to'] = self.address
+        transaction['data'] = self.get_function(name).encode(**kwargs)
+        return transaction
+
+    def prepare_call(self, name, **kwargs):
+        """ Return an `EncodedCall` which can be passed to `CallCache.call`.
+        """
+        function_encoder = self.get_function(name)
+        return EncodedCall(
+            self.web3, self.address, function_encoder.encode(**kwargs), function_encoder)
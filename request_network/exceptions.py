@@ -28,3 +28,17 @@ class RoleNotSupported(BaseException):
 
 class ArtifactNotFound(BaseException):
     pass
+
+
+# Exceptions which code handling any error raised by the library should catch. Some of the
+# library's exceptions derive from BaseException, but catching BaseException would also
+# catch KeyboardInterrupt and SystemExit.
+CATCHABLE_EXCEPTIONS = (
+    Exception,
+    UnsupportedCurrency,
+    RequestNotFound,
+    TransactionNotFound,
+    IPFSConnectionFailed,
+    RoleNotSupported,
+    ArtifactNotFound,
+)
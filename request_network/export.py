@@ -0,0 +1,281 @@
+import csv
+import json
+import os
+
+from eth_utils import (
+    event_abi_to_log_topic,
+)
+from web3 import Web3
+
+from request_network.addresses import (
+    to_checksum_address,
+)
+from request_network.artifact_manager import (
+    ArtifactManager,
+)
+from request_network.providers import (
+    get_default_web3,
+)
+
+REQUEST_FIELDS = (
+    'request_id', 'core_contract_address', 'payee', 'payer', 'creator', 'ipfs_hash',
+    'block_number', 'log_index', 'transaction_hash',
+)
+PAYMENT_FIELDS = (
+    'request_id', 'payee_index', 'delta_amount', 'block_number', 'log_index',
+    'transaction_hash',
+)
+
+CHECKPOINT_FILENAME = 'checkpoint.json'
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def _to_bytes(value):
+    if isinstance(value, str):
+        return Web3.toBytes(hexstr=value)
+    return bytes(value)
+
+
+def _topic_to_address(topic):
+    return to_checksum_address(_to_bytes(topic)[12:])
+
+
+def decode_created_log(log):
+    """ Convert a raw `Created` log into an export row.
+
+        The non-indexed data is decoded by hand rather than through the ABI: this is
+        faster, and tolerates the missing string padding described in
+        `api.read_padded_data_from_stream`.
+    """
+    data = _to_bytes(log['data'])
+    string_offset = int.from_bytes(data[32:64], 'big')
+    string_length = int.from_bytes(data[string_offset:string_offset + 32], 'big')
+    string_start = string_offset + 32
+    ipfs_hash = data[string_start:string_start + string_length].decode('utf-8')
+    return {
+        'request_id': Web3.toHex(_to_bytes(log['topics'][1])),
+        'core_contract_address': to_checksum_address(log['address']),
+        'payee': _topic_to_address(log['topics'][2]),
+        'payer': _topic_to_address(log['topics'][3]),
+        'creator': to_checksum_address(data[12:32]),
+        'ipfs_hash': ipfs_hash if ipfs_hash else None,
+        'block_number': log['blockNumber'],
+        'log_index': log['logIndex'],
+        'transaction_hash': Web3.toHex(_to_bytes(log['transactionHash'])),
+    }
+
+
+def decode_update_balance_log(log):
+    """ Convert a raw `UpdateBalance` log into an export row.
+    """
+    data = _to_bytes(log['data'])
+    return {
+        'request_id': Web3.toHex(_to_bytes(log['topics'][1])),
+        'payee_index': data[31],
+        # Amounts are int256 and may exceed 64 bits, so they are exported as strings
+        'delta_amount': str(int.from_bytes(data[32:64], 'big', signed=True)),
+        'block_number': log['blockNumber'],
+        'log_index': log['logIndex'],
+        'transaction_hash': Web3.toHex(_to_bytes(log['transactionHash'])),
+    }
+
+
+class JsonLinesWriter(object):
+    extension = 'jsonl'
+
+    def __init__(self, path, fields, offset=None):
+        self.path = path
+        self.fields = fields
+        self.f = open(path, 'a+' if offset is not None else 'w', newline='')
+        if offset is not None:
+            self.f.truncate(offset)
+            self.f.seek(offset)
+
+    def write_rows(self, rows, chunk_start):
+        for row in rows:
+            self.f.write(json.dumps(row))
+            self.f.write('\n')
+
+    def flush(self):
+        """ Flush written rows to disk and return the offset to resume from.
+        """
+        self.f.flush()
+        os.fsync(self.f.fileno())
+        return self.f.tell()
+
+    def close(self):
+        self.f.close()
+
+
+class CsvWriter(JsonLinesWriter):
+    extension = 'csv'
+
+    def __init__(self, path, fields, offset=None):
+        super().__init__(path, fields, offset)
+        self.writer = csv.DictWriter(self.f, fieldnames=fields)
+        if offset is None:
+            self.writer.writeheader()
+
+    def write_rows(self, rows, chunk_start):
+        self.writer.writerows(rows)
+
+
+class ParquetWriter(object):
+    """ Writes each chunk as a separate Parquet file, named after the chunk's first block.
+
+        Parquet files can not be appended to, so resuming simply rewrites the part files
+        for the chunks after the checkpoint.
+    """
+    extension = 'parquet'
+
+    def __init__(self, path, fields, offset=None):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ImportError('Exporting to Parquet requires the pyarrow package')
+        self.path = path
+        self.fields = fields
+        os.makedirs(path, exist_ok=True)
+
+    def write_rows(self, rows, chunk_start):
+        import pyarrow
+        import pyarrow.parquet
+
+        if not rows:
+            return
+        table = pyarrow.Table.from_pydict(
+            {field: [row[field] for row in rows] for field in self.fields})
+        pyarrow.parquet.write_table(
+            table, os.path.join(self.path, '{:012d}.parquet'.format(chunk_start)))
+
+    def flush(self):
+        return 0
+
+    def close(self):
+        pass
+
+
+WRITERS = {
+    'jsonl': JsonLinesWriter,
+    'csv': CsvWriter,
+    'parquet': ParquetWriter,
+}
+
+
+class RequestExporter(object):
+    """ Stream Requests and payments from a core contract's `Created` and `UpdateBalance`
+        logs to files, scanning the block range in chunks so memory use is bounded by
+        the chunk size rather than the size of the history.
+
+        Progress is recorded in a checkpoint file in the output directory after each
+        chunk, and an interrupted export continues from the last complete chunk.
+    """
+
+    def __init__(self, output_directory, output_format='jsonl',
+                 chunk_size=DEFAULT_CHUNK_SIZE, core_contract_name='last-requestcore',
+                 web3=None, artifact_manager=None):
+        if output_format not in WRITERS:
+            raise ValueError('{} is not a supported export format'.format(output_format))
+        self.output_directory = output_directory
+        self.output_format = output_format
+        self.chunk_size = chunk_size
+        self.web3 = web3 if web3 else get_default_web3()
+
+        am = artifact_manager if artifact_manager else ArtifactManager(web3=self.web3)
+        self.core_contract_data = am.get_contract_data(core_contract_name)
+        core_contract = self.core_contract_data['instance']
+        self.created_topic = Web3.toHex(event_abi_to_log_topic(
+            event_abi=core_contract.events.Created().abi))
+        self.update_balance_topic = Web3.toHex(event_abi_to_log_topic(
+            event_abi=core_contract.events.UpdateBalance().abi))
+
+    @property
+    def checkpoint_path(self):
+        return os.path.join(self.output_directory, CHECKPOINT_FILENAME)
+
+    def load_checkpoint(self):
+        try:
+            with open(self.checkpoint_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save_checkpoint(self, checkpoint):
+        # Write to a temporary file first so an interruption can not leave a partial checkpoint
+        temporary_path = self.checkpoint_path + '.tmp'
+        with open(temporary_path, 'w') as f:
+            json.dump(checkpoint, f)
+        os.replace(temporary_path, self.checkpoint_path)
+
+    def _get_logs(self, topic, from_block, to_block):
+        return self.web3.eth.getLogs({
+            'fromBlock': from_block,
+            'toBlock': to_block,
+            'address': self.core_contract_data['address'],
+            'topics': [topic]
+        })
+
+    def _open_writers(self, checkpoint):
+        offsets = checkpoint['offsets'] if checkpoint else {}
+        writer_class = WRITERS[self.output_format]
+        writers = {}
+        for name, fields in (('requests', REQUEST_FIELDS), ('payments', PAYMENT_FIELDS)):
+            path = os.path.join(
+                self.output_directory, '{}.{}'.format(name, writer_class.extension))
+            writers[name] = writer_class(path, fields, offset=offsets.get(name))
+        return writers
+
+    def export(self, from_block=None, to_block=None):
+        """ Export all Requests and payments between `from_block` and `to_block` (inclusive).
+
+            If a checkpoint exists in the output directory the export resumes from it
+            and `from_block` is ignored. The checkpoint's `to_block` is kept, so an
+            explicit `to_block` must match it.
+
+        :raises ValueError: If `to_block` differs from the checkpoint's `to_block`
+
+        :return: The number of (requests, payments) rows written by this call
+        """
+        os.makedirs(self.output_directory, exist_ok=True)
+        checkpoint = self.load_checkpoint()
+        if checkpoint:
+            if to_block is not None and to_block != checkpoint['to_block']:
+                raise ValueError(
+                    'The export in {} is being resumed up to block {}, not {}. Remove its '
+                    'checkpoint to start a new export'.format(
+                        self.output_directory, checkpoint['to_block'], to_block))
+            from_block = checkpoint['next_block']
+            to_block = checkpoint['to_block']
+        else:
+            if from_block is None:
+                from_block = self.core_contract_data['block_number']
+            if to_block is None:
+                # Pin the end of the range so a resumed export covers the same blocks
+                to_block = self.web3.eth.blockNumber
+
+        writers = self._open_writers(checkpoint)
+        request_count = payment_count = 0
+        try:
+            for chunk_start in range(from_block, to_block + 1, self.chunk_size):
+                chunk_end = min(chunk_start + self.chunk_size - 1, to_block)
+                requests = [
+                    decode_created_log(log)
+                    for log in self._get_logs(self.created_topic, chunk_start, chunk_end)]
+                payments = [
+                    decode_update_balance_log(log)
+                    for log in self._get_logs(self.update_balance_topic, chunk_start, chunk_end)]
+                writers['requests'].write_rows(requests, chunk_start)
+                writers['payments'].write_rows(payments, chunk_start)
+                request_count += len(requests)
+                payment_count += len(payments)
+
+                self.save_checkpoint({
+                    'next_block': chunk_end + 1,
+                    'to_block': to_block,
+                    'offsets': {name: writer.flush() for name, writer in writers.items()}
+                })
+        finally:
+            for writer in writers.values():
+                writer.close()
+
+        return request_count, payment_count
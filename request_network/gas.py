@@ -0,0 +1,311 @@
+""" Local estimates of the gas used by Request transactions, and of gas prices.
+"""
+from collections import (
+    OrderedDict,
+    namedtuple,
+)
+import threading
+import time
+
+from web3 import Web3
+
+from request_network.constants import (
+    GAS_ESTIMATE_MARGIN,
+    GAS_ESTIMATE_PENDING_SIZE,
+    GAS_PRICE_MAX_AGE,
+    GAS_PRICE_SAMPLE_BLOCKS,
+    GAS_PRICE_TIERS,
+)
+
+# Gas used by a currency contract function depends mostly on the number of payees and on
+# whether the Request has data, i.e. an IPFS hash
+GasKey = namedtuple('GasKey', ['contract_address', 'function_name', 'payee_count', 'has_data'])
+
+
+class GasEstimate(object):
+    __slots__ = ('estimate', 'max_gas_used', 'samples')
+
+    def __init__(self, estimate=None):
+        # Result of `eth_estimateGas` for the first transaction with this key
+        self.estimate = estimate
+        # Largest gas used by a successful transaction with this key
+        self.max_gas_used = None
+        self.samples = 0
+
+    @property
+    def base(self):
+        return self.max_gas_used if self.max_gas_used is not None else self.estimate
+
+
+class GasEstimateCache(object):
+    """ Learns the gas limit to use for transactions calling currency contract functions,
+        so `eth_estimateGas` is only called once per `GasKey`.
+
+        The first transaction for a key is estimated by the node. After that the gas
+        limit is the largest amount of gas used by a confirmed transaction with the same
+        key (or the node's estimate, until a receipt has been seen), plus `margin`.
+        Receipts are passed to `record_receipt`, e.g. by a `ConfirmationTracker`.
+
+        A transaction which runs out of gas removes its key, so the next transaction is
+        estimated by the node again, and the margin for that key is doubled. The failed
+        transaction is not sent again: `record_receipt` returns True for it, and the
+        caller must resubmit it.
+    """
+
+    def __init__(self, web3, margin=GAS_ESTIMATE_MARGIN, pending_size=GAS_ESTIMATE_PENDING_SIZE):
+        self.web3 = web3
+        self.margin = margin
+        self.pending_size = pending_size
+        self.hits = 0
+        self.misses = 0
+        self.out_of_gas_count = 0
+        self._estimates = {}
+        self._margins = {}
+        # calldata -> key, for transactions whose gas was filled in but not yet sent
+        self._keys_by_data = OrderedDict()
+        # transaction hash -> (key, gas limit), for sent transactions
+        self._pending = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_gas(self, key):
+        """ Return the gas limit for a transaction with `key`, or None if unknown.
+        """
+        with self._lock:
+            estimate = self._estimates.get(key)
+            margin = self._margins.get(key, self.margin)
+        if estimate is None:
+            return None
+        return int(estimate.base * (1 + margin))
+
+    def fill_gas(self, transaction, key):
+        """ Set the transaction's gas limit from the cache, estimating it with the node on
+            a cache miss.
+        """
+        gas = self.get_gas(key)
+        if gas is None:
+            self.misses += 1
+            estimate = self.web3.eth.estimateGas(transaction)
+            with self._lock:
+                self._estimates.setdefault(key, GasEstimate(estimate))
+            gas = self.get_gas(key)
+        else:
+            self.hits += 1
+        transaction['gas'] = gas
+        with self._lock:
+            self._keys_by_data[transaction['data']] = key
+            self._trim(self._keys_by_data)
+        return transaction
+
+    def _trim(self, entries):
+        while len(entries) > self.pending_size:
+            entries.popitem(last=False)
+
+    def record_transaction(self, transaction_hash, transaction):
+        """ Remember the key of a transaction sent after `fill_gas`, so its receipt can
+            refine the estimate.
+        """
+        with self._lock:
+            key = self._keys_by_data.pop(transaction.get('data'), None)
+            if key is not None:
+                self._pending[Web3.toHex(hexstr=transaction_hash)] = (key, transaction['gas'])
+                self._trim(self._pending)
+
+    def record_receipt(self, receipt):
+        """ Refine the estimate for the receipt's transaction, if it was sent with a gas
+            limit from this cache.
+
+        :return: True if the transaction ran out of gas with a limit from this cache, in
+            which case it must be resubmitted by the caller
+        """
+        transaction_hash = Web3.toHex(receipt['transactionHash'])
+        with self._lock:
+            try:
+                key, gas_limit = self._pending.pop(transaction_hash)
+            except KeyError:
+                return False
+            if receipt.get('status', 1) == 1:
+                estimate = self._estimates.setdefault(key, GasEstimate())
+                estimate.samples += 1
+                if estimate.max_gas_used is None or receipt['gasUsed'] > estimate.max_gas_used:
+                    estimate.max_gas_used = receipt['gasUsed']
+            elif receipt['gasUsed'] >= gas_limit:
+                # Out of gas: fall back to the node's estimate, with a larger margin
+                self.out_of_gas_count += 1
+                self._estimates.pop(key, None)
+                self._margins[key] = 2 * self._margins.get(key, self.margin)
+                return True
+        return False
+
+    def as_dict(self):
+        """ Return the current estimates, e.g. for monitoring.
+        """
+        with self._lock:
+            return {
+                '{}.{}({} payees{})'.format(
+                    key.contract_address, key.function_name, key.payee_count,
+                    ', data' if key.has_data else ''): {
+                    'estimate': estimate.estimate,
+                    'max_gas_used': estimate.max_gas_used,
+                    'samples': estimate.samples,
+                    'margin': self._margins.get(key, self.margin),
+                }
+                for key, estimate in self._estimates.items()
+            }
+
+
+def percentile(sorted_values, percent):
+    """ Return the nearest-rank `percent` percentile of a sorted, non-empty list.
+    """
+    index = max(0, int(round(percent / 100 * len(sorted_values))) - 1)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+class GasPriceOracle(object):
+    """ Supplies gas prices from the transactions mined in the last `sample_blocks` blocks.
+
+        Each tier uses a percentile of the sampled prices, e.g. `fast` pays more than 90%
+        of recent transactions. Samples are refreshed at most once every `max_age`
+        seconds, fetching only the blocks mined since the previous refresh, either
+        continuously in a background thread with `start` or when a gas price is
+        requested. Only the first request waits for the blocks to be fetched: later
+        requests which find the samples stale refresh them in a background thread, and
+        use the last prices meanwhile. Until any transactions have been sampled the
+        node's `eth_gasPrice` is used.
+    """
+
+    def __init__(self, web3, tiers=None, default_tier='standard',
+                 sample_blocks=GAS_PRICE_SAMPLE_BLOCKS, max_age=GAS_PRICE_MAX_AGE):
+        """
+        :param web3: The `Web3` instance used to fetch blocks
+        :param tiers: Dict of tier name to percentile, defaults to `GAS_PRICE_TIERS`
+        :param default_tier: Tier used when `get_gas_price` is called without one
+        :param sample_blocks: Number of recent blocks to sample
+        :param max_age: Seconds after which samples are refreshed
+        """
+        self.web3 = web3
+        self.tiers = tiers if tiers else GAS_PRICE_TIERS
+        if default_tier not in self.tiers:
+            raise ValueError('{} is not a gas price tier'.format(default_tier))
+        self.default_tier = default_tier
+        self.sample_blocks = sample_blocks
+        self.max_age = max_age
+        # block number -> gas prices of the block's transactions
+        self._samples = OrderedDict()
+        self._prices = {}
+        self._node_gas_price = None
+        self._last_block = None
+        self._sampled_at = None
+        self._lock = threading.Lock()
+        self._sample_lock = threading.Lock()
+        self._thread = None
+        self._refresh_thread = None
+        self._stopped = threading.Event()
+
+    def sample(self):
+        """ Fetch the blocks mined since the last sample, and update the tier prices.
+        """
+        with self._sample_lock:
+            latest_block = self.web3.eth.blockNumber
+            first_block = max(
+                latest_block - self.sample_blocks + 1,
+                self._last_block + 1 if self._last_block is not None else 0)
+            for block_number in range(first_block, latest_block + 1):
+                block = self.web3.eth.getBlock(block_number, True)
+                # Some providers (e.g. eth-tester) do not convert the keys of a block's
+                # transactions, and return the price as `gas_price`
+                self._samples[block_number] = [
+                    t['gasPrice'] if 'gasPrice' in t else t['gas_price']
+                    for t in block['transactions']
+                ]
+            while self._samples and \
+                    next(iter(self._samples)) <= latest_block - self.sample_blocks:
+                self._samples.popitem(last=False)
+            self._last_block = latest_block
+
+            prices = sorted(p for block_prices in self._samples.values() for p in block_prices)
+            node_gas_price = self.web3.eth.gasPrice if not prices else None
+            with self._lock:
+                if node_gas_price is not None:
+                    self._node_gas_price = node_gas_price
+                self._prices = {
+                    tier: percentile(prices, percent) for tier, percent in self.tiers.items()
+                } if prices else {}
+                self._sampled_at = time.monotonic()
+
+    def get_gas_price(self, tier=None):
+        """ Return the gas price for `tier`, or the default tier.
+        """
+        refresh = False
+        with self._lock:
+            sampled = self._sampled_at is not None
+            stale = not sampled or time.monotonic() - self._sampled_at >= self.max_age
+            if stale and sampled and not self._thread and not self._refresh_thread:
+                self._refresh_thread = threading.Thread(target=self._refresh, daemon=True)
+                refresh = True
+        if refresh:
+            self._refresh_thread.start()
+        elif not sampled:
+            self.sample()
+        with self._lock:
+            if not self._prices:
+                return self._node_gas_price
+            return self._prices[tier if tier else self.default_tier]
+
+    def fill_gas_price(self, transaction, tier=None):
+        transaction['gasPrice'] = self.get_gas_price(tier)
+        return transaction
+
+    def get_distribution(self):
+        """ Return a summary of the sampled gas prices, e.g. for monitoring.
+        """
+        with self._sample_lock:
+            prices = sorted(p for block_prices in self._samples.values() for p in block_prices)
+            blocks = len(self._samples)
+            last_block = self._last_block
+        with self._lock:
+            tier_prices = dict(self._prices)
+            node_gas_price = self._node_gas_price
+        return {
+            'blocks': blocks,
+            'last_block': last_block,
+            'transactions': len(prices),
+            'min': prices[0] if prices else None,
+            'median': percentile(prices, 50) if prices else None,
+            'max': prices[-1] if prices else None,
+            'tiers': tier_prices,
+            'node_gas_price': node_gas_price,
+        }
+
+    def _refresh(self):
+        try:
+            self.sample()
+        except Exception:
+            # The last prices are used until a later refresh succeeds
+            pass
+        finally:
+            with self._lock:
+                self._refresh_thread = None
+
+    def _run(self, interval):
+        while not self._stopped.wait(interval):
+            try:
+                self.sample()
+            except Exception:
+                # Try again at the next interval, e.g. after a node timeout
+                pass
+
+    def start(self, interval=None):
+        """ Sample in a background thread every `interval` seconds, defaulting to `max_age`,
+            until `stop` is called.
+        """
+        self.sample()
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(interval if interval else self.max_age,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread:
+            self._stopped.set()
+            self._thread.join()
+            self._thread = None
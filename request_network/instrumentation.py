@@ -0,0 +1,159 @@
+""" Hooks for measuring where time is spent talking to Ethereum and IPFS.
+
+    Register an `InstrumentationHook` with `add_hook` to be notified of every JSON-RPC
+    request, IPFS operation, and of the time spent in each phase of the main API
+    operations. When no hooks are registered the instrumentation points do no work
+    beyond checking an empty list.
+"""
+from collections import (
+    defaultdict,
+)
+import threading
+import time
+
+MIDDLEWARE_NAME = 'request_network_instrumentation'
+
+_hooks = []
+
+
+class InstrumentationHook(object):
+    """ Base class for instrumentation hooks. Override the methods of interest.
+
+        Hooks may be called from multiple threads.
+    """
+
+    def on_rpc(self, method, duration, error=None):
+        """ Called after each JSON-RPC request.
+
+        :param method: JSON-RPC method name, e.g. `eth_call`
+        :param duration: Time taken, in seconds
+        :param error: The exception raised, if the request failed
+        """
+
+    def on_ipfs(self, operation, duration, error=None):
+        """ Called after each IPFS operation, e.g. `cat` or `add_json`.
+        """
+
+    def on_span(self, operation, phase, duration, error=None):
+        """ Called at the end of each phase of an API operation, e.g. the `log_scan`
+            phase of `get_request_by_id`.
+        """
+
+
+def add_hook(hook):
+    _hooks.append(hook)
+
+
+def remove_hook(hook):
+    _hooks.remove(hook)
+
+
+class _Timer(object):
+    __slots__ = ('callback', 'args', 'start')
+
+    def __init__(self, callback, *args):
+        self.callback = callback
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        duration = time.perf_counter() - self.start
+        for hook in list(_hooks):
+            getattr(hook, self.callback)(*self.args, duration, error=exc_value)
+        return False
+
+
+class _NullTimer(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def span(operation, phase):
+    """ Return a context manager timing one phase of an API operation.
+    """
+    return _Timer('on_span', operation, phase) if _hooks else _NULL_TIMER
+
+
+def ipfs_operation(operation):
+    """ Return a context manager timing an IPFS operation.
+    """
+    return _Timer('on_ipfs', operation) if _hooks else _NULL_TIMER
+
+
+def instrumentation_middleware(make_request, web3):
+    """ web3 middleware reporting the duration of each JSON-RPC request to the hooks.
+    """
+    def middleware(method, params):
+        if not _hooks:
+            return make_request(method, params)
+        with _Timer('on_rpc', method):
+            return make_request(method, params)
+    return middleware
+
+
+def install_middleware(web3):
+    """ Add the instrumentation middleware to a `Web3` instance, as the innermost layer
+        so only time spent on the request itself is measured.
+    """
+    if MIDDLEWARE_NAME not in web3.middleware_stack:
+        web3.middleware_stack.inject(instrumentation_middleware, name=MIDDLEWARE_NAME, layer=0)
+
+
+class PrometheusExporter(InstrumentationHook):
+    """ Hook which aggregates counts and durations, and renders them in the Prometheus
+        text exposition format.
+    """
+
+    def __init__(self, prefix='request_network'):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        # metric name -> label tuple -> [count, error count, total duration]
+        self._metrics = defaultdict(lambda: defaultdict(lambda: [0, 0, 0.0]))
+
+    def _record(self, metric, labels, duration, error):
+        with self._lock:
+            values = self._metrics[metric][labels]
+            values[0] += 1
+            values[1] += 1 if error is not None else 0
+            values[2] += duration
+
+    def on_rpc(self, method, duration, error=None):
+        self._record('rpc', (('method', method),), duration, error)
+
+    def on_ipfs(self, operation, duration, error=None):
+        self._record('ipfs', (('operation', operation),), duration, error)
+
+    def on_span(self, operation, phase, duration, error=None):
+        self._record('span', (('operation', operation), ('phase', phase)), duration, error)
+
+    def render(self):
+        """ Return the collected metrics as Prometheus exposition text.
+        """
+        lines = []
+        with self._lock:
+            for metric in sorted(self._metrics):
+                name = '{}_{}'.format(self.prefix, metric)
+                series = sorted(self._metrics[metric].items())
+                for suffix, metric_type, index in (
+                        ('total', 'counter', 0),
+                        ('errors_total', 'counter', 1),
+                        ('duration_seconds_sum', 'counter', 2)):
+                    lines.append('# TYPE {}_{} {}'.format(name, suffix, metric_type))
+                    for labels, values in series:
+                        lines.append('{}_{}{{{}}} {}'.format(
+                            name,
+                            suffix,
+                            ','.join('{}="{}"'.format(k, v) for k, v in labels),
+                            values[index]))
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,233 @@
+from array import (
+    array,
+)
+from collections import (
+    Counter,
+)
+from itertools import (
+    chain,
+    compress,
+)
+from operator import (
+    and_,
+)
+import sys
+
+from web3 import Web3
+
+# Amounts are int256 values, stored as their 32 byte big-endian two's complement
+# representation exactly as they appear in the log data.
+AMOUNT_WIDTH = 32
+# Number of unsigned 64 bit limbs per amount
+LIMB_COUNT = AMOUNT_WIDTH // 8
+# Maps the most significant byte of an amount to 1 if the amount is negative, else 0
+_SIGN_TABLE = bytes(128) + bytes([1]) * 128
+
+
+def _to_bytes(value):
+    if isinstance(value, str):
+        return Web3.toBytes(hexstr=value)
+    return bytes(value)
+
+
+def _sum_amounts(limb_sums, negative_count):
+    """ Return the sum of int256 amounts, from the sums of each of their unsigned limbs
+        and the number of negative amounts.
+    """
+    total = 0
+    for limb_sum in limb_sums:
+        total = (total << 64) + limb_sum
+    return total - (negative_count << 8 * AMOUNT_WIDTH)
+
+
+class PaymentLedger(object):
+    """ Columnar store of `UpdateBalance` payments.
+
+        Each payment is a row spread across array-backed columns, so millions of
+        payments can be held and aggregated without creating a `types.Payment` object
+        per log:
+
+        - `request_indexes`: index into `request_ids`, the dictionary of distinct
+          Request IDs (as 32 byte strings)
+        - `payee_indexes`, `block_numbers`, `log_indexes`: unsigned integer arrays
+        - `amounts`: fixed-width column of 32 byte signed big-endian amounts
+
+        numpy is not a dependency, so columns are processed with the standard library.
+        For totals and filters the amounts are converted to unsigned 64 bit limbs in a
+        single array conversion. `total` and `filter` work on whole columns, with the
+        per-row work done inside builtins (`sum`, `map`, `compress`). The group-by totals
+        make one Python pass over the limb columns, see `_totals_by_key`.
+    """
+
+    def __init__(self):
+        self.request_ids = []
+        self._request_id_lookup = {}
+        self.request_indexes = array('L')
+        self.payee_indexes = array('B')
+        self.block_numbers = array('Q')
+        self.log_indexes = array('L')
+        self.amounts = bytearray()
+
+    def __len__(self):
+        return len(self.request_indexes)
+
+    @classmethod
+    def from_logs(cls, logs):
+        """ Build a ledger from raw `UpdateBalance` log entries, as returned by `getLogs`.
+        """
+        ledger = cls()
+        ledger.extend_from_logs(logs)
+        return ledger
+
+    def _get_request_index(self, request_id):
+        try:
+            return self._request_id_lookup[request_id]
+        except KeyError:
+            index = len(self.request_ids)
+            self.request_ids.append(request_id)
+            self._request_id_lookup[request_id] = index
+            return index
+
+    def append(self, request_id, payee_index, delta_amount, block_number=0, log_index=0):
+        """ Append a single payment.
+
+        :param request_id: The Request ID as a 32 byte string or hex string
+        :param delta_amount: The (possibly negative) payment amount
+        :type delta_amount: int
+        """
+        self.request_indexes.append(self._get_request_index(_to_bytes(request_id)))
+        self.payee_indexes.append(payee_index)
+        self.block_numbers.append(block_number)
+        self.log_indexes.append(log_index)
+        self.amounts += delta_amount.to_bytes(AMOUNT_WIDTH, 'big', signed=True)
+
+    def append_log(self, log):
+        """ Append a raw `UpdateBalance` log entry without decoding it through the ABI.
+
+            The log data is two 32 byte words: `payeeIndex` followed by `deltaAmount`.
+        """
+        data = _to_bytes(log['data'])
+        self.request_indexes.append(self._get_request_index(_to_bytes(log['topics'][1])))
+        # uint8 payeeIndex is right-aligned in its 32 byte word
+        self.payee_indexes.append(data[AMOUNT_WIDTH - 1])
+        self.block_numbers.append(log['blockNumber'])
+        self.log_indexes.append(log['logIndex'])
+        self.amounts += data[AMOUNT_WIDTH:2 * AMOUNT_WIDTH]
+
+    def extend_from_logs(self, logs):
+        for log in logs:
+            self.append_log(log)
+
+    def get_amount(self, row):
+        offset = row * AMOUNT_WIDTH
+        return int.from_bytes(self.amounts[offset:offset + AMOUNT_WIDTH], 'big', signed=True)
+
+    def iter_amounts(self):
+        view = memoryview(self.amounts)
+        for offset in range(0, len(view), AMOUNT_WIDTH):
+            yield int.from_bytes(view[offset:offset + AMOUNT_WIDTH], 'big', signed=True)
+
+    def _amount_limbs(self):
+        """ Return the amounts as an array of unsigned 64 bit limbs, `LIMB_COUNT` per row
+            with the most significant first. Negative amounts keep their two's complement
+            representation, see `_negative_flags`.
+        """
+        limbs = array('Q', bytes(self.amounts))
+        if sys.byteorder == 'little':
+            limbs.byteswap()
+        return limbs
+
+    def _negative_flags(self):
+        """ Return a byte per row, which is 1 if its amount is negative.
+        """
+        return bytes(self.amounts[::AMOUNT_WIDTH]).translate(_SIGN_TABLE)
+
+    def total(self):
+        limbs = self._amount_limbs()
+        return _sum_amounts(
+            [sum(limbs[limb::LIMB_COUNT]) for limb in range(LIMB_COUNT)],
+            self._negative_flags().count(1))
+
+    def _totals_by_key(self, keys):
+        """ Return a dict mapping each value of the integer column `keys` to the sum of
+            the amounts of its rows.
+
+            This is a single Python pass over the keys and limb columns: each row's
+            unsigned amount is rebuilt from its limbs with shifts, rather than by
+            slicing the amounts column and calling `int.from_bytes`. Negative amounts
+            are then corrected once per key, from a count of its negative rows.
+        """
+        limbs = self._amount_limbs()
+        totals = dict.fromkeys(keys, 0)
+        for key, limb_0, limb_1, limb_2, limb_3 in zip(
+                keys, *[limbs[limb::LIMB_COUNT] for limb in range(LIMB_COUNT)]):
+            totals[key] += ((limb_0 << 64 | limb_1) << 64 | limb_2) << 64 | limb_3
+        negative_counts = Counter(compress(keys, self._negative_flags()))
+        for key, negative_count in negative_counts.items():
+            totals[key] -= negative_count << 8 * AMOUNT_WIDTH
+        return totals
+
+    def totals_by_request(self):
+        """ Return a dict mapping each Request ID (as a hex string) to the sum of its payments.
+        """
+        totals = self._totals_by_key(self.request_indexes)
+        return {
+            Web3.toHex(request_id): totals.get(request_index, 0)
+            for request_index, request_id in enumerate(self.request_ids)
+        }
+
+    def totals_by_payee(self):
+        """ Return a dict mapping each (Request ID, payee index) pair to the sum of its payments.
+        """
+        # Payee indexes are a single byte, so each pair is combined into one integer key
+        keys = list(map(
+            int.__add__, map((256).__mul__, self.request_indexes), self.payee_indexes))
+        return {
+            (Web3.toHex(self.request_ids[key >> 8]), key & 0xff): total
+            for key, total in self._totals_by_key(keys).items()
+        }
+
+    def filter(self, request_id=None, payee_index=None, from_block=None, to_block=None):
+        """ Return a new ledger containing only the rows matching all given criteria.
+        """
+        selectors = []
+        if request_id is not None:
+            request_index = self._request_id_lookup.get(_to_bytes(request_id))
+            if request_index is None:
+                return PaymentLedger()
+            selectors.append(map(request_index.__eq__, self.request_indexes))
+        if payee_index is not None:
+            selectors.append(map(int(payee_index).__eq__, self.payee_indexes))
+        if from_block is not None:
+            selectors.append(map(int(from_block).__le__, self.block_numbers))
+        if to_block is not None:
+            selectors.append(map(int(to_block).__ge__, self.block_numbers))
+
+        mask = selectors[0] if selectors else [True] * len(self)
+        for selector in selectors[1:]:
+            mask = map(and_, mask, selector)
+        return self._select(list(mask))
+
+    def _select(self, mask):
+        ledger = PaymentLedger()
+        request_indexes = array('L', compress(self.request_indexes, mask))
+        # Renumber the selected Request IDs, keeping their order
+        used_request_indexes = sorted(set(request_indexes))
+        new_request_indexes = [0] * len(self.request_ids)
+        for new_index, request_index in enumerate(used_request_indexes):
+            new_request_indexes[request_index] = new_index
+            ledger.request_ids.append(self.request_ids[request_index])
+        ledger._request_id_lookup = {
+            request_id: index for index, request_id in enumerate(ledger.request_ids)}
+        ledger.request_indexes.extend(map(new_request_indexes.__getitem__, request_indexes))
+
+        ledger.payee_indexes.extend(compress(self.payee_indexes, mask))
+        ledger.block_numbers.extend(compress(self.block_numbers, mask))
+        ledger.log_indexes.extend(compress(self.log_indexes, mask))
+        # Repeat each row's selector for each of its limbs
+        limbs = array('Q', compress(
+            self._amount_limbs(), chain.from_iterable(zip(*[mask] * LIMB_COUNT))))
+        if sys.byteorder == 'little':
+            limbs.byteswap()
+        ledger.amounts = bytearray(limbs.tobytes())
+        return ledger
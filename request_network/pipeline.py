@@ -0,0 +1,161 @@
+""" A small multi-stage pipeline, where each stage runs on its own threads and stages are
+    connected by bounded queues.
+"""
+import queue
+import threading
+import time
+
+from request_network.exceptions import (
+    CATCHABLE_EXCEPTIONS,
+)
+
+# Placed on a stage's queue to tell one of its workers to stop
+_STOP = object()
+
+
+class StageStats(object):
+    """ Counters for one pipeline stage.
+
+        `busy_seconds` is the total time spent processing items, summed over the stage's
+        workers, and `elapsed_seconds` is the time from the stage starting its first item
+        to finishing its last.
+    """
+
+    def __init__(self, name, max_workers):
+        self.name = name
+        self.max_workers = max_workers
+        self.items = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.started = None
+        self.finished = None
+
+    @property
+    def elapsed_seconds(self):
+        return self.finished - self.started if self.started is not None else 0.0
+
+    @property
+    def throughput(self):
+        """ Items processed per second while the stage was active.
+        """
+        return self.items / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def as_dict(self):
+        return {
+            'items': self.items,
+            'errors': self.errors,
+            'max_workers': self.max_workers,
+            'busy_seconds': self.busy_seconds,
+            'elapsed_seconds': self.elapsed_seconds,
+            'throughput': self.throughput,
+        }
+
+    def __repr__(self):
+        return '<StageStats {} {} items {:.1f}/s>'.format(self.name, self.items, self.throughput)
+
+
+class Stage(object):
+    """ A pipeline stage calling `function(item)` on up to `max_workers` threads.
+
+        At most `max_queued` items wait for the stage, after which the previous stage
+        (or the caller feeding the pipeline) blocks until a worker is free.
+    """
+
+    def __init__(self, name, function, max_workers=1, max_queued=None):
+        self.name = name
+        self.function = function
+        self.max_workers = max_workers
+        self.max_queued = max_queued if max_queued else 2 * max_workers
+
+
+class PipelineItem(object):
+    """ Base class for items passed through a `Pipeline`.
+
+        An item whose function raises in one stage records the error and the stage, and
+        skips the remaining stages. Exceptions which are not in `CATCHABLE_EXCEPTIONS`,
+        e.g. `KeyboardInterrupt`, stop the pipeline instead.
+    """
+
+    def __init__(self):
+        self.error = None
+        self.failed_stage = None
+
+
+class Pipeline(object):
+    """ Runs `PipelineItem`s through a sequence of `Stage`s.
+    """
+
+    def __init__(self, stages):
+        self.stages = stages
+
+    def run(self, items):
+        """ Pass each of `items` through every stage, and return the `StageStats` of each
+            stage. Items are updated in place.
+
+            If a stage raises an exception which is not in `CATCHABLE_EXCEPTIONS` the
+            remaining items are not processed, and the exception is raised once every
+            worker has stopped.
+        """
+        queues = [queue.Queue(maxsize=stage.max_queued) for stage in self.stages] + [None]
+        stats = [StageStats(stage.name, stage.max_workers) for stage in self.stages]
+        remaining_workers = [stage.max_workers for stage in self.stages]
+        lock = threading.Lock()
+        # Exceptions which stop the pipeline, e.g. SystemExit
+        stopped = []
+
+        def work(index):
+            stage, stage_stats = self.stages[index], stats[index]
+            input_queue, output_queue = queues[index], queues[index + 1]
+            while True:
+                item = input_queue.get()
+                if item is _STOP:
+                    break
+                if item.error is None and not stopped:
+                    start = time.monotonic()
+                    try:
+                        stage.function(item)
+                    except CATCHABLE_EXCEPTIONS as e:
+                        item.error = e
+                        item.failed_stage = stage.name
+                    # Keep draining the queues, so the other workers can stop
+                    except BaseException as e:
+                        item.error = e
+                        item.failed_stage = stage.name
+                        stopped.append(e)
+                    finish = time.monotonic()
+                    with lock:
+                        stage_stats.items += 1
+                        stage_stats.errors += item.error is not None
+                        stage_stats.busy_seconds += finish - start
+                        if stage_stats.started is None or start < stage_stats.started:
+                            stage_stats.started = start
+                        stage_stats.finished = max(finish, stage_stats.finished or finish)
+                if output_queue is not None:
+                    output_queue.put(item)
+
+            with lock:
+                remaining_workers[index] -= 1
+                last_worker = remaining_workers[index] == 0
+            # Stop the next stage once every worker of this stage has finished
+            if last_worker and output_queue is not None:
+                for _ in range(self.stages[index + 1].max_workers):
+                    output_queue.put(_STOP)
+
+        threads = [
+            threading.Thread(target=work, args=(index,), daemon=True)
+            for index, stage in enumerate(self.stages)
+            for _ in range(stage.max_workers)
+        ]
+        for thread in threads:
+            thread.start()
+        for item in items:
+            if stopped:
+                break
+            queues[0].put(item)
+        for _ in range(self.stages[0].max_workers):
+            queues[0].put(_STOP)
+        for thread in threads:
+            thread.join()
+        if stopped:
+            raise stopped[0]
+        return {stage_stats.name: stage_stats for stage_stats in stats}
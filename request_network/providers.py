@@ -0,0 +1,231 @@
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ThreadPoolExecutor,
+    wait,
+)
+import threading
+import time
+
+import requests
+from requests.adapters import (
+    HTTPAdapter,
+)
+from urllib3.exceptions import (
+    ConnectTimeoutError,
+)
+from web3.providers.base import (
+    JSONBaseProvider,
+)
+
+# JSON-RPC methods which do not change state, and so can safely be sent to more than
+# one endpoint when hedging against a slow response.
+READ_METHODS = frozenset([
+    'eth_blockNumber',
+    'eth_call',
+    'eth_chainId',
+    'eth_estimateGas',
+    'eth_gasPrice',
+    'eth_getBalance',
+    'eth_getBlockByHash',
+    'eth_getBlockByNumber',
+    'eth_getCode',
+    'eth_getLogs',
+    'eth_getTransactionByHash',
+    'eth_getTransactionCount',
+    'eth_getTransactionReceipt',
+    'net_version',
+    'web3_clientVersion',
+])
+
+
+def get_default_web3():
+    """ Return the shared `Web3` instance using web3's automatically detected provider.
+
+        `web3.auto` is imported on first use rather than when this library is imported,
+        so code paths which never talk to a node do not pay for it.
+    """
+    from web3.auto import w3
+    return w3
+
+
+class EndpointUnavailable(Exception):
+    """ An endpoint failed to answer a request. `sent` is False if the request failed
+        before it could reach the endpoint, and so can safely be sent elsewhere.
+    """
+
+    def __init__(self, message, sent=True):
+        super().__init__(message)
+        self.sent = sent
+
+
+def _was_sent(error):
+    """ Return whether the request which raised the `requests` exception `error` may
+        have reached the endpoint. Only failures to connect are known not to have.
+    """
+    if not isinstance(error, requests.ConnectionError):
+        return True
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    # urllib3 raises a subclass of ConnectTimeoutError when a connection is refused
+    return not isinstance(error, requests.ConnectTimeout) and \
+        not isinstance(reason, ConnectTimeoutError)
+
+
+class Endpoint(object):
+    """ A JSON-RPC endpoint, tracking an exponentially weighted moving average of its
+        response latency and whether it has been ejected after repeated failures.
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self.latency = None
+        self.consecutive_failures = 0
+        self.ejected_until = 0
+        self.request_count = 0
+        self.failure_count = 0
+
+    def is_available(self, now):
+        return self.ejected_until <= now
+
+    def record_success(self, latency, smoothing):
+        self.request_count += 1
+        self.consecutive_failures = 0
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency = smoothing * latency + (1 - smoothing) * self.latency
+
+    def record_failure(self, max_failures, ejection_seconds, now):
+        self.request_count += 1
+        self.failure_count += 1
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= max_failures:
+            self.ejected_until = now + ejection_seconds
+
+    def __repr__(self):
+        return '<Endpoint {} latency={}>'.format(self.url, self.latency)
+
+
+class PooledHTTPProvider(JSONBaseProvider):
+    """ web3 provider which sends JSON-RPC requests to several HTTP endpoints over a pool
+        of keep-alive connections.
+
+        Each request is routed to the available endpoint with the lowest moving-average
+        latency. Endpoints which fail `max_failures` times in a row are ejected for
+        `ejection_seconds`. Read-only requests which fail, and other requests which could
+        not connect, are retried on the next best endpoint. Other requests which fail
+        after being sent, for example by timing out, raise `EndpointUnavailable` rather
+        than risk submitting a transaction twice.
+
+        If `hedge_after` is set, read-only requests which have not completed after that
+        many seconds are also sent to the next best endpoint, and the first successful
+        response is used.
+    """
+
+    def __init__(self, endpoints, pool_size=10, timeout=10, max_failures=3,
+                 ejection_seconds=30, latency_smoothing=0.2, hedge_after=None):
+        if not endpoints:
+            raise ValueError('At least one endpoint is required')
+        self.endpoints = [Endpoint(url) for url in endpoints]
+        self.timeout = timeout
+        self.max_failures = max_failures
+        self.ejection_seconds = ejection_seconds
+        self.latency_smoothing = latency_smoothing
+        self.hedge_after = hedge_after
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(endpoints), pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._lock = threading.Lock()
+        self._hedge_executor = ThreadPoolExecutor(max_workers=pool_size) \
+            if hedge_after is not None else None
+        super().__init__()
+
+    def __str__(self):
+        return 'Pooled HTTP connection to {}'.format(
+            ', '.join(endpoint.url for endpoint in self.endpoints))
+
+    def get_ranked_endpoints(self):
+        """ Return available endpoints ordered by latency. Endpoints with no latency
+            measurement yet are tried first so every endpoint gets measured.
+
+            If every endpoint has been ejected they are all returned, rather than failing
+            without trying any of them.
+        """
+        now = time.monotonic()
+        with self._lock:
+            endpoints = [e for e in self.endpoints if e.is_available(now)] or self.endpoints
+            return sorted(
+                endpoints, key=lambda e: -1 if e.latency is None else e.latency)
+
+    def _send(self, endpoint, request_data):
+        start = time.monotonic()
+        try:
+            response = self.session.post(
+                endpoint.url,
+                data=request_data,
+                headers={'Content-Type': 'application/json'},
+                timeout=self.timeout)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            with self._lock:
+                endpoint.record_failure(
+                    self.max_failures, self.ejection_seconds, time.monotonic())
+            raise EndpointUnavailable(
+                '{} failed: {}'.format(endpoint.url, e), sent=_was_sent(e))
+
+        with self._lock:
+            endpoint.record_success(time.monotonic() - start, self.latency_smoothing)
+        return response.content
+
+    def _send_with_failover(self, endpoints, request_data, read_only=True):
+        errors = []
+        for endpoint in endpoints:
+            try:
+                return self._send(endpoint, request_data)
+            except EndpointUnavailable as e:
+                # A request which changes state, e.g. sending a transaction or creating a
+                # filter, may have been processed by an endpoint which then failed
+                if e.sent and not read_only:
+                    raise
+                errors.append(str(e))
+        raise EndpointUnavailable('All endpoints failed: {}'.format('; '.join(errors)))
+
+    def _send_hedged(self, endpoints, request_data):
+        primary = self._hedge_executor.submit(
+            self._send_with_failover, endpoints, request_data)
+        done, _ = wait([primary], timeout=self.hedge_after)
+        if done or len(endpoints) < 2:
+            return primary.result()
+
+        # Send the same request to the next endpoint, and use whichever answers first
+        hedge = self._hedge_executor.submit(
+            self._send_with_failover, endpoints[1:] + endpoints[:1], request_data)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    return future.result()
+                except EndpointUnavailable as e:
+                    error = e
+        raise error
+
+    def make_request(self, method, params):
+        request_data = self.encode_rpc_request(method, params)
+        endpoints = self.get_ranked_endpoints()
+        read_only = method in READ_METHODS
+        if self._hedge_executor and read_only:
+            raw_response = self._send_hedged(endpoints, request_data)
+        else:
+            raw_response = self._send_with_failover(endpoints, request_data, read_only)
+        return self.decode_rpc_response(raw_response)
+
+    def isConnected(self):
+        try:
+            response = self.make_request('web3_clientVersion', [])
+        except EndpointUnavailable:
+            return False
+        return 'result' in response
@@ -0,0 +1,143 @@
+""" Rendering payment gateway URLs as QR codes, in memory.
+
+    `pyqrcode` is imported when a QR code is first rendered.
+"""
+from collections import (
+    OrderedDict,
+)
+from concurrent.futures import (
+    ProcessPoolExecutor,
+)
+from io import (
+    BytesIO,
+)
+import threading
+
+from request_network.constants import (
+    QR_CODE_CACHE_SIZE,
+)
+from request_network.types import (
+    get_payment_gateway_urls,
+)
+
+QR_CODE_FORMATS = ('png', 'svg')
+QR_CODE_MIME_TYPES = {
+    # Kept for compatibility with data URIs generated by earlier versions
+    'png': 'text/png',
+    'svg': 'image/svg+xml',
+}
+
+
+def _get_render_options(pyqrcode_kwargs):
+    kwargs = dict(pyqrcode_kwargs) if pyqrcode_kwargs else {}
+    # Use 2 as the default scale. Request's URLs are quite long so they result in
+    # pixel-dense QR codes.
+    kwargs.setdefault('scale', 2)
+    return kwargs
+
+
+def _freeze(value):
+    """ Return a hashable copy of a render option, e.g. a colour given as a list.
+    """
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def render_qr_code(url, image_format='png', pyqrcode_kwargs=None):
+    """ Return a QR code containing `url` as PNG or SVG image data.
+
+    :param pyqrcode_kwargs: Optional arguments for pyqrcode's `png()` or `svg()`
+    :rtype: bytes
+    """
+    if image_format not in QR_CODE_FORMATS:
+        raise ValueError('{} is not a supported QR code format'.format(image_format))
+    import pyqrcode
+
+    qr_code = pyqrcode.create(url)
+    f = BytesIO()
+    getattr(qr_code, image_format)(f, **_get_render_options(pyqrcode_kwargs))
+    return f.getvalue()
+
+
+class QRCodeCache(object):
+    """ LRU cache of rendered QR codes keyed by (Request hash, callback URL, network ID,
+        format, render options).
+    """
+
+    def __init__(self, max_size=QR_CODE_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_key(request, callback_url, ethereum_network_id, image_format, pyqrcode_kwargs):
+        options = _get_render_options(pyqrcode_kwargs)
+        return (
+            request.hash, callback_url, str(ethereum_network_id), image_format,
+            _freeze(options))
+
+    def get(self, request, callback_url, ethereum_network_id, image_format='png',
+            pyqrcode_kwargs=None):
+        """ Return the QR code for paying `request`, rendering it on a cache miss.
+        """
+        key = self.get_key(
+            request, callback_url, ethereum_network_id, image_format, pyqrcode_kwargs)
+        with self._lock:
+            try:
+                image = self._entries[key]
+            except KeyError:
+                pass
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return image
+
+        image = render_qr_code(
+            request.get_payment_gateway_url(callback_url, ethereum_network_id),
+            image_format, pyqrcode_kwargs)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = image
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return image
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_qr_code_cache = QRCodeCache()
+
+
+def get_qr_code_cache():
+    """ Return the shared QR code cache used by `Request.get_qr_code`.
+    """
+    return _qr_code_cache
+
+
+def _render_qr_code(arguments):
+    return render_qr_code(*arguments)
+
+
+def render_qr_codes(requests, callback_url, ethereum_network_id, image_format='png',
+                    pyqrcode_kwargs=None, max_workers=None, chunk_size=16):
+    """ Render the QR codes for paying each of `requests` on a pool of processes.
+
+        Gateway URLs are built in this process, and only the URLs are sent to the
+        workers, which do the QR encoding.
+
+    :param max_workers: Number of processes, defaults to the number of CPUs
+    :return: A list of image data, in the same order as `requests`
+    """
+    arguments = [
+        (url, image_format, pyqrcode_kwargs)
+        for url in get_payment_gateway_urls(requests, callback_url, ethereum_network_id)
+    ]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_render_qr_code, arguments, chunksize=chunk_size))
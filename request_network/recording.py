@@ -0,0 +1,228 @@
+""" Record and replay JSON-RPC and IPFS traffic, so read paths can be profiled
+    deterministically without a live Ethereum node or IPFS daemon.
+
+    Wrap a provider in `RecordingProvider` and the IPFS client in `RecordingIPFSClient`,
+    run the code of interest, and `save()` the shared `Fixture`. `ReplayProvider` and
+    `ReplayIPFSClient` then serve the recorded responses back, optionally after a
+    simulated per-call latency, e.g.::
+
+        fixture = Fixture()
+        request_api = RequestNetwork(provider=RecordingProvider(provider, fixture))
+        set_ipfs_client(RecordingIPFSClient(get_ipfs(), fixture))
+        request_api.get_request_by_id(request_id)
+        fixture.save('get_request_by_id.json.gz')
+
+        fixture = Fixture.load('get_request_by_id.json.gz')
+        request_api = RequestNetwork(provider=ReplayProvider(fixture, latency=0.05))
+        set_ipfs_client(ReplayIPFSClient(fixture, latency=0.05))
+"""
+from collections import (
+    defaultdict,
+    deque,
+)
+import gzip
+import json
+import threading
+import time
+
+from web3.providers.base import (
+    BaseProvider,
+)
+
+FIXTURE_VERSION = 1
+
+
+class FixtureMissing(Exception):
+    """ Raised when replaying a call which was not recorded.
+    """
+    pass
+
+
+def _encode_default(value):
+    if isinstance(value, (bytes, bytearray)):
+        return '0x' + bytes(value).hex()
+    raise TypeError('{!r} is not JSON serializable'.format(value))
+
+
+def _normalize(value):
+    """ Return `value` as plain JSON types, as it would be sent over the wire.
+    """
+    return json.loads(json.dumps(value, default=_encode_default))
+
+
+def _key(name, args):
+    return name, json.dumps(args, sort_keys=True, separators=(',', ':'))
+
+
+class Fixture(object):
+    """ Recorded JSON-RPC responses and IPFS results.
+
+        Identical calls are replayed in the order they were recorded, and once the
+        recorded responses for a call are used up the last one is repeated. This keeps
+        polling loops, e.g. waiting for a transaction receipt, deterministic.
+    """
+
+    def __init__(self, rpc=None, ipfs=None):
+        self.rpc = list(rpc or [])
+        self.ipfs = list(ipfs or [])
+        self._lock = threading.Lock()
+        self._index_entries()
+
+    def _index_entries(self):
+        self._responses = defaultdict(deque)
+        for entry in self.rpc:
+            self._responses[_key(entry['method'], entry['params'])].append(entry['response'])
+        self._results = defaultdict(deque)
+        for entry in self.ipfs:
+            self._results[_key(entry['operation'], entry['args'])].append(entry['result'])
+
+    @classmethod
+    def load(cls, path):
+        """ Load a fixture written by `save`. Paths ending in `.gz` are gzip compressed.
+        """
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rt') as f:
+            data = json.load(f)
+        if data.get('version') != FIXTURE_VERSION:
+            raise ValueError('Unsupported fixture version: {}'.format(data.get('version')))
+        return cls(rpc=data['rpc'], ipfs=data['ipfs'])
+
+    def save(self, path):
+        """ Write the fixture as compact JSON. Paths ending in `.gz` are gzip compressed.
+        """
+        opener = gzip.open if path.endswith('.gz') else open
+        with self._lock:
+            data = {'version': FIXTURE_VERSION, 'rpc': self.rpc, 'ipfs': self.ipfs}
+        with opener(path, 'wt') as f:
+            json.dump(data, f, separators=(',', ':'))
+
+    def record_rpc(self, method, params, response):
+        entry = {
+            'method': method,
+            'params': _normalize(params),
+            'response': {k: v for k, v in _normalize(response).items() if k != 'id'},
+        }
+        with self._lock:
+            self.rpc.append(entry)
+            self._responses[_key(method, entry['params'])].append(entry['response'])
+
+    def record_ipfs(self, operation, args, result):
+        entry = {'operation': operation, 'args': _normalize(args), 'result': result}
+        with self._lock:
+            self.ipfs.append(entry)
+            self._results[_key(operation, entry['args'])].append(result)
+
+    @staticmethod
+    def _next(queues, key, description):
+        queue = queues.get(key)
+        if not queue:
+            raise FixtureMissing('No recorded result for {}'.format(description))
+        return queue.popleft() if len(queue) > 1 else queue[0]
+
+    def replay_rpc(self, method, params):
+        with self._lock:
+            response = self._next(
+                self._responses,
+                _key(method, _normalize(params)),
+                '{}({})'.format(method, params))
+        return dict(response)
+
+    def replay_ipfs(self, operation, args):
+        with self._lock:
+            return self._next(
+                self._results,
+                _key(operation, _normalize(args)),
+                'IPFS {}({})'.format(operation, args))
+
+
+class RecordingProvider(BaseProvider):
+    """ web3 provider which passes requests to another provider, and records each
+        request and response in `fixture`.
+    """
+
+    def __init__(self, provider, fixture):
+        self.provider = provider
+        self.fixture = fixture
+        self._provider_request = provider.make_request
+
+    def __str__(self):
+        return 'Recording {}'.format(self.provider)
+
+    def request_func(self, web3, outer_middlewares):
+        # Keep the wrapped provider's own middlewares, e.g. the transaction defaults added
+        # by `EthereumTesterProvider`, which would otherwise be skipped. Requests are
+        # recorded before those middlewares run, as replay does not need them.
+        self._provider_request = self.provider.request_func(web3, ())
+        return super().request_func(web3, outer_middlewares)
+
+    def make_request(self, method, params):
+        response = self._provider_request(method, params)
+        self.fixture.record_rpc(method, params, response)
+        return response
+
+    def isConnected(self):
+        return self.provider.isConnected()
+
+
+class ReplayProvider(BaseProvider):
+    """ web3 provider which answers requests from a recorded `fixture`, sleeping for
+        `latency` seconds per request to simulate the round trip to a node.
+    """
+
+    def __init__(self, fixture, latency=0):
+        self.fixture = fixture
+        self.latency = latency
+
+    def __str__(self):
+        return 'Replay provider'
+
+    def make_request(self, method, params):
+        if self.latency:
+            time.sleep(self.latency)
+        return self.fixture.replay_rpc(method, params)
+
+    def isConnected(self):
+        return True
+
+
+class RecordingIPFSClient(object):
+    """ IPFS client which passes `add_json` and `cat` calls to another client, and
+        records the results in `fixture`.
+    """
+
+    def __init__(self, ipfs, fixture):
+        self.ipfs = ipfs
+        self.fixture = fixture
+
+    def add_json(self, data):
+        ipfs_hash = self.ipfs.add_json(data)
+        self.fixture.record_ipfs('add_json', [data], ipfs_hash)
+        return ipfs_hash
+
+    def cat(self, ipfs_hash):
+        content = self.ipfs.cat(ipfs_hash)
+        if isinstance(content, bytes):
+            content = content.decode()
+        self.fixture.record_ipfs('cat', [ipfs_hash], content)
+        return content
+
+
+class ReplayIPFSClient(object):
+    """ IPFS client which answers `add_json` and `cat` calls from a recorded `fixture`,
+        sleeping for `latency` seconds per call.
+    """
+
+    def __init__(self, fixture, latency=0):
+        self.fixture = fixture
+        self.latency = latency
+
+    def _replay(self, operation, args):
+        if self.latency:
+            time.sleep(self.latency)
+        return self.fixture.replay_ipfs(operation, args)
+
+    def add_json(self, data):
+        return self._replay('add_json', [data])
+
+    def cat(self, ipfs_hash):
+        return self._replay('cat', [ipfs_hash])
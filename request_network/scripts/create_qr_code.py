@@ -3,38 +3,82 @@ import datetime
 import os
 import time
 
-from web3 import Web3
-
-from request_network.api import (
-    RequestNetwork,
+from request_network.addresses import (
+    to_checksum_address,
+)
+from request_network.batch import (
+    BATCH_FIELDS,
+    QRCodeBatch,
+    read_batch_file,
 )
 from request_network.currencies import (
     currencies_by_symbol,
 )
+from request_network.qr import (
+    QR_CODE_FORMATS,
+)
 from request_network.types import (
     Payee,
     Roles,
 )
 
 
+def create_batch(args):
+    rows = read_batch_file(args.batch_file)
+    print('Generating {} signed Requests and QR codes in {}'.format(len(rows), args.output))
+    batch = QRCodeBatch(
+        output=args.output,
+        ethereum_network_id=args.network_id,
+        callback_url=args.callback_url,
+        expiration=args.expiration,
+        image_format=args.format,
+        max_workers=args.workers)
+    counts = batch.run(rows)
+    print('Signed {signed}, skipped {skipped} already signed, {failed} failed'.format(**counts))
+    if counts['failed']:
+        print('See the manifest for the errors of the failed rows')
+
+
 def main():
     parser = argparse.ArgumentParser(
-        description='Create a signed Request and save it as a QR code in a PNG image.')
-    parser.add_argument('--payee', type=str, required=True,
+        description='Create a signed Request and save it as a QR code in a PNG image, or '
+                    'create signed Requests and QR codes for each row of a batch file.')
+    parser.add_argument('--payee', type=str,
                         help='Ethereum address which will receive the payment')
-    parser.add_argument('--amount', type=float, required=True,
+    parser.add_argument('--amount', type=float,
                         help='The payment amount in ETH')
-    parser.add_argument('--output-file', type=str, required=True,
+    parser.add_argument('--output-file', type=str,
                         help='Output filename')
-    parser.add_argument('--callback-url', type=str, required=True,
-                        help='Callback URL')
+    parser.add_argument('--callback-url', type=str,
+                        help='Callback URL. In batch mode, used for rows without one')
     parser.add_argument('--network-id', type=str, required=True,
                         help='Ethereum network ID, e.g. 1 for "main" or 4 for "rinkeby"')
     parser.add_argument('--expiration', type=int,
                         default=3600,
-                        help='The number of seconds after which this Request expires')
+                        help='The number of seconds after which this Request expires. In '
+                             'batch mode, used for rows without one')
+    batch_arguments = parser.add_argument_group(
+        'batch mode', 'Create a Request for each row of a CSV or JSON lines file with the '
+                      'columns {}. Run the same command again to resume an interrupted '
+                      'batch.'.format(', '.join(BATCH_FIELDS)))
+    batch_arguments.add_argument('--batch-file', type=str,
+                                 help='CSV (.csv) or JSON lines (.jsonl) file of Requests')
+    batch_arguments.add_argument('--output', type=str,
+                                 help='Directory or .zip file to write the QR codes and '
+                                      'manifest to')
+    batch_arguments.add_argument('--format', type=str, default='png',
+                                 choices=QR_CODE_FORMATS, help='QR code image format')
+    batch_arguments.add_argument('--workers', type=int,
+                                 help='Number of processes, defaults to the number of CPUs')
 
     args = parser.parse_args()
+    if args.batch_file:
+        if not args.output:
+            parser.error('--output is required with --batch-file')
+        return create_batch(args)
+    for argument in ('payee', 'amount', 'output_file', 'callback_url'):
+        if getattr(args, argument) is None:
+            parser.error('--{} is required'.format(argument.replace('_', '-')))
     if os.path.exists(args.output_file):
         raise Exception('{} already exists'.format(args.output_file))
     expiration_timestamp = int(time.time()) + (args.expiration if args.expiration else 3600)
@@ -42,7 +86,7 @@ def main():
     # Use format to get a string instead of a number in scientific notation
     amount_in_wei = format(args.amount * (10 ** 18), '.0f')
     payee = Payee(
-        id_address=Web3.toChecksumAddress(args.payee),
+        id_address=to_checksum_address(args.payee),
         amount=amount_in_wei,
         payment_address=None
     )
@@ -55,6 +99,8 @@ def main():
     print('Ethereum network name: ID: {}'.format(args.network_id))
     print('Callback URL: {}'.format(args.callback_url))
 
+    # Imported here so argument errors and --help do not wait for web3 to load
+    from request_network.api import RequestNetwork
     request_api = RequestNetwork()
     signed_request = request_api.create_signed_request(
         role=Roles.PAYEE,
@@ -0,0 +1,46 @@
+import argparse
+
+from request_network.export import (
+    DEFAULT_CHUNK_SIZE,
+    WRITERS,
+    RequestExporter,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Export Requests and payments from the Request core contract logs.')
+    parser.add_argument('--output-dir', type=str, required=True,
+                        help='Directory in which to write the export and its checkpoint')
+    parser.add_argument('--format', type=str, default='jsonl', choices=sorted(WRITERS),
+                        help='Output format')
+    parser.add_argument('--from-block', type=int,
+                        help='First block to export. Defaults to the core contract deployment')
+    parser.add_argument('--to-block', type=int,
+                        help='Last block to export. Defaults to the latest block')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help='Number of blocks to scan per getLogs call')
+
+    args = parser.parse_args()
+
+    exporter = RequestExporter(
+        output_directory=args.output_dir,
+        output_format=args.format,
+        chunk_size=args.chunk_size)
+    checkpoint = exporter.load_checkpoint()
+    if checkpoint:
+        if args.to_block is not None and args.to_block != checkpoint['to_block']:
+            parser.error('--to-block {} differs from the checkpoint\'s block {}, remove the '
+                         'checkpoint to start a new export'.format(
+                             args.to_block, checkpoint['to_block']))
+        print('Resuming export from block {} to block {}'.format(
+            checkpoint['next_block'], checkpoint['to_block']))
+
+    request_count, payment_count = exporter.export(
+        from_block=args.from_block, to_block=args.to_block)
+    print('Exported {} Requests and {} payments to {}'.format(
+        request_count, payment_count, args.output_dir))
+
+
+if __name__ == '__main__':
+    main()
@@ -11,8 +11,14 @@ from request_network.services.core import (
 class RequestERC20Service(RequestCoreService):
     token_address = None
 
-    def __init__(self, token_address):
-        super().__init__()
+    def __init__(self, token_address, web3=None, artifact_manager=None,
+                 transaction_pool=None, gas_estimates=None, gas_price_oracle=None):
+        super().__init__(
+            web3=web3,
+            artifact_manager=artifact_manager,
+            transaction_pool=transaction_pool,
+            gas_estimates=gas_estimates,
+            gas_price_oracle=gas_price_oracle)
         self.token_address = token_address
 
     def _get_currency_contract_artifact_name(self):
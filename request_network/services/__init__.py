@@ -1,3 +1,4 @@
 from .core import RequestCoreService  # noqa: F401
 from .ERC20 import RequestERC20Service  # noqa: F401
 from .ethereum import RequestEthereumService  # noqa: F401
+from .registry import ServiceRegistry, get_service_registry  # noqa: F401
@@ -1,18 +1,41 @@
-import time
+from collections import (
+    namedtuple,
+)
 
+from eth_abi.exceptions import (
+    EncodingError,
+)
 from eth_account.messages import (
     defunct_hash_message,
 )
 from web3 import Web3
+from web3.utils.empty import (
+    empty,
+)
 
+from request_network.addresses import (
+    to_checksum_address,
+)
 from request_network.artifact_manager import (
     ArtifactManager,
 )
+from request_network.cache import (
+    get_call_cache,
+)
 from request_network.constants import (
     EMPTY_BYTES_20,
 )
-from request_network.exceptions import (
-    InvalidRequestParameters,
+from request_network.encoders import (
+    ContractEncoder,
+)
+from request_network.gas import (
+    GasKey,
+)
+from request_network.instrumentation import (
+    span,
+)
+from request_network.providers import (
+    get_default_web3,
 )
 from request_network.signers import (
     private_key_environment_variable_signer,
@@ -25,6 +48,15 @@ from request_network.utils import (
     hash_request,
     store_ipfs_data,
 )
+from request_network.validation import (
+    validate_request_parameters,
+)
+
+# The transaction creating a Request, less its IPFS hash and fee. `fee_amount` is
+# the amount passed to `collectEstimation` to calculate the fee.
+RequestCreation = namedtuple('RequestCreation', [
+    'function_name', 'from_address', 'fee_amount', 'arguments',
+])
 
 
 class RequestCoreService(object):
@@ -33,81 +65,231 @@ class RequestCoreService(object):
         This class should not be used directly - instead, use a child class such as
         `RequestEthereumService` or `RequestERC20Service`.
     """
+    web3 = None
+    artifact_manager = None
+    # If False, always build contract calls with web3's `ContractFunction`
+    use_precompiled_encoders = True
+    transaction_pool = None
+    gas_estimates = None
+    gas_price_oracle = None
+
+    def __init__(self, web3=None, artifact_manager=None, transaction_pool=None,
+                 gas_estimates=None, gas_price_oracle=None):
+        """
+        :param web3: The `Web3` instance used to send transactions. Defaults to
+            the automatically detected provider.
+        :param artifact_manager: The `ArtifactManager` used to look up the currency
+            contract. Defaults to one using `web3` and the environment's network.
+        :param transaction_pool: Optional `transactions.LocalSigningPool`. If given,
+            transactions are signed locally and sent with `eth_sendRawTransaction`
+            instead of being signed by the node.
+        :param gas_estimates: Optional `gas.GasEstimateCache`. If given, transactions
+            are sent with a gas limit learned from previous transactions, instead of
+            being estimated by the node each time. A transaction which runs out of that
+            gas limit is not retried: it must be resubmitted by the caller, see
+            `confirmations.Confirmation.out_of_gas`.
+        :param gas_price_oracle: Optional `gas.GasPriceOracle` supplying the gas price of
+            transactions, instead of the node's default
+        """
+        self.web3 = web3 if web3 else get_default_web3()
+        self.transaction_pool = transaction_pool
+        self.gas_estimates = gas_estimates
+        self.gas_price_oracle = gas_price_oracle
+        self.artifact_manager = artifact_manager if artifact_manager else \
+            ArtifactManager(web3=self.web3)
+        self._currency_contract_data = None
+        self._currency_contract_encoder = None
+
+    @property
+    def currency_contract_data(self):
+        """ The contract data for this service's currency contract, looked up on first use.
+        """
+        if self._currency_contract_data is None:
+            self._currency_contract_data = self.artifact_manager.get_contract_data(
+                self._get_currency_contract_artifact_name())
+        return self._currency_contract_data
+
+    @property
+    def currency_contract_encoder(self):
+        """ Precompiled encoders for this service's currency contract functions.
+        """
+        if self._currency_contract_encoder is None:
+            self._currency_contract_encoder = ContractEncoder(
+                self.web3,
+                self.currency_contract_data['address'],
+                self.currency_contract_data['abi'])
+        return self._currency_contract_encoder
 
     def _get_currency_contract_data(self):
         """ Return the currency contract for the given currency. `artifact_name` could
             be `last-RequestEthereum`, or `last-requesterc20-{token_address}`.
         """
-        artifact_name = self._get_currency_contract_artifact_name()
-        artifact_manager = ArtifactManager()
-        contract_data = artifact_manager.get_contract_data(artifact_name)
-        return contract_data
+        return self.currency_contract_data
 
     def _get_currency_contract_artifact_name(self):
         """ Return the artifact name used when looking up the currency contract.
         """
         raise NotImplementedError()
 
+    def _call(self, contract_function, block_identifier=None):
+        """ Call a contract function through the call cache for this service's `Web3`.
+        """
+        return get_call_cache(self.web3).call(contract_function, block_identifier)
+
+    def _get_currency_contract_function(self, function_name, **kwargs):
+        return getattr(self.currency_contract_data['instance'].functions, function_name)(
+            **kwargs)
+
+    def _call_currency_contract(self, function_name, **kwargs):
+        """ Call a currency contract function through the call cache, encoding the
+            arguments with the precompiled encoder if possible.
+        """
+        contract_function = None
+        if self.use_precompiled_encoders:
+            try:
+                contract_function = self.currency_contract_encoder.prepare_call(
+                    function_name, **kwargs)
+            except EncodingError:
+                pass
+        if contract_function is None:
+            contract_function = self._get_currency_contract_function(function_name, **kwargs)
+        return self._call(contract_function)
+
+    def _build_currency_contract_transaction(self, function_name, transaction_options,
+                                             **kwargs):
+        """ Return the transaction calling a currency contract function. This is the
+            same transaction `ContractFunction.transact` would send.
+        """
+        transaction = None
+        if self.use_precompiled_encoders:
+            try:
+                transaction = self.currency_contract_encoder.build_transaction(
+                    function_name, transaction_options, **kwargs)
+            except EncodingError:
+                pass
+        if transaction is None:
+            contract_function = self._get_currency_contract_function(function_name, **kwargs)
+            transaction = dict(transaction_options)
+            if self.web3.eth.defaultAccount is not empty:
+                transaction.setdefault('from', self.web3.eth.defaultAccount)
+            transaction['to'] = contract_function.address
+            transaction['data'] = contract_function._encode_transaction_data()
+
+        if self.gas_price_oracle is not None and 'gasPrice' not in transaction:
+            self.gas_price_oracle.fill_gas_price(transaction)
+        if self.gas_estimates is not None and 'gas' not in transaction:
+            self.gas_estimates.fill_gas(transaction, self._get_gas_key(function_name, kwargs))
+        return transaction
+
+    def _get_gas_key(self, function_name, kwargs):
+        """ Return the `GasKey` for a transaction calling `function_name` with `kwargs`.
+        """
+        payees = kwargs.get('_payeesIdAddress', kwargs.get('_payeesPaymentAddress', []))
+        return GasKey(
+            contract_address=self.currency_contract_data['address'],
+            function_name=function_name,
+            payee_count=len(payees),
+            has_data=bool(kwargs.get('_data')))
+
+    def _transact_currency_contract(self, function_name, transaction_options, **kwargs):
+        """ Send a transaction calling a currency contract function, and return its hash.
+        """
+        return self.send_transaction(self._build_currency_contract_transaction(
+            function_name, transaction_options, **kwargs))
+
+    def send_transaction(self, transaction):
+        """ Send `transaction` and return its hash. If the service has a transaction pool
+            the transaction is signed locally, otherwise it is sent with
+            `eth_sendTransaction` for the node to sign.
+        """
+        if self.transaction_pool:
+            transaction_hash = self.transaction_pool.send(transaction)
+        else:
+            transaction_hash = Web3.toHex(self.web3.eth.sendTransaction(transaction))
+        if self.gas_estimates is not None:
+            self.gas_estimates.record_transaction(transaction_hash, transaction)
+        return transaction_hash
+
     def broadcast_signed_request_as_payer(self, signed_request, payer_address,
                                           creation_payments=None, additional_payments=None):
         raise NotImplementedError()
 
-    def create_request_as_payee(self, id_addresses, amounts,
-                                payment_addresses, payer_refund_address, payer_id_address,
-                                data):
-        # validate request args
+    def prepare_request_as_payee(self, id_addresses, amounts, payment_addresses,
+                                 payer_refund_address, payer_id_address):
+        """ Validate the parameters of a Request created by the payee, and return the
+            `RequestCreation` describing its transaction.
+        """
+        validate_request_parameters(id_addresses, amounts, payment_addresses)
         payment_addresses = [
-            Web3.toChecksumAddress(a) if a else EMPTY_BYTES_20 for a in payment_addresses
+            to_checksum_address(a) if a else EMPTY_BYTES_20 for a in payment_addresses
         ]
-        # call collectEstimation on the currency contract
-
-        ipfs_hash = store_ipfs_data(data) if data else ''
-
-        # TODO better validation, more DRY
-        # Validate Request parameters
-        if len(id_addresses) != len(amounts):
-            raise InvalidRequestParameters(
-                'payees and amounts must be the same size'
-            )
-
-        if payment_addresses and len(id_addresses) < len(payment_addresses):
-            raise InvalidRequestParameters(
-                'payees can not be larger than payee_payment_addresses'
-            )
+        return RequestCreation(
+            function_name='createRequestAsPayee',
+            from_address=id_addresses[0],
+            fee_amount=sum(a for a in amounts),
+            arguments={
+                '_payeesIdAddress': id_addresses,
+                '_payeesPaymentAddress': payment_addresses,
+                '_expectedAmounts': amounts,
+                '_payer': payer_id_address,
+                '_payerRefundAddress': payer_refund_address,
+            })
+
+    def prepare_request_as_payer(self, id_addresses, amounts, payment_addresses,
+                                 payer_refund_address, payer_id_address,
+                                 creation_payments=None, additional_payments=None):
+        """ Validate the parameters of a Request created by the payer, and return the
+            `RequestCreation` describing its transaction.
+        """
+        validate_request_parameters(
+            id_addresses, amounts, payment_addresses, creation_payments, additional_payments)
+        payment_addresses = [
+            to_checksum_address(a) if a else EMPTY_BYTES_20 for a in payment_addresses
+        ]
+        creation_payments = creation_payments if creation_payments else []
+        additional_payments = additional_payments if additional_payments else []
+        return RequestCreation(
+            function_name='createRequestAsPayer',
+            from_address=payer_id_address,
+            fee_amount=sum(a for a in creation_payments),
+            arguments={
+                '_payeesIdAddress': id_addresses,
+                '_expectedAmounts': amounts,
+                '_payerRefundAddress': payer_refund_address,
+                '_payeeAmounts': creation_payments,
+                '_additionals': additional_payments,
+            })
+
+    def estimate_fee(self, amount):
+        """ Return the fee charged by the currency contract for a Request of `amount`.
+        """
+        return self._call_currency_contract('collectEstimation', _expectedAmount=amount)
 
-        for amount in amounts:
-            if int(amount) < 0:
-                raise InvalidRequestParameters(
-                    'amounts must be positive integers'
-                )
+    def build_request_transaction(self, creation, ipfs_hash, fee):
+        """ Return the transaction which creates the Request described by `creation`.
 
-        for address in id_addresses + payment_addresses:
-            if not Web3.isAddress(address):
-                raise InvalidRequestParameters(
-                    '{} is not a valid Ethereum address'.format(address)
-                )
+        :type creation: RequestCreation
+        :param ipfs_hash: IPFS hash of the Request's data, or an empty string
+        :param fee: The fee returned by `estimate_fee`, sent as the transaction value
+        """
+        return self._build_currency_contract_transaction(
+            creation.function_name,
+            {'from': creation.from_address, 'value': fee},
+            _data=ipfs_hash,
+            **creation.arguments)
 
+    def _create_request(self, creation, data):
+        ipfs_hash = store_ipfs_data(data) if data else ''
         # call fee estimator, set as value for tx
-        currency_contract_data = self._get_currency_contract_data()
-        currency_contract = currency_contract_data['instance']
-        estimated_value = currency_contract.functions.collectEstimation(
-            _expectedAmount=sum(a for a in amounts)
-        ).call()
-
-        transaction_options = {
-            'from': id_addresses[0],
-            'value': estimated_value
-        }
-
-        tx_hash = currency_contract.functions.createRequestAsPayee(
-            _payeesIdAddress=id_addresses,
-            _payeesPaymentAddress=payment_addresses,
-            _expectedAmounts=amounts,
-            _payer=payer_id_address,
-            _payerRefundAddress=payer_refund_address,
-            _data=ipfs_hash
-        ).transact(transaction_options)
-        return Web3.toHex(tx_hash)
+        fee = self.estimate_fee(creation.fee_amount)
+        return self.send_transaction(self.build_request_transaction(creation, ipfs_hash, fee))
+
+    def create_request_as_payee(self, id_addresses, amounts,
+                                payment_addresses, payer_refund_address, payer_id_address,
+                                data):
+        creation = self.prepare_request_as_payee(
+            id_addresses, amounts, payment_addresses, payer_refund_address, payer_id_address)
+        return self._create_request(creation, data)
 
     def create_request_as_payer(self, id_addresses, amounts,
                                 payment_addresses, payer_refund_address, payer_id_address,
@@ -125,75 +307,10 @@ class RequestCoreService(object):
         :param options:
         :return:
         """
-        payment_addresses = [
-            Web3.toChecksumAddress(a) if a else EMPTY_BYTES_20 for a in payment_addresses
-        ]
-        creation_payments = creation_payments if creation_payments else []
-        additional_payments = additional_payments if additional_payments else []
-
-        ipfs_hash = store_ipfs_data(data) if data else ''
-
-        # TODO better validation, more DRY
-        # Validate Request parameters
-        if len(id_addresses) != len(amounts):
-            raise InvalidRequestParameters(
-                'payees and amounts must be the same size'
-            )
-
-        if payment_addresses and len(id_addresses) < len(payment_addresses):
-            raise InvalidRequestParameters(
-                'payees can not be larger than payee_payment_addresses'
-            )
-
-        if creation_payments and len(id_addresses) < len(creation_payments):
-            raise InvalidRequestParameters(
-                'payees can not be larger than creation_payments'
-            )
-
-        if additional_payments and len(id_addresses) < len(additional_payments):
-            raise InvalidRequestParameters(
-                'payees can not be larger than additional_payments'
-            )
-
-        for amount in amounts:
-            if int(amount) < 0:
-                raise InvalidRequestParameters(
-                    'amounts must be positive integers'
-                )
-
-        for amount in creation_payments:
-            if int(amount) < 0:
-                raise InvalidRequestParameters(
-                    'amounts must be positive integers'
-                )
-
-        for address in id_addresses + payment_addresses:
-            if not Web3.isAddress(address):
-                raise InvalidRequestParameters(
-                    '{} is not a valid Ethereum address'.format(address)
-                )
-
-        # call fee estimator, set as value for tx
-        currency_contract_data = self._get_currency_contract_data()
-        currency_contract = currency_contract_data['instance']
-        estimated_value = currency_contract.functions.collectEstimation(
-            _expectedAmount=sum(a for a in creation_payments)
-        ).call()
-
-        transaction_options = {
-            'from': payer_id_address,
-            'value': estimated_value
-        }
-
-        tx_hash = currency_contract.functions.createRequestAsPayer(
-            _payeesIdAddress=id_addresses,
-            _expectedAmounts=amounts,
-            _payerRefundAddress=payer_refund_address,
-            _payeeAmounts=creation_payments,
-            _additionals=additional_payments,
-            _data=ipfs_hash
-        ).transact(transaction_options)
-        return Web3.toHex(tx_hash)
+        creation = self.prepare_request_as_payer(
+            id_addresses, amounts, payment_addresses, payer_refund_address, payer_id_address,
+            creation_payments, additional_payments)
+        return self._create_request(creation, data)
 
     def create_signed_request(self, currency_contract_address, id_addresses, amounts,
                               payment_addresses, expiration_date,
@@ -213,27 +330,31 @@ class RequestCoreService(object):
         :return:
         """
         # If we have data, store it on IPFS
-        ipfs_hash = store_ipfs_data(data) if data else ''
-
-        request_hash = hash_request(
-            currency_contract_address=currency_contract_address,
-            id_addresses=id_addresses,
-            amounts=amounts,
-            payer=None,
-            expiration_date=expiration_date,
-            payment_addresses=payment_addresses,
-            ipfs_hash=ipfs_hash)
+        with span('create_signed_request', 'ipfs'):
+            ipfs_hash = store_ipfs_data(data) if data else ''
+
+        with span('create_signed_request', 'hashing'):
+            request_hash = hash_request(
+                currency_contract_address=currency_contract_address,
+                id_addresses=id_addresses,
+                amounts=amounts,
+                payer=None,
+                expiration_date=expiration_date,
+                payment_addresses=payment_addresses,
+                ipfs_hash=ipfs_hash)
+
+            # `defunct_hash_message` is used to maintain compatibility with `web3Single.sign()`
+            message_hash = defunct_hash_message(hexstr=request_hash)
 
-        # `defunct_hash_message` is used to maintain compatibility with `web3Single.sign()`
-        message_hash = defunct_hash_message(hexstr=request_hash)
         # TODO make signing strategy configurable
         # TODO signer should accept an optional dict describing the Request attributes so
         # it can perform enforce controls (rate-limiting, max Request amount, etc.)
         signer_function = private_key_environment_variable_signer
-        signed_message = signer_function(
-            message_hash=message_hash,
-            address=id_addresses[0]
-        )
+        with span('create_signed_request', 'signing'):
+            signed_message = signer_function(
+                message_hash=message_hash,
+                address=id_addresses[0]
+            )
 
         # Combine id_addresses/payment_addresses/amounts into a list of Payees
         payees = []
@@ -268,44 +389,17 @@ class RequestCoreService(object):
         :param data:
         :return:
         """
-        # Iterate through payee addresses - if a None value is given for any address,
-        # replace it with the 0x0 address (padded to 20 bytes).
+        validate_request_parameters(
+            id_addresses, amounts, payment_addresses, expiration_date=expiration_date)
+        # If a None value is given for any payment address, replace it with the 0x0
+        # address (padded to 20 bytes).
         parsed_payee_payment_addresses = [
-            Web3.toChecksumAddress(a) if a else EMPTY_BYTES_20 for a in payment_addresses
+            to_checksum_address(a) if a else EMPTY_BYTES_20 for a in payment_addresses
         ]
-
         id_addresses = [
-            Web3.toChecksumAddress(a) for a in id_addresses
+            to_checksum_address(a) for a in id_addresses
         ]
 
-        # Validate Request parameters
-        if len(id_addresses) != len(amounts):
-            raise InvalidRequestParameters(
-                'payees and amounts must be the same size'
-            )
-
-        if payment_addresses and len(id_addresses) < len(payment_addresses):
-            raise InvalidRequestParameters(
-                'payees can not be larger than payee_payment_addresses'
-            )
-
-        if int(expiration_date) <= int(time.time()):
-            raise InvalidRequestParameters(
-                'expiration_date must be in the future'
-            )
-
-        for amount in amounts:
-            if int(amount) < 0:
-                raise InvalidRequestParameters(
-                    'amounts must be positive integers'
-                )
-
-        for address in id_addresses:
-            if not Web3.isAddress(address):
-                raise InvalidRequestParameters(
-                    '{} is not a valid Ethereum address'.format(address)
-                )
-
         currency_contract_data = self._get_currency_contract_data()
         return self.create_signed_request(
             currency_contract_address=currency_contract_data['address'],
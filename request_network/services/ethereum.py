@@ -1,5 +1,11 @@
 from web3 import Web3
 
+from request_network.gas import (
+    GasKey,
+)
+from request_network.instrumentation import (
+    span,
+)
 from request_network.services.core import (
     RequestCoreService,
 )
@@ -13,6 +19,19 @@ class RequestEthereumService(RequestCoreService):
     def _get_currency_contract_artifact_name(self):
         return 'last-RequestEthereum'
 
+    def _get_gas_key(self, function_name, kwargs):
+        if function_name != 'broadcastSignedRequestAsPayer':
+            return super()._get_gas_key(function_name, kwargs)
+        # The payee count follows the creator and payer addresses in the Request's bytes,
+        # and the data size follows each payee's address and amount
+        request_data = kwargs['_requestData']
+        payee_count = request_data[40]
+        return GasKey(
+            contract_address=self.currency_contract_data['address'],
+            function_name=function_name,
+            payee_count=payee_count,
+            has_data=request_data[41 + 52 * payee_count] > 0)
+
     def broadcast_signed_request_as_payer(self, signed_request, payer_address,
                                           creation_payments=None, additional_payments=None):
         """
@@ -32,31 +51,33 @@ class RequestEthereumService(RequestCoreService):
         creation_payments = creation_payments if creation_payments else empty_payments
         additional_payments = additional_payments if additional_payments else empty_payments
 
-        currency_contract_data = self._get_currency_contract_data()
-        currency_contract = currency_contract_data['instance']
-        estimated_value = currency_contract.functions.collectEstimation(
-            _expectedAmount=sum(a for a in signed_request.amounts)
-        ).call()
+        with span('broadcast_signed_request', 'collect_estimation'):
+            estimated_value = self._call_currency_contract(
+                'collectEstimation',
+                _expectedAmount=sum(a for a in signed_request.amounts)
+            )
 
         transaction_options = {
             # TODO should the value also include additionals?
             'from': payer_address,
             'value': estimated_value + sum(creation_payments),
         }
-        request_bytes = get_request_bytes_representation(
-            payee_id_addresses=signed_request.id_addresses,
-            amounts=signed_request.amounts,
-            payer=None,
-            ipfs_hash=signed_request.ipfs_hash
-        )
-
-        tx_hash = currency_contract.functions.broadcastSignedRequestAsPayer(
-            _requestData=Web3.toBytes(hexstr=request_bytes),
-            _payeesPaymentAddress=signed_request.payment_addresses,
-            _payeeAmounts=creation_payments,
-            _additionals=additional_payments,
-            _expirationDate=signed_request.expiration_date,
-            _signature=Web3.toBytes(hexstr=signed_request.signature)
-        ).transact(transaction_options)
-
-        return Web3.toHex(tx_hash)
+        with span('broadcast_signed_request', 'encoding'):
+            request_bytes = get_request_bytes_representation(
+                payee_id_addresses=signed_request.id_addresses,
+                amounts=signed_request.amounts,
+                payer=None,
+                ipfs_hash=signed_request.ipfs_hash
+            )
+
+        with span('broadcast_signed_request', 'transaction'):
+            return self._transact_currency_contract(
+                'broadcastSignedRequestAsPayer',
+                transaction_options,
+                _requestData=Web3.toBytes(hexstr=request_bytes),
+                _payeesPaymentAddress=signed_request.payment_addresses,
+                _payeeAmounts=creation_payments,
+                _additionals=additional_payments,
+                _expirationDate=signed_request.expiration_date,
+                _signature=Web3.toBytes(hexstr=signed_request.signature)
+            )
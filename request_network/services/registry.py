@@ -0,0 +1,149 @@
+import threading
+from weakref import (
+    WeakKeyDictionary,
+)
+
+from request_network.addresses import (
+    to_checksum_address,
+)
+from request_network.artifact_manager import (
+    ArtifactManager,
+)
+from request_network.currencies import (
+    ERC20Currency,
+    get_currency_registry,
+)
+from request_network.exceptions import (
+    ArtifactNotFound,
+    UnsupportedCurrency,
+)
+from request_network.services.ERC20 import (
+    RequestERC20Service,
+)
+from request_network.services.ethereum import (
+    RequestEthereumService,
+)
+
+
+class ServiceRegistry(object):
+    """ Long-lived Request services for one `Web3` instance and network.
+
+        Services are indexed by currency and by the address of their currency contract,
+        and each service's currency contract instance is built when it is registered.
+        By default the registry is populated from the network's `CurrencyRegistry`, which
+        covers Ether and every RequestERC20 contract listed in `artifacts.json`. Other
+        currencies are registered when first requested.
+    """
+
+    def __init__(self, web3=None, artifact_manager=None, currencies=None,
+                 transaction_pool=None, gas_estimates=None, gas_price_oracle=None):
+        """
+        :param web3: The `Web3` instance used by the services
+        :param artifact_manager: The `ArtifactManager` used to look up currency contracts.
+            Defaults to one using `web3` and the environment's network.
+        :param currencies: Currencies to register, defaults to the currency registry for
+            the artifact manager's network
+        :param transaction_pool: Optional `transactions.LocalSigningPool` used by the
+            services to sign transactions locally
+        :param gas_estimates: Optional `gas.GasEstimateCache` used by the services
+        :param gas_price_oracle: Optional `gas.GasPriceOracle` used by the services
+        """
+        self.artifact_manager = artifact_manager if artifact_manager else \
+            ArtifactManager(web3=web3)
+        self.web3 = self.artifact_manager.web3
+        self.transaction_pool = transaction_pool
+        self.gas_estimates = gas_estimates
+        self.gas_price_oracle = gas_price_oracle
+        # (symbol, token address) -> service
+        self._services_by_currency = {}
+        # checksum currency contract address -> service
+        self._services_by_address = {}
+        self._lock = threading.Lock()
+
+        if currencies is None:
+            currencies = get_currency_registry(self.artifact_manager)
+        for currency in currencies:
+            self._try_register(self._create_service(currency), currency)
+
+    @staticmethod
+    def _get_currency_key(currency):
+        token_address = getattr(currency, 'token_address', None)
+        return currency.symbol, token_address.lower() if token_address else None
+
+    def _create_service(self, currency):
+        if isinstance(currency, ERC20Currency):
+            return RequestERC20Service(
+                token_address=currency.token_address,
+                web3=self.web3,
+                artifact_manager=self.artifact_manager,
+                transaction_pool=self.transaction_pool,
+                gas_estimates=self.gas_estimates,
+                gas_price_oracle=self.gas_price_oracle)
+        elif currency.symbol == 'ETH':
+            return RequestEthereumService(
+                web3=self.web3,
+                artifact_manager=self.artifact_manager,
+                transaction_pool=self.transaction_pool,
+                gas_estimates=self.gas_estimates,
+                gas_price_oracle=self.gas_price_oracle)
+        elif currency.symbol == 'BTC':
+            raise NotImplementedError()
+        else:
+            raise UnsupportedCurrency('{} is not a supported currency'.format(currency.name))
+
+    def _register(self, service, currency=None):
+        """ Index `service` by its currency contract address, and by `currency` if given.
+            If a service is already registered for the address it is kept, so every
+            lookup returns the same instance.
+        """
+        address = service.currency_contract_data['address']
+        with self._lock:
+            service = self._services_by_address.setdefault(address, service)
+            if currency is not None:
+                service = self._services_by_currency.setdefault(
+                    self._get_currency_key(currency), service)
+        return service
+
+    def _try_register(self, service, currency=None):
+        try:
+            return self._register(service, currency)
+        except ArtifactNotFound:
+            return None
+
+    def get_service(self, currency):
+        """ Return the service for `currency`, registering it on first use.
+
+        :type currency: request_network.currencies.Currency
+        :rtype: request_network.services.RequestCoreService
+        """
+        try:
+            return self._services_by_currency[self._get_currency_key(currency)]
+        except KeyError:
+            return self._register(self._create_service(currency), currency)
+
+    def get_service_by_address(self, currency_contract_address):
+        """ Return the service for the currency contract at `currency_contract_address`.
+
+        :rtype: request_network.services.RequestCoreService
+        """
+        try:
+            return self._services_by_address[to_checksum_address(currency_contract_address)]
+        except (KeyError, ValueError):
+            raise ArtifactNotFound(
+                'Could not find a currency contract at "{}" on {} network'.format(
+                    currency_contract_address, self.artifact_manager.ethereum_network))
+
+
+_registries = WeakKeyDictionary()
+_registries_lock = threading.Lock()
+
+
+def get_service_registry(web3):
+    """ Return the ServiceRegistry for the given `Web3` instance, creating it if necessary.
+    """
+    with _registries_lock:
+        try:
+            return _registries[web3]
+        except KeyError:
+            registry = _registries[web3] = ServiceRegistry(web3=web3)
+            return registry
@@ -1,14 +1,56 @@
 import os
+import threading
 
-from web3.auto import (
-    w3,
+from eth_keys import (
+    keys,
+)
+from hexbytes import (
+    HexBytes,
+)
+from web3.utils.datastructures import (
+    AttributeDict,
 )
 
+# private key -> eth_keys PrivateKey, so each key is only parsed once per process
+_signing_keys = {}
+_signing_keys_lock = threading.Lock()
 
-def private_key_environment_variable_signer(message_hash, address):
-    """ Sign a message hash using a private key stored in an environment variable.
+
+def get_environment_private_key(address):
+    """ Return the private key for `address` stored in an environment variable.
     """
     # TODO raise ImproperlyConfigured exception if key not set
+    return os.environ['REQUEST_NETWORK_PRIVATE_KEY_{}'.format(address)]
+
+
+def get_environment_signing_key(address):
+    """ Return the parsed private key for `address` stored in an environment variable.
 
-    private_key = os.environ['REQUEST_NETWORK_PRIVATE_KEY_{}'.format(address)]
-    return w3.eth.account.signHash(message_hash, private_key)
+        Parsed keys are cached by value, so changing the environment variable takes
+        effect immediately.
+    """
+    private_key = get_environment_private_key(address)
+    with _signing_keys_lock:
+        try:
+            return _signing_keys[private_key]
+        except KeyError:
+            pass
+    signing_key = keys.PrivateKey(HexBytes(private_key))
+    with _signing_keys_lock:
+        return _signing_keys.setdefault(private_key, signing_key)
+
+
+def private_key_environment_variable_signer(message_hash, address):
+    """ Sign a message hash using a private key stored in an environment variable.
+
+        Returns the same result as `web3.eth.account.signHash`.
+    """
+    message_hash = HexBytes(message_hash)
+    v, r, s = get_environment_signing_key(address).sign_msg_hash(message_hash).vrs
+    return AttributeDict({
+        'messageHash': message_hash,
+        'r': r,
+        's': s,
+        'v': v + 27,
+        'signature': HexBytes(r.to_bytes(32, 'big') + s.to_bytes(32, 'big') + bytes([v + 27])),
+    })
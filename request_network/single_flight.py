@@ -0,0 +1,89 @@
+""" Coalescing of concurrent identical calls, so only one of them does the work.
+"""
+from concurrent.futures import (
+    Future,
+)
+import threading
+
+
+class SingleFlight(object):
+    """ Runs at most one call per key at a time. Callers asking for a key which is
+        already in flight wait for that call and share its result or exception, instead
+        of repeating it.
+
+        Results are not cached: once a call has finished, the next call for its key runs
+        again. Callers which shared a call receive the same object, which should be
+        treated as read-only.
+
+        Threads use `call`, and asyncio tasks `call_async`, which runs the function in the
+        event loop's default executor. Both share the same in-flight calls.
+    """
+
+    def __init__(self):
+        # Number of calls made, and how many of them waited for a call already in flight
+        self.calls = 0
+        self.coalesced = 0
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def _join(self, key):
+        """ Return the `Future` for `key`, and whether the caller must run the call.
+        """
+        with self._lock:
+            self.calls += 1
+            try:
+                future = self._in_flight[key]
+            except KeyError:
+                future = self._in_flight[key] = Future()
+                return future, True
+            self.coalesced += 1
+            return future, False
+
+    def _run(self, key, future, function, args, kwargs):
+        try:
+            result = function(*args, **kwargs)
+        # Some of the library's exceptions (e.g. `RequestNotFound`) derive from
+        # BaseException, and must be passed to the waiting callers too
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+        else:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_result(result)
+
+    def call(self, key, function, *args, **kwargs):
+        """ Return `function(*args, **kwargs)`, sharing the call with any concurrent
+            callers using the same `key`.
+        """
+        future, leader = self._join(key)
+        if leader:
+            self._run(key, future, function, args, kwargs)
+        return future.result()
+
+    async def call_async(self, key, function, *args, **kwargs):
+        """ Coroutine version of `call`, which waits without blocking the event loop.
+        """
+        import asyncio
+
+        future, leader = self._join(key)
+        if leader:
+            asyncio.get_event_loop().run_in_executor(
+                None, self._run, key, future, function, args, kwargs)
+        return await asyncio.wrap_future(future)
+
+    @property
+    def in_flight_count(self):
+        with self._lock:
+            return len(self._in_flight)
+
+    def stats(self):
+        """ Return a dict of counters describing how many calls were coalesced.
+        """
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._in_flight),
+            }
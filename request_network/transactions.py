@@ -0,0 +1,173 @@
+""" Local transaction signing, as an alternative to having the node sign transactions
+    for an unlocked account.
+"""
+from concurrent.futures import (
+    ThreadPoolExecutor,
+)
+import threading
+
+from request_network.addresses import (
+    to_checksum_address,
+)
+from request_network.providers import (
+    get_default_web3,
+)
+from request_network.signers import (
+    get_environment_private_key,
+)
+
+
+class LocalSigningPool(object):
+    """ Signs transactions locally and submits them with `eth_sendRawTransaction`.
+
+        Transactions pass through two stages:
+
+        - signing: missing gas and gas price are filled in and the transaction is signed,
+          on a pool of `max_workers` threads
+        - submission: signed transactions are sent to the node by a single thread, in the
+          order they were given to the pool, so the node never sees a gap in an account's
+          nonces
+
+        Nonces are assigned from a local counter per account, initialised from the
+        account's pending transaction count, so a transaction can be signed before the
+        previous one has been submitted. At most `max_in_flight` transactions may be
+        signed or waiting to be submitted, after which `submit` blocks.
+
+        Private keys are looked up with `get_private_key(address)`, which defaults to
+        reading the same `REQUEST_NETWORK_PRIVATE_KEY_{address}` environment variables as
+        `signers.private_key_environment_variable_signer`.
+    """
+
+    def __init__(self, web3=None, max_workers=4, max_in_flight=16, get_private_key=None):
+        self.web3 = web3 if web3 else get_default_web3()
+        self.get_private_key = get_private_key if get_private_key else \
+            get_environment_private_key
+        self._sign_executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._submit_executor = ThreadPoolExecutor(max_workers=1)
+        self._in_flight = threading.BoundedSemaphore(max_in_flight)
+        self._lock = threading.Lock()
+        # checksum address -> next nonce
+        self._nonces = {}
+        self._pending = set()
+        self._errors = []
+
+    def _get_nonce(self, address):
+        """ Return the next nonce for `address`. Must be called with the lock held.
+        """
+        try:
+            nonce = self._nonces[address]
+        except KeyError:
+            nonce = self.web3.eth.getTransactionCount(address, 'pending')
+        self._nonces[address] = nonce + 1
+        return nonce
+
+    def _sign(self, transaction):
+        from web3.utils.transactions import fill_transaction_defaults
+
+        # The nonce is left out while estimating gas, as it may be ahead of the
+        # account's pending transaction count
+        nonce = transaction.pop('nonce')
+        transaction = dict(fill_transaction_defaults(self.web3, transaction))
+        transaction['nonce'] = nonce
+        private_key = self.get_private_key(transaction.pop('from'))
+        return self.web3.eth.account.signTransaction(transaction, private_key)
+
+    def _send(self, address, sign_future, report_errors):
+        """ Send the transaction signed by `sign_future`.
+
+        :param report_errors: If True, an error sending the signed transaction is kept
+            and raised by the next `send` or `flush`, because the caller does not wait
+            for this future. Signing errors are always raised by the sign future.
+        """
+        try:
+            signed_transaction = sign_future.result()
+            try:
+                return self.web3.toHex(
+                    self.web3.eth.sendRawTransaction(signed_transaction.rawTransaction))
+            except Exception as e:
+                if report_errors:
+                    with self._lock:
+                        self._errors.append(e)
+                raise
+        except Exception:
+            with self._lock:
+                # Later nonces are no longer valid, so fetch the count again next time
+                self._nonces.pop(address, None)
+            raise
+        finally:
+            self._in_flight.release()
+
+    def _submit(self, transaction, report_errors=False):
+        transaction = dict(transaction)
+        address = to_checksum_address(transaction['from'])
+        transaction['from'] = address
+        self._in_flight.acquire()
+        try:
+            with self._lock:
+                if 'nonce' not in transaction:
+                    transaction['nonce'] = self._get_nonce(address)
+                sign_future = self._sign_executor.submit(self._sign, transaction)
+                send_future = self._submit_executor.submit(
+                    self._send, address, sign_future, report_errors)
+                self._pending.add(send_future)
+        except BaseException:
+            self._in_flight.release()
+            raise
+        send_future.add_done_callback(self._discard)
+        return sign_future, send_future
+
+    def submit(self, transaction):
+        """ Sign and send `transaction`, which must have a `from` address.
+
+        :return: A `Future` whose result is the transaction hash returned by the node
+        """
+        return self._submit(transaction)[1]
+
+    def _discard(self, future):
+        with self._lock:
+            self._pending.discard(future)
+
+    def send(self, transaction):
+        """ Sign `transaction` and return its hash without waiting for the node to accept
+            it. Signing errors are raised immediately. Errors from the node accepting
+            earlier transactions given to `send` are raised here, or from `flush`.
+        """
+        self._raise_errors()
+        sign_future, _ = self._submit(transaction, report_errors=True)
+        return self.web3.toHex(sign_future.result().hash)
+
+    def flush(self):
+        """ Wait until every transaction has been sent to the node, then raise the first
+            error from a transaction given to `send` which has not been raised yet, if
+            any. Errors of transactions given to `submit` are raised by their futures.
+        """
+        with self._lock:
+            pending = list(self._pending)
+        for future in pending:
+            try:
+                future.result()
+            except Exception:
+                pass
+        self._raise_errors()
+
+    def _raise_errors(self):
+        with self._lock:
+            errors, self._errors = self._errors, []
+        if errors:
+            raise errors[0]
+
+    def close(self):
+        """ Send any pending transactions and stop the worker threads.
+        """
+        try:
+            self.flush()
+        finally:
+            self._sign_executor.shutdown()
+            self._submit_executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
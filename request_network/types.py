@@ -1,17 +1,17 @@
 from base64 import (
     b64encode,
 )
+from binascii import (
+    b2a_base64,
+)
 from enum import (
     IntEnum,
 )
 import json
-from tempfile import (
-    TemporaryFile,
-)
-
-import pyqrcode as pyqrcode
-from web3 import Web3
 
+from request_network.addresses import (
+    to_checksum_address,
+)
 from request_network.constants import (
     EMPTY_BYTES_20,
     PAYMENT_GATEWAY_BASE_URL,
@@ -33,9 +33,14 @@ class States(IntEnum):
     CANCELED = 3
 
 
+class TransactionStates(IntEnum):
+    CONFIRMED = 0
+    FAILED = 1  # Transaction was mined but reverted, or did not create a Request
+    DROPPED = 2  # Transaction was not mined, and is no longer known to the node
+
+
 class Payment(object):
-    payee_index = None
-    delta_amount = None
+    __slots__ = ('payee_index', 'delta_amount')
 
     def __init__(self, payee_index, delta_amount):
         self.payee_index = payee_index
@@ -46,6 +51,11 @@ class Payment(object):
 
 
 class Payee(object):
+    __slots__ = (
+        'id_address', 'payment_address', 'amount', 'additional_amount',
+        'payment_amount', 'balance', 'paid_amount',
+    )
+
     def __init__(self, id_address, amount, payment_address=None,
                  additional_amount=None, payment_amount=None, balance=None,
                  paid_amount=None):
@@ -60,10 +70,39 @@ class Payee(object):
         """
 
         if payment_address:
-            payment_address = Web3.toChecksumAddress(payment_address)
+            payment_address = to_checksum_address(payment_address)
         else:
             payment_address = None
-        self.id_address = Web3.toChecksumAddress(id_address)
+        self._set_fields(
+            id_address=to_checksum_address(id_address),
+            payment_address=payment_address,
+            amount=amount,
+            additional_amount=additional_amount,
+            payment_amount=payment_amount,
+            balance=balance,
+            paid_amount=paid_amount)
+
+    @classmethod
+    def from_normalized(cls, id_address, amount, payment_address=None,
+                        additional_amount=None, payment_amount=None, balance=None,
+                        paid_amount=None):
+        """ Construct a Payee from addresses which are already checksummed, e.g. addresses
+            returned by a web3 contract call, without checksumming them again.
+        """
+        payee = cls.__new__(cls)
+        payee._set_fields(
+            id_address=id_address,
+            payment_address=payment_address if payment_address else None,
+            amount=amount,
+            additional_amount=additional_amount,
+            payment_amount=payment_amount,
+            balance=balance,
+            paid_amount=paid_amount)
+        return payee
+
+    def _set_fields(self, id_address, payment_address, amount, additional_amount,
+                    payment_amount, balance, paid_amount):
+        self.id_address = id_address
         self.payment_address = payment_address
         self.amount = amount
         # TODO these are only set when using create_request_as_payer. Better place for them?
@@ -88,28 +127,42 @@ class Payer(object):
 
         If `refund_address` is not given `id_address` is used as the refund address.
     """
+    __slots__ = ('id_address', 'refund_address')
+
     def __init__(self, id_address, refund_address=None):
-        self.id_address = Web3.toChecksumAddress(id_address)
-        self.refund_address = Web3.toChecksumAddress(refund_address) \
+        self.id_address = to_checksum_address(id_address)
+        self.refund_address = to_checksum_address(refund_address) \
             if refund_address else self.id_address
 
 
 class Request(object):
+    __slots__ = (
+        'id', 'currency_contract_address', 'payer', 'payees', 'ipfs_hash', '_data', 'state',
+        'expiration_date', 'signature', 'hash', 'payments', 'creator', 'transaction_hash',
+        '_gateway_fields', '_gateway_payloads', '_client',
+    )
+
     def __init__(self, currency_contract_address, payees, ipfs_hash, id=None, data=None,
                  payer=None, state=None, payments=None, creator=None,
                  expiration_date=None, signature=None, _hash=None,
-                 transaction_hash=None):
+                 transaction_hash=None, client=None):
         """ Represents a Request which may be in one of multiple states:
 
             - a Request that was retrieved from the blockchain
             - a Signed Request that has been generated locally but does not exist on-chain
+
+            If `data` is None and the Request has an `ipfs_hash`, the data is retrieved
+            from IPFS when it is first accessed.
+
+            `client` is the `RequestNetwork` instance the Request belongs to, which is
+            used to look it up on the blockchain.
         """
         self.id = id
         self.currency_contract_address = currency_contract_address
         self.payer = payer
         self.payees = payees
         self.ipfs_hash = ipfs_hash
-        self.data = data if data else {}
+        self._data = data if data or ipfs_hash else {}
         self.state = state
         self.expiration_date = expiration_date
         self.signature = signature
@@ -117,6 +170,21 @@ class Request(object):
         self.payments = payments if payments else []
         self.creator = creator
         self.transaction_hash = transaction_hash
+        # Memoised payment gateway payloads, see `as_base64`
+        self._gateway_fields = None
+        self._gateway_payloads = None
+        self._client = client
+
+    @property
+    def data(self):
+        if self._data is None:
+            from request_network.utils import retrieve_ipfs_data
+            self._data = retrieve_ipfs_data(self.ipfs_hash)
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = value
 
     @property
     def amounts(self):
@@ -133,11 +201,19 @@ class Request(object):
     @property
     def is_broadcast(self):
         """ Returns True if this Request can be successfully retrieved from the blockchain.
+
+            The Request is looked up with its client, so it uses the same network, provider
+            and caches. A default `RequestNetwork` is only created for Requests which were
+            built without a client.
         """
-        from request_network.api import RequestNetwork
-        request_api = RequestNetwork()
+        if not self.transaction_hash:
+            return False
+        client = self._client
+        if client is None:
+            from request_network.api import RequestNetwork
+            client = RequestNetwork()
         try:
-            request = request_api.get_request_by_transaction_hash(self.transaction_hash)
+            request = client.get_request_by_transaction_hash(self.transaction_hash)
         except RequestNotFound:
             return False
 
@@ -150,66 +226,124 @@ class Request(object):
         """
         return all([p.is_paid for p in self.payees])
 
+    def _get_gateway_fields(self):
+        """ Return the fields included in the payment gateway payload, to tell whether a
+            memoised payload is still valid.
+        """
+        return (
+            self.currency_contract_address, self.ipfs_hash, self.expiration_date, self.hash,
+            self.signature,
+            tuple((p.id_address, p.payment_address, p.amount) for p in self.payees))
+
+    def _encode_signed_request(self):
+        """ Return the JSON-encoded `signedRequest` object of the payment gateway payload.
+        """
+        if not self.hash:
+            raise Exception('Can not base64 encode a Request with no hash')
+        if not self.signature:
+            raise Exception('Can not base64 encode a Request with no signature')
+        amounts, id_addresses, payment_addresses = [], [], []
+        for payee in self.payees:
+            amounts.append(payee.amount)
+            id_addresses.append(payee.id_address)
+            payment_addresses.append(
+                None if payee.payment_address == EMPTY_BYTES_20 else payee.payment_address)
+        return json.dumps({
+            'currencyContract': self.currency_contract_address,
+            # Although the parameter is called data, it is expecting the ipfs_hash.
+            'data': self.ipfs_hash,
+            'expectedAmounts': amounts,
+            'expirationDate': self.expiration_date,
+            'hash': self.hash,
+            'payeesIdAddress': id_addresses,
+            'payeesPaymentAddress': payment_addresses,
+            'signature': self.signature
+        }).encode('utf-8')
+
     def as_base64(self, callback_url, ethereum_network_id):
         """ Return the base64-encoded JSON string required by the payment gateway.
 
+            The result is memoised per callback URL and network ID, and recomputed if any
+            of the Request's fields included in it, or its payees, have changed.
+
         :param callback_url:
         :type ethereum_network: request_network.types.EthereumNetwork
         :return:
         """
-        if not self.hash:
-            raise Exception('Can not base64 encode a Request with no hash')
-        if not self.signature:
-            raise Exception('Can not base64 encode a Request with no signature')
-        return b64encode(json.dumps({
-            'signedRequest': {
-                'currencyContract': self.currency_contract_address,
-                # Although the parameter is called data, it is expecting the ipfs_hash.
-                'data': self.ipfs_hash,
-                'expectedAmounts': [a for a in self.amounts],
-                'expirationDate': self.expiration_date,
-                'hash': self.hash,
-                'payeesIdAddress': self.id_addresses,
-                'payeesPaymentAddress': [
-                    None if a == EMPTY_BYTES_20 else a for a in self.payment_addresses],
-                'signature': self.signature
-            },
-            'callbackUrl': callback_url,
-            'networkId': ethereum_network_id
-        }).encode('utf-8')).decode()
+        fields = self._get_gateway_fields()
+        if fields != self._gateway_fields:
+            self._gateway_fields = fields
+            self._gateway_payloads = {}
+        key = (callback_url, ethereum_network_id)
+        try:
+            return self._gateway_payloads[key]
+        except KeyError:
+            pass
+        payload = encode_gateway_payload(
+            self._encode_signed_request(),
+            get_gateway_payload_suffix(callback_url, ethereum_network_id))
+        self._gateway_payloads[key] = payload
+        return payload
 
     def get_payment_gateway_url(self, callback_url, ethereum_network_id):
-        return '{}{}'.format(
-            PAYMENT_GATEWAY_BASE_URL,
-            self.as_base64(callback_url, ethereum_network_id)
-        )
+        return PAYMENT_GATEWAY_BASE_URL + self.as_base64(callback_url, ethereum_network_id)
+
+    def get_qr_code(self, callback_url, ethereum_network_id, image_format='png',
+                    pyqrcode_kwargs=None):
+        """ Return a QR code containing a URL to pay this Request via the payment gateway,
+            as PNG or SVG image data. QR codes are rendered in memory and cached.
+        """
+        from request_network.qr import get_qr_code_cache
+        return get_qr_code_cache().get(
+            self, callback_url, ethereum_network_id, image_format, pyqrcode_kwargs)
 
-    def write_qr_code(self, f, callback_url, ethereum_network_id, pyqrcode_kwargs=None):
+    def write_qr_code(self, f, callback_url, ethereum_network_id, pyqrcode_kwargs=None,
+                      image_format='png'):
         """ Generate a QR code containing a URL to pay this Request via the payment gateway, and
             write it to file-like object `f`.
         """
-        url = self.get_payment_gateway_url(
-            callback_url=callback_url,
-            ethereum_network_id=ethereum_network_id)
-        kwargs = pyqrcode_kwargs if pyqrcode_kwargs else {}
-        # Use 2 as the default scale. Request's URLs are quite long so they result in
-        # pixel-dense QR codes.
-        kwargs['scale'] = 2 if 'scale' not in kwargs else kwargs['scale']
-
-        qr_code = pyqrcode.create(url)
-        qr_code.png(f, **kwargs)
+        f.write(self.get_qr_code(
+            callback_url, ethereum_network_id, image_format, pyqrcode_kwargs))
         f.seek(0)
 
-    def get_qr_code_data_uri(self, callback_url, ethereum_network_id, pyqrcode_kwargs=None):
+    def get_qr_code_data_uri(self, callback_url, ethereum_network_id, pyqrcode_kwargs=None,
+                             image_format='png'):
         """ Return a link to the payment gateway as a data URI, suitable for inclusion in an
             <img> tag.
 
         """
-        # TODO remove this and other QR code function, give example in docs.
-        # no point including png/pyqrcode for a function that is only a few lines
-        with TemporaryFile() as f:
-            self.write_qr_code(f, callback_url, ethereum_network_id, pyqrcode_kwargs)
-            encoded_uri = b64encode(f.read())
-
-        mime = "text/png;"
-        return "data:%sbase64,%s" % (mime, encoded_uri.decode())
+        from request_network.qr import QR_CODE_MIME_TYPES
+        encoded_uri = b64encode(self.get_qr_code(
+            callback_url, ethereum_network_id, image_format, pyqrcode_kwargs))
+        return "data:%s;base64,%s" % (QR_CODE_MIME_TYPES[image_format], encoded_uri.decode())
+
+
+def get_gateway_payload_suffix(callback_url, ethereum_network_id):
+    """ Return the JSON-encoded end of a payment gateway payload, which is the same for
+        every Request sent to the same callback URL and network.
+    """
+    return ', "callbackUrl": {}, "networkId": {}}}'.format(
+        json.dumps(callback_url), json.dumps(ethereum_network_id)).encode('utf-8')
+
+
+def encode_gateway_payload(signed_request, suffix):
+    """ Return the base64-encoded payment gateway payload from the JSON-encoded
+        `signedRequest` and the suffix returned by `get_gateway_payload_suffix`.
+
+        This is the same as encoding
+        `{"signedRequest": ..., "callbackUrl": ..., "networkId": ...}` with `json.dumps`.
+    """
+    return b2a_base64(b'{"signedRequest": ' + signed_request + suffix, newline=False).decode()
+
+
+def get_payment_gateway_urls(requests, callback_url, ethereum_network_id):
+    """ Return the payment gateway URL of each of `requests`, in order.
+
+        The callback URL and network ID are only encoded once, and the payloads are not
+        memoised on the Requests, which suits generating URLs for many Requests once.
+    """
+    suffix = get_gateway_payload_suffix(callback_url, ethereum_network_id)
+    return [
+        PAYMENT_GATEWAY_BASE_URL + encode_gateway_payload(r._encode_signed_request(), suffix)
+        for r in requests
+    ]
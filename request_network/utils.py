@@ -5,34 +5,40 @@ from eth_utils import (
     add_0x_prefix,
     remove_0x_prefix,
 )
-import ipfsapi
 from web3 import Web3
-from web3.auto import (
-    w3,
-)
-from web3.utils.abi import (
-    map_abi_data,
-)
 from web3.utils.encoding import (
     hex_encode_abi_type,
 )
-from web3.utils.normalizers import (
-    abi_ens_resolver,
-)
 
 from request_network.constants import (
     EMPTY_BYTES_20,
 )
-from request_network.currencies import (
-    ERC20Currency,
-)
 from request_network.exceptions import (
     IPFSConnectionFailed,
-    UnsupportedCurrency,
 )
+from request_network.instrumentation import (
+    ipfs_operation,
+)
+from request_network.providers import (
+    get_default_web3,
+)
+
+_ipfs_client = None
+
+
+def set_ipfs_client(client):
+    """ Use `client` for all IPFS operations instead of connecting to the node given by
+        the `IPFS_NODE_HOST` and `IPFS_NODE_PORT` environment variables. The client must
+        provide `add_json` and `cat`. Pass `None` to restore the default.
+    """
+    global _ipfs_client
+    _ipfs_client = client
 
 
 def get_ipfs():
+    if _ipfs_client is not None:
+        return _ipfs_client
+    import ipfsapi
     ipfs_args = {
         'host': os.environ.get('IPFS_NODE_HOST', 'localhost'),
         'port': os.environ.get('IPFS_NODE_PORT', 5001)
@@ -50,14 +56,16 @@ def store_ipfs_data(data):
     """ Store the given data as a JSON file on IPFS. Returns the IPFS hash
     """
     ipfs = get_ipfs()
-    return ipfs.add_json(data)
+    with ipfs_operation('add_json'):
+        return ipfs.add_json(data)
 
 
 def retrieve_ipfs_data(ipfs_hash):
     """ Retrieves the data stored at the given hash.
     """
     ipfs = get_ipfs()
-    return json.loads(ipfs.cat(ipfs_hash))
+    with ipfs_operation('cat'):
+        return json.loads(ipfs.cat(ipfs_hash))
 
 
 def get_request_bytes_representation(payee_id_addresses, amounts, payer, ipfs_hash=None):
@@ -99,12 +107,12 @@ def get_request_bytes_representation(payee_id_addresses, amounts, payer, ipfs_ha
 
     values, abi_types = zip(*parts)
 
-    # Taken from `Web3.soliditySha3`
-    normalized_values = map_abi_data([abi_ens_resolver(w3)], abi_types, values)
+    # Taken from `Web3.soliditySha3`. Addresses are not resolved through ENS, as in
+    # `hash_request`, so no web3 connection is needed.
     return add_0x_prefix(''.join(
         remove_0x_prefix(hex_encode_abi_type(abi_type, value))
         for abi_type, value
-        in zip(abi_types, normalized_values)
+        in zip(abi_types, values)
     )).lower()
 
 
@@ -178,19 +186,15 @@ def hash_request_object(request, expiration_date=None, ignore_payer=False):
     )
 
 
-def get_service_for_currency(currency):
-    """ Return the Request service class to use for the given currency.
+def get_service_for_currency(currency, web3=None):
+    """ Return the Request service to use for the given currency.
+
+        Services are long-lived and shared, one per currency for each `Web3` instance.
 
     :param currency:
+    :param web3: Optional `Web3` instance for the service to use
     :return:
     """
-    from request_network.services import RequestERC20Service, RequestEthereumService
-
-    if isinstance(currency, ERC20Currency):
-        return RequestERC20Service(token_address=currency.token_address)
-    elif currency.symbol == 'ETH':
-        return RequestEthereumService()
-    elif currency.symbol == 'BTC':
-        raise NotImplementedError()
-    else:
-        raise UnsupportedCurrency('{} is not a supported currency'.format(currency.name))
+    from request_network.services import get_service_registry
+
+    return get_service_registry(web3 if web3 else get_default_web3()).get_service(currency)
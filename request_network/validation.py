@@ -0,0 +1,100 @@
+""" Validation of Request parameters.
+
+    Validation only looks at its arguments, so it is run before any I/O such as IPFS
+    uploads or JSON-RPC calls, and invalid parameters fail without waiting for the network.
+"""
+import re
+import time
+
+from request_network.addresses import (
+    to_checksum_address,
+)
+from request_network.exceptions import (
+    InvalidRequestParameters,
+)
+
+_HEX_ADDRESS = re.compile('(0[xX])?[0-9a-fA-F]{40}')
+
+
+def is_address(address):
+    """ Return True if `address` is a 20 byte address, or a hex address which is either
+        all lower or upper case or has a valid checksum. This is equivalent to
+        `Web3.isAddress`, but only hashes mixed-case addresses, through the shared
+        address cache.
+    """
+    if isinstance(address, (bytes, bytearray)):
+        return len(address) == 20
+    if not isinstance(address, str) or not _HEX_ADDRESS.fullmatch(address):
+        return False
+    hex_address = address[-40:]
+    if hex_address == hex_address.lower() or hex_address == hex_address.upper():
+        return True
+    return to_checksum_address(address) == address
+
+
+def _is_amount(amount):
+    if type(amount) is int:
+        return amount >= 0
+    try:
+        return int(amount) >= 0
+    except (TypeError, ValueError):
+        return False
+
+
+def validate_request_parameters(id_addresses, amounts, payment_addresses=None,
+                                creation_payments=None, additional_payments=None,
+                                expiration_date=None):
+    """ Raise `InvalidRequestParameters` if the parameters can not create a Request.
+
+        Each payee's addresses and amounts are checked in a single pass. Payment
+        addresses may be None or empty for payees without one.
+
+    :param expiration_date: Expiration date of a signed Request, which must be in the future
+    """
+    payment_addresses = payment_addresses if payment_addresses else []
+    creation_payments = creation_payments if creation_payments else []
+    additional_payments = additional_payments if additional_payments else []
+    payee_count = len(id_addresses)
+
+    if payee_count != len(amounts):
+        raise InvalidRequestParameters('payees and amounts must be the same size')
+    if payee_count < len(payment_addresses):
+        raise InvalidRequestParameters(
+            'payees can not be larger than payee_payment_addresses')
+    if payee_count < len(creation_payments):
+        raise InvalidRequestParameters('payees can not be larger than creation_payments')
+    if payee_count < len(additional_payments):
+        raise InvalidRequestParameters('payees can not be larger than additional_payments')
+    if expiration_date is not None and int(expiration_date) <= int(time.time()):
+        raise InvalidRequestParameters('expiration_date must be in the future')
+
+    payment_address_count = len(payment_addresses)
+    creation_payment_count = len(creation_payments)
+    for index in range(payee_count):
+        if not _is_amount(amounts[index]) or (
+                index < creation_payment_count and not _is_amount(creation_payments[index])):
+            raise InvalidRequestParameters('amounts must be positive integers')
+        if not is_address(id_addresses[index]):
+            raise InvalidRequestParameters(
+                '{} is not a valid Ethereum address'.format(id_addresses[index]))
+        if index < payment_address_count and payment_addresses[index] and \
+                not is_address(payment_addresses[index]):
+            raise InvalidRequestParameters(
+                '{} is not a valid Ethereum address'.format(payment_addresses[index]))
+
+
+def validate_requests(parameters):
+    """ Validate the parameters of many Requests.
+
+    :param parameters: Iterable of dicts of `validate_request_parameters` arguments
+    :return: A list with, for each Request, the `InvalidRequestParameters` it raised or None
+    """
+    errors = []
+    for request_parameters in parameters:
+        try:
+            validate_request_parameters(**request_parameters)
+        except InvalidRequestParameters as e:
+            errors.append(e)
+        else:
+            errors.append(None)
+    return errors
@@ -36,6 +36,7 @@ setuptools.setup(
     entry_points={
         'console_scripts': [
             'request-network-qr-code = request_network.scripts.create_qr_code:main',
+            'request-network-export = request_network.scripts.export_requests:main',
         ]
     },
     install_requires=[
@@ -44,8 +45,13 @@ setuptools.setup(
         "PyQRCode==1.2.1",
         "pypng==0.0.18",
         "eth-account==0.2.3",
-        "ipfsapi==0.4.3"
+        "ipfsapi==0.4.3",
+        "requests>=2.16.0",
     ],
+    extras_require={
+        'parquet': ["pyarrow"],
+        'tester': ["web3[tester]==4.4.1"],
+    },
     long_description=README,
     url="https://github.com/mikery/python-request-network",
     packages=setuptools.find_packages(exclude=["tests", "tests.*"]),
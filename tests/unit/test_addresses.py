@@ -0,0 +1,63 @@
+import threading
+import unittest
+
+from web3 import Web3
+
+from request_network.addresses import (
+    AddressCache,
+)
+
+TEST_ADDRESS = '0x821aea9a577a9b44299b9c15c88cf3087f3b5544'
+
+
+class AddressCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache = AddressCache(max_size=2)
+
+    def test_checksum_and_canonical_forms(self):
+        self.assertEqual(
+            Web3.toChecksumAddress(TEST_ADDRESS),
+            self.cache.to_checksum_address(TEST_ADDRESS))
+        self.assertEqual(
+            bytes.fromhex(TEST_ADDRESS[2:]),
+            self.cache.to_canonical_address(TEST_ADDRESS))
+
+    def test_results_are_interned(self):
+        first = self.cache.to_checksum_address(TEST_ADDRESS)
+        self.cache.clear()
+        second = self.cache.to_checksum_address(TEST_ADDRESS)
+        self.assertIs(first, second)
+
+    def test_hit_rate(self):
+        self.cache.to_checksum_address(TEST_ADDRESS)
+        self.cache.to_checksum_address(TEST_ADDRESS)
+        self.assertEqual(1, self.cache.hits)
+        self.assertEqual(1, self.cache.misses)
+        self.assertEqual(0.5, self.cache.stats()['hit_rate'])
+
+    def test_cache_is_bounded(self):
+        for i in range(5):
+            self.cache.to_checksum_address('0x{:040x}'.format(i + 1))
+        self.assertEqual(2, self.cache.stats()['size'])
+
+    def test_invalid_address_is_not_cached(self):
+        with self.assertRaises(ValueError):
+            self.cache.to_checksum_address('foo')
+        self.assertEqual(0, self.cache.stats()['size'])
+
+    def test_concurrent_access(self):
+        addresses = ['0x{:040x}'.format(i + 1) for i in range(50)]
+        cache = AddressCache(max_size=10)
+
+        def worker():
+            for address in addresses:
+                cache.to_checksum_address(address)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(200, cache.hits + cache.misses)
+        self.assertLessEqual(cache.stats()['size'], 10)
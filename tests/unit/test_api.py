@@ -0,0 +1,125 @@
+import threading
+import unittest
+from unittest import (
+    mock,
+)
+
+from request_network.api import (
+    RequestNetwork,
+)
+from request_network.currencies import (
+    currencies_by_symbol,
+)
+from request_network.recording import (
+    Fixture,
+    ReplayProvider,
+)
+
+
+class RequestNetworkClientTestCase(unittest.TestCase):
+    def get_client(self, network):
+        # No requests are made, so an empty fixture is enough
+        return RequestNetwork(network=network, provider=ReplayProvider(Fixture()))
+
+    def test_clients_for_different_networks(self):
+        private = self.get_client('private')
+        rinkeby = self.get_client('rinkeby')
+        self.assertEqual('private', private.network)
+        self.assertEqual('rinkeby', rinkeby.network)
+        self.assertNotEqual(
+            private.artifact_manager.get_contract_data('last-requestcore')['address'],
+            rinkeby.artifact_manager.get_contract_data('last-requestcore')['address'])
+
+    def test_services_are_reused(self):
+        client = self.get_client('private')
+        service = client.get_service(currencies_by_symbol['ETH'])
+        self.assertIs(service, client.get_service(currencies_by_symbol['ETH']))
+        self.assertIs(client.web3, service.web3)
+        self.assertIs(client.artifact_manager, service.artifact_manager)
+        self.assertIsNot(service, self.get_client('private').get_service(
+            currencies_by_symbol['ETH']))
+
+
+PAYEE = '0x' + '11' * 20
+PAYER = '0x' + '22' * 20
+CREATED_TOPIC = '0xcd20b91aeef8959138131d87dd32347cc073c8ecbf1bf640a6cc20de4dd73a6c'
+
+
+def address_topic(address):
+    return '0x' + '00' * 12 + address[2:] if address else None
+
+
+def make_created_log(index):
+    return {
+        'address': '0x8CdaF0CD259887258Bc13a92C0a6dA92698644C0',
+        'blockNumber': hex(100 + index),
+        'data': '0x',
+        'logIndex': '0x0',
+        'topics': [CREATED_TOPIC, '0x' + '{:064x}'.format(index), address_topic(PAYEE)],
+        'transactionHash': '0x' + '{:064x}'.format(index),
+        'transactionIndex': '0x0',
+    }
+
+
+class IterRequestsTestCase(unittest.TestCase):
+    def get_client(self, log_count, payee=None, payer=None):
+        fixture = Fixture()
+        client = RequestNetwork(network='private', provider=ReplayProvider(fixture))
+        core_contract_data = client.artifact_manager.get_contract_data('last-requestcore')
+        fixture.record_rpc('eth_getLogs', [{
+            'fromBlock': hex(core_contract_data['block_number']),
+            'toBlock': 'latest',
+            'address': core_contract_data['address'],
+            'topics': [CREATED_TOPIC, None, address_topic(payee), address_topic(payer)],
+        }], {'jsonrpc': '2.0', 'result': [make_created_log(i) for i in range(log_count)]})
+        return client
+
+    @staticmethod
+    def fake_get_request(request_id, block_number, created_log, load_data,
+                         currency_contract_address):
+        # Requests are identified by their index in the logs
+        index = int(request_id, 16)
+        if currency_contract_address and index % 2:
+            return None
+        return index
+
+    def test_no_logs(self):
+        client = self.get_client(0)
+        with mock.patch.object(client, '_get_request') as get_request:
+            self.assertEqual([], list(client.iter_requests()))
+        get_request.assert_not_called()
+
+    def test_pages(self):
+        client = self.get_client(5)
+        with mock.patch.object(client, '_get_request', side_effect=self.fake_get_request):
+            self.assertEqual([0, 1, 2, 3, 4], list(client.iter_requests(page_size=2)))
+
+    def test_filters(self):
+        client = self.get_client(4, payee=PAYEE, payer=PAYER)
+        with mock.patch.object(
+                client, '_get_request', side_effect=self.fake_get_request) as get_request:
+            requests = list(client.iter_requests(
+                payee=PAYEE, payer=PAYER, currency_contract=PAYEE))
+        # Requests which do not use the currency contract are skipped
+        self.assertEqual([0, 2], requests)
+        _, kwargs = get_request.call_args
+        self.assertEqual(PAYEE, kwargs['currency_contract_address'].lower())
+        self.assertEqual(103, kwargs['block_number'])
+        self.assertFalse(kwargs['load_data'])
+
+    def test_next_page_is_prefetched(self):
+        client = self.get_client(4)
+        prefetched = threading.Event()
+
+        def get_request(request_id, **kwargs):
+            index = int(request_id, 16)
+            if index == 2:
+                prefetched.set()
+            return index
+
+        with mock.patch.object(client, '_get_request', side_effect=get_request):
+            requests = client.iter_requests(page_size=2)
+            self.assertEqual(0, next(requests))
+            # The second page is retrieved while the first is being consumed
+            self.assertTrue(prefetched.wait(5))
+            self.assertEqual([1, 2, 3], list(requests))
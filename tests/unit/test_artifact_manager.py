@@ -55,3 +55,15 @@ class ArtifactMangerTestCase(unittest.TestCase):
         # with self.assertRaises(ArtifactNotFound):
         with self.assertRaises(ArtifactNotFound):
             am.get_service_class_by_address('foo')
+
+    def test_explicit_network(self):
+        am = ArtifactManager(ethereum_network='rinkeby')
+        self.assertEqual(
+            '0x8fc2e7f2498f1d06461ee2d547002611b801202b',
+            am.get_contract_data('last-requestcore')['address'].lower())
+
+    def test_contract_data_is_reused(self):
+        first = self.am.get_contract_data('last-requestcore')
+        # Looked up by address, the core contract shares the same artifact
+        second = self.am.get_contract_data(first['address'])
+        self.assertIs(first['instance'], second['instance'])
@@ -0,0 +1,213 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import (
+    mock,
+)
+import zipfile
+
+from eth_account import (
+    Account,
+)
+
+from request_network.api import (
+    RequestNetwork,
+)
+from request_network.batch import (
+    MANIFEST_FILENAME,
+    QRCodeBatch,
+    ZipOutput,
+    load_manifest,
+    parse_batch_row,
+    read_batch_file,
+)
+from request_network.currencies import (
+    currencies_by_symbol,
+)
+from request_network.qr import (
+    render_qr_code,
+)
+from request_network.recording import (
+    Fixture,
+    ReplayProvider,
+)
+
+PAYEE = '0x821aEa9a577a9b44299B9c15c88cf3087F3b5544'
+PRIVATE_KEY = '0x' + '12' * 32
+SIGNER = Account.privateKeyToAccount(PRIVATE_KEY).address
+CALLBACK_URL = 'https://example.com'
+
+
+class BatchFileTestCase(unittest.TestCase):
+    def test_read_csv_and_jsonl(self):
+        with tempfile.TemporaryDirectory() as directory:
+            csv_path = os.path.join(directory, 'batch.csv')
+            with open(csv_path, 'w') as f:
+                f.write('payee,amount,data\n')
+                f.write('{},0.5,"{{""order"": 1}}"\n'.format(PAYEE))
+            jsonl_path = os.path.join(directory, 'batch.jsonl')
+            with open(jsonl_path, 'w') as f:
+                f.write(json.dumps({'payee': PAYEE, 'amount': 0.5, 'data': {'order': 1}}))
+                f.write('\n\n')
+
+            csv_rows, jsonl_rows = read_batch_file(csv_path), read_batch_file(jsonl_path)
+            self.assertEqual(1, len(jsonl_rows))
+            self.assertEqual({'order': 1}, csv_rows[0]['data'])
+            self.assertEqual(
+                parse_batch_row(csv_rows[0], 'https://example.com'),
+                parse_batch_row(jsonl_rows[0], 'https://example.com'))
+
+    def test_parse_batch_row(self):
+        row = parse_batch_row(
+            {'payee': PAYEE.lower(), 'amount': '0.1', 'expiration': '60'},
+            callback_url='https://example.com')
+        self.assertEqual(PAYEE, row['id_address'])
+        self.assertEqual(10 ** 17, row['amount'])
+        self.assertEqual(60, row['expiration'])
+        self.assertEqual('https://example.com', row['callback_url'])
+        self.assertIsNone(row['payment_address'])
+        # Amounts are not rounded to the default Decimal precision
+        self.assertEqual(
+            12345678901234123456789012345678,
+            parse_batch_row(
+                {'payee': PAYEE, 'amount': '12345678901234.123456789012345678'},
+                callback_url='https://example.com')['amount'])
+
+        for invalid_row in [
+                {'payee': PAYEE},
+                {'payee': PAYEE, 'amount': '-1'},
+                {'payee': PAYEE, 'amount': '1.0000000000000000001'},
+                {'payee': PAYEE, 'amount': 'Infinity'},
+                {'payee': PAYEE, 'amount': '1', 'unknown': 1}]:
+            with self.assertRaises(ValueError):
+                parse_batch_row(invalid_row, callback_url='https://example.com')
+        with self.assertRaises(ValueError):
+            parse_batch_row({'payee': PAYEE, 'amount': '1'})
+
+
+class BatchResumeTestCase(unittest.TestCase):
+    def test_load_manifest_discards_incomplete_line(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, MANIFEST_FILENAME)
+            with open(path, 'w') as f:
+                f.write('{"row": 0}\n{"row": 1}\n{"ro')
+            self.assertEqual([{'row': 0}, {'row': 1}], load_manifest(path))
+            with open(path) as f:
+                self.assertEqual('{"row": 0}\n{"row": 1}\n', f.read())
+            self.assertEqual([], load_manifest(os.path.join(directory, 'missing.jsonl')))
+
+    def test_run_skips_rows_in_manifest(self):
+        rows = [{'payee': PAYEE, 'amount': '1'}, {'payee': PAYEE}]
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, MANIFEST_FILENAME), 'w') as f:
+                f.write(json.dumps({'row': 0, 'qr_code': '000000.png'}) + '\n')
+            with open(os.path.join(directory, '000000.png'), 'wb') as f:
+                f.write(b'image')
+
+            batch = QRCodeBatch(directory, 4, callback_url='https://example.com')
+            # Row 0 is already signed, and row 1 fails validation, so nothing is signed
+            self.assertEqual({'signed': 0, 'skipped': 1, 'failed': 1}, batch.run(rows))
+            self.assertEqual(
+                'ValueError: amount is required',
+                load_manifest(os.path.join(directory, MANIFEST_FILENAME))[-1]['error'])
+
+    def test_zip_output_resumes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'qr_codes.zip')
+            output = ZipOutput(path)
+            output.write('000000.png', b'image')
+            # Images are staged until the batch finishes, so they survive a kill
+            output = ZipOutput(path)
+            self.assertTrue(output.exists('000000.png'))
+            output.finish()
+            self.assertFalse(os.path.exists(path + '.partial'))
+
+            output = ZipOutput(path)
+            self.assertTrue(output.exists('000000.png'))
+            self.assertFalse(output.exists('000001.png'))
+            output.write('000001.png', b'image 1')
+            output.finish()
+            with zipfile.ZipFile(path) as zip_file:
+                self.assertEqual(b'image', zip_file.read('000000.png'))
+                self.assertEqual(b'image 1', zip_file.read('000001.png'))
+
+            with open(path, 'wb') as f:
+                f.write(b'PK\x03\x04incomplete')
+            with self.assertRaises(ValueError):
+                ZipOutput(path)
+
+
+class BatchSigningTestCase(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        # Signing does not send any JSON-RPC requests
+        self.service = RequestNetwork(
+            network='private', provider=ReplayProvider(Fixture())).get_service(
+            currencies_by_symbol['ETH'])
+        patches = [
+            mock.patch.dict(
+                os.environ, {'REQUEST_NETWORK_PRIVATE_KEY_{}'.format(SIGNER): PRIVATE_KEY}),
+            mock.patch('request_network.batch._service', self.service),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.rows = [
+            {'payee': SIGNER, 'amount': '0.5'},
+            {'payee': SIGNER, 'amount': '2', 'payment_address': PAYEE},
+        ]
+
+    def assert_signed(self, manifest_path, read_image):
+        entries = load_manifest(manifest_path)
+        self.assertEqual([0, 1], [entry['row'] for entry in entries])
+        for entry, row in zip(entries, self.rows):
+            parsed_row = parse_batch_row(row, CALLBACK_URL)
+            # Signatures are deterministic, so signing the row again gives the same Request
+            signed_request = self.service.sign_request_as_payee(
+                id_addresses=[SIGNER],
+                amounts=[parsed_row['amount']],
+                payment_addresses=[parsed_row['payment_address']],
+                expiration_date=entry['expiration_date'])
+            gateway_url = signed_request.get_payment_gateway_url(CALLBACK_URL, 4)
+            self.assertEqual(signed_request.hash, entry['request_hash'])
+            self.assertEqual(gateway_url, entry['gateway_url'])
+            self.assertEqual(str(parsed_row['amount']), entry['amount'])
+            self.assertEqual(render_qr_code(gateway_url, 'png'), read_image(entry['qr_code']))
+
+    def test_run_into_directory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            batch = QRCodeBatch(directory, 4, callback_url=CALLBACK_URL, max_workers=2)
+            self.assertEqual({'signed': 2, 'skipped': 0, 'failed': 0}, batch.run(self.rows))
+
+            def read_image(name):
+                with open(os.path.join(directory, name), 'rb') as f:
+                    return f.read()
+
+            self.assert_signed(os.path.join(directory, MANIFEST_FILENAME), read_image)
+
+    def test_run_into_zip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'qr_codes.zip')
+            batch = QRCodeBatch(path, 4, callback_url=CALLBACK_URL, max_workers=2)
+            self.assertEqual({'signed': 2, 'skipped': 0, 'failed': 0}, batch.run(self.rows))
+            with zipfile.ZipFile(path) as zip_file:
+                self.assertEqual(['000000.png', '000001.png'], sorted(zip_file.namelist()))
+                self.assert_signed(path + '.manifest.jsonl', zip_file.read)
+            # Running the batch again skips every row
+            self.assertEqual({'signed': 0, 'skipped': 2, 'failed': 0}, batch.run(self.rows))
+
+    def test_resume_killed_zip_run(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'qr_codes.zip')
+            batch = QRCodeBatch(path, 4, callback_url=CALLBACK_URL, max_workers=2)
+            # A run killed after signing the first row never finishes its output
+            with mock.patch.object(ZipOutput, 'finish'):
+                batch.run(self.rows[:1])
+            self.assertFalse(os.path.exists(path))
+
+            self.assertEqual({'signed': 1, 'skipped': 1, 'failed': 0}, batch.run(self.rows))
+            self.assertFalse(os.path.exists(path + '.partial'))
+            with zipfile.ZipFile(path) as zip_file:
+                self.assertEqual(['000000.png', '000001.png'], sorted(zip_file.namelist()))
+                self.assert_signed(path + '.manifest.jsonl', zip_file.read)
@@ -0,0 +1,65 @@
+import time
+import unittest
+
+from request_network.cache import (
+    CallCache,
+)
+
+
+class FakeEth(object):
+    blockNumber = 100
+
+
+class FakeWeb3(object):
+    eth = FakeEth()
+
+
+class FakeContractFunction(object):
+    address = '0x8cdaf0cd259887258bc13a92c0a6da92698644c0'
+
+    def __init__(self, calldata):
+        self.calldata = calldata
+        self.calls = []
+
+    def _encode_transaction_data(self):
+        return self.calldata
+
+    def call(self, block_identifier):
+        self.calls.append(block_identifier)
+        return len(self.calls)
+
+
+class CallCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache = CallCache(FakeWeb3(), latest_ttl=0.05, finality_depth=10)
+
+    def test_finalized_block_is_cached_permanently(self):
+        function = FakeContractFunction('0x01')
+        self.assertEqual(1, self.cache.call(function, 50))
+        time.sleep(0.1)
+        self.assertEqual(1, self.cache.call(function, 50))
+        self.assertEqual([50], function.calls)
+
+    def test_latest_expires(self):
+        function = FakeContractFunction('0x01')
+        self.assertEqual(1, self.cache.call(function))
+        self.assertEqual(1, self.cache.call(function))
+        time.sleep(0.1)
+        self.assertEqual(2, self.cache.call(function))
+        self.assertEqual(['latest', 'latest'], function.calls)
+
+    def test_recent_block_is_not_final(self):
+        self.assertTrue(self.cache.is_final(90))
+        self.assertFalse(self.cache.is_final(95))
+        self.assertFalse(self.cache.is_final('latest'))
+
+    def test_key_includes_calldata_and_block(self):
+        first = FakeContractFunction('0x01')
+        second = FakeContractFunction('0x02')
+        self.cache.call(first, 50)
+        self.cache.call(second, 50)
+        self.cache.call(first, 51)
+        self.assertEqual([50, 51], first.calls)
+        self.assertEqual([50], second.calls)
+        self.assertEqual(0, self.cache.hits)
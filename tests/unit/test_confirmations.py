@@ -0,0 +1,196 @@
+from collections import (
+    Counter,
+)
+import unittest
+from unittest import (
+    mock,
+)
+
+from web3 import Web3
+from web3.providers.base import (
+    BaseProvider,
+)
+
+from request_network.artifact_manager import (
+    ArtifactManager,
+)
+from request_network.confirmations import (
+    ConfirmationTracker,
+)
+from request_network.types import (
+    TransactionStates,
+)
+
+CREATED_TOPIC = Web3.toHex(Web3.sha3(text='Created(bytes32,address,address,address,string)'))
+REQUEST_ID = '0x' + '01' * 32
+
+
+def transaction_hash(i):
+    return '0x{:064x}'.format(i)
+
+
+class ChainProvider(BaseProvider):
+    """ Provider serving blocks and receipts from an in-memory chain.
+    """
+
+    def __init__(self):
+        self.blocks = [[]]
+        self.receipts = {}
+        self.known_transactions = set()
+        self.calls = Counter()
+        # Block numbers whose `eth_getBlockByNumber` call fails once
+        self.failing_blocks = set()
+
+    def mine(self, *transactions, status=1, created=True):
+        for tx_hash in transactions:
+            logs = [{
+                'topics': [CREATED_TOPIC, REQUEST_ID],
+                'data': '0x',
+                'logIndex': hex(0),
+            }] if created else []
+            self.receipts[tx_hash] = {
+                'transactionHash': tx_hash,
+                'blockNumber': hex(len(self.blocks)),
+                'status': hex(status),
+                'logs': logs,
+            }
+        self.blocks.append(list(transactions))
+
+    def make_request(self, method, params):
+        self.calls[method] += 1
+        if method == 'eth_blockNumber':
+            return {'result': hex(len(self.blocks) - 1)}
+        if method == 'eth_getBlockByNumber':
+            number = int(params[0], 16)
+            if number in self.failing_blocks:
+                self.failing_blocks.remove(number)
+                raise TimeoutError('Timed out fetching block {}'.format(number))
+            return {'result': {'number': hex(number), 'transactions': self.blocks[number]}}
+        if method == 'eth_getTransactionReceipt':
+            return {'result': self.receipts.get(params[0])}
+        if method == 'eth_getTransactionByHash':
+            found = params[0] in self.known_transactions
+            return {'result': {'hash': params[0]} if found else None}
+        raise NotImplementedError(method)
+
+
+class ConfirmationTrackerTestCase(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.provider = ChainProvider()
+        web3 = Web3(self.provider)
+        self.tracker = ConfirmationTracker(
+            web3=web3,
+            artifact_manager=ArtifactManager(web3=web3, ethereum_network='private'),
+            confirmations=2,
+            drop_after_blocks=3)
+
+    def tearDown(self):
+        self.tracker.close()
+        super().tearDown()
+
+    def test_created_topic(self):
+        self.assertEqual(CREATED_TOPIC, self.tracker.created_topic)
+
+    def test_confirmed(self):
+        resolved = []
+        future = self.tracker.track(transaction_hash(1), callback=resolved.append)
+        self.assertEqual([], self.tracker.poll())
+        self.provider.mine(transaction_hash(1))
+        self.assertEqual([], self.tracker.poll())
+        self.provider.mine()
+        self.tracker.poll()
+
+        confirmation = future.result(timeout=0)
+        self.assertEqual(TransactionStates.CONFIRMED, confirmation.state)
+        self.assertEqual(REQUEST_ID, confirmation.request_id)
+        self.assertEqual(1, confirmation.block_number)
+        self.assertEqual([confirmation], resolved)
+        self.assertEqual(0, self.tracker.pending_count)
+
+    def test_mined_before_tracking(self):
+        self.provider.mine(transaction_hash(1))
+        self.provider.mine()
+        future = self.tracker.track(transaction_hash(1))
+        self.tracker.poll()
+        self.assertEqual(TransactionStates.CONFIRMED, future.result(timeout=0).state)
+
+    def test_failed(self):
+        reverted = self.tracker.track(transaction_hash(1))
+        no_request = self.tracker.track(transaction_hash(2))
+        self.tracker.poll()
+        self.provider.mine(transaction_hash(1), status=0)
+        self.provider.mine(transaction_hash(2), created=False)
+        self.provider.mine()
+        self.tracker.poll()
+        self.assertEqual(TransactionStates.FAILED, reverted.result(timeout=0).state)
+        self.assertEqual(TransactionStates.FAILED, no_request.result(timeout=0).state)
+        self.assertIsNone(no_request.result(timeout=0).request_id)
+        self.assertFalse(reverted.result(timeout=0).out_of_gas)
+
+    def test_out_of_gas(self):
+        self.tracker.gas_estimates = mock.Mock(**{'record_receipt.return_value': True})
+        future = self.tracker.track(transaction_hash(1))
+        self.provider.mine(transaction_hash(1), status=0)
+        self.provider.mine()
+        self.tracker.poll()
+        confirmation = future.result(timeout=0)
+        self.assertEqual(TransactionStates.FAILED, confirmation.state)
+        self.assertTrue(confirmation.out_of_gas)
+        self.tracker.gas_estimates.record_receipt.assert_called_once_with(confirmation.receipt)
+
+    def test_dropped(self):
+        dropped = self.tracker.track(transaction_hash(1))
+        still_pending = self.tracker.track(transaction_hash(2))
+        self.provider.known_transactions.add(transaction_hash(2))
+        self.tracker.poll()
+        for _ in range(3):
+            self.provider.mine()
+        self.tracker.poll()
+        self.assertEqual(TransactionStates.DROPPED, dropped.result(timeout=0).state)
+        self.assertFalse(still_pending.done())
+
+    def test_failed_poll_is_retried(self):
+        mined_later = self.tracker.track(transaction_hash(1))
+        self.tracker.poll()
+        new = self.tracker.track(transaction_hash(2))
+        self.provider.mine(transaction_hash(1), transaction_hash(2))
+        self.provider.mine()
+        self.provider.failing_blocks.add(1)
+        with self.assertRaises(TimeoutError):
+            self.tracker.poll()
+        self.assertFalse(mined_later.done())
+
+        # The next poll scans block 1 again and checks the new transaction's receipt
+        self.tracker.poll()
+        self.assertEqual(TransactionStates.CONFIRMED, mined_later.result(timeout=0).state)
+        self.assertEqual(TransactionStates.CONFIRMED, new.result(timeout=0).state)
+
+    def test_expired_transaction_mined_in_unscanned_block(self):
+        self.tracker.confirmations = 1
+        future = self.tracker.track(transaction_hash(1))
+        self.tracker.poll()
+        self.provider.known_transactions.add(transaction_hash(1))
+        self.provider.mine(transaction_hash(1))
+        # Simulate a block missed by the block scan
+        self.provider.blocks[1] = []
+        for _ in range(3):
+            self.provider.mine()
+        self.tracker.poll()
+        self.assertEqual(TransactionStates.CONFIRMED, future.result(timeout=0).state)
+        self.assertEqual(1, future.result(timeout=0).block_number)
+
+    def test_calls_do_not_depend_on_pending_count(self):
+        self.tracker.drop_after_blocks = 50
+        futures = self.tracker.track_many([transaction_hash(i) for i in range(1000)])
+        self.tracker.poll()
+        self.provider.calls.clear()
+
+        for i in range(10):
+            self.provider.mine(transaction_hash(i))
+            self.tracker.poll()
+        self.assertEqual(10, self.provider.calls['eth_getBlockByNumber'])
+        # One receipt per confirmed transaction
+        self.assertEqual(9, self.provider.calls['eth_getTransactionReceipt'])
+        self.assertEqual(0, self.provider.calls['eth_getTransactionByHash'])
+        self.assertEqual(9, sum(f.done() for f in futures))
@@ -1,8 +1,13 @@
 import unittest
 
+from request_network.artifact_manager import (
+    ArtifactManager,
+)
 from request_network.currencies import (
+    CurrencyRegistry,
     currencies_by_name,
     currencies_by_symbol,
+    get_currency_registry,
 )
 from request_network.services.ERC20 import (
     RequestERC20Service,
@@ -22,3 +27,39 @@ class CurrencyTestCase(unittest.TestCase):
         dai = currencies_by_symbol['DAI']
         service = dai.get_service_class()
         self.assertTrue(isinstance(service, RequestERC20Service))
+
+
+class CurrencyRegistryTestCase(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.registry = CurrencyRegistry.from_artifacts(ArtifactManager(ethereum_network='main'))
+
+    def test_tokens_from_artifacts(self):
+        self.assertEqual(
+            ['DAI', 'DGX', 'ETH', 'KNC', 'OMG', 'REQ'], sorted(self.registry.by_symbol))
+        self.assertEqual(9, self.registry.by_symbol['DGX'].decimals)
+        self.assertEqual('OMG', self.registry.by_name['OmiseGO'].symbol)
+
+    def test_token_address_lookup(self):
+        currency = self.registry.get_by_token_address(
+            '0x8F8221aFbB33998d8584A2B05749bA73c37a938a')
+        self.assertEqual('REQ', currency.symbol)
+
+    def test_contract_address_lookup(self):
+        self.assertEqual(
+            'DAI',
+            self.registry.get_by_contract_address(
+                '0x3baa64a4401bbe18865547e916a9be8e6dd89a5a').symbol)
+        self.assertEqual(
+            'ETH',
+            self.registry.get_by_contract_address(
+                '0x3038045cd883abff0c6eea4b1954843c0fa5a735').symbol)
+
+    def test_registry_is_frozen(self):
+        with self.assertRaises(TypeError):
+            self.registry.by_symbol['FOO'] = None
+
+    def test_registry_is_built_once(self):
+        am = ArtifactManager(ethereum_network='rinkeby')
+        self.assertIs(get_currency_registry(am), get_currency_registry(am))
+        self.assertEqual(['CTBK', 'ETH'], sorted(get_currency_registry(am).by_symbol))
@@ -0,0 +1,113 @@
+import unittest
+
+from eth_abi.exceptions import (
+    EncodingError,
+)
+from web3 import Web3
+
+from request_network.artifact_manager import (
+    ArtifactManager,
+)
+from request_network.currencies import (
+    currencies_by_symbol,
+)
+from request_network.encoders import (
+    ContractEncoder,
+)
+from request_network.services import (
+    ServiceRegistry,
+)
+
+ID_ADDRESS = Web3.toChecksumAddress('0x821aea9a577a9b44299b9c15c88cf3087f3b5544')
+PAYMENT_ADDRESS = Web3.toChecksumAddress('0x6330a553fc93768f612722bb8c2ec78ac90b3bbc')
+IPFS_HASH = 'QmUuHsTJdB6bVdmVW2qEbyTdWYBnPSAWpfiTkqsbjG9krq'
+
+
+class ContractEncoderTestCase(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        registry = ServiceRegistry(artifact_manager=ArtifactManager(ethereum_network='private'))
+        self.service = registry.get_service(currencies_by_symbol['ETH'])
+        self.contract = self.service.currency_contract_data['instance']
+        self.encoder = self.service.currency_contract_encoder
+
+    def assertEncodesLikeWeb3(self, function_name, **kwargs):
+        expected = getattr(self.contract.functions, function_name)(
+            **kwargs)._encode_transaction_data()
+        self.assertEqual(expected, self.encoder.get_function(function_name).encode(**kwargs))
+
+    def test_collect_estimation(self):
+        self.assertEncodesLikeWeb3('collectEstimation', _expectedAmount=10 ** 18)
+
+    def test_create_request_as_payee(self):
+        self.assertEncodesLikeWeb3(
+            'createRequestAsPayee',
+            _payeesIdAddress=[ID_ADDRESS, PAYMENT_ADDRESS],
+            _payeesPaymentAddress=[PAYMENT_ADDRESS],
+            _expectedAmounts=[100, 200],
+            _payer=PAYMENT_ADDRESS,
+            _payerRefundAddress=ID_ADDRESS,
+            _data=IPFS_HASH)
+
+    def test_create_request_as_payer(self):
+        self.assertEncodesLikeWeb3(
+            'createRequestAsPayer',
+            _payeesIdAddress=[ID_ADDRESS],
+            _expectedAmounts=[100],
+            _payerRefundAddress=PAYMENT_ADDRESS,
+            _payeeAmounts=[50],
+            _additionals=[0],
+            _data='')
+
+    def test_broadcast_signed_request_as_payer(self):
+        self.assertEncodesLikeWeb3(
+            'broadcastSignedRequestAsPayer',
+            _requestData='0x' + 'ab' * 97,
+            _payeesPaymentAddress=[PAYMENT_ADDRESS],
+            _payeeAmounts=[0],
+            _additionals=[0],
+            _expirationDate=1700000000,
+            _signature=b'\x01' * 65)
+
+    def test_build_transaction(self):
+        transaction = self.encoder.build_transaction(
+            'collectEstimation', {'from': ID_ADDRESS, 'value': 1}, _expectedAmount=100)
+        self.assertEqual(self.service.currency_contract_data['address'], transaction['to'])
+        self.assertEqual(ID_ADDRESS, transaction['from'])
+        self.assertEqual(1, transaction['value'])
+        self.assertEqual(
+            self.contract.functions.collectEstimation(
+                _expectedAmount=100)._encode_transaction_data(),
+            transaction['data'])
+
+    def test_decode(self):
+        function = self.encoder.get_function('collectEstimation')
+        self.assertEqual(1234, function.decode((1234).to_bytes(32, 'big')))
+
+    def test_invalid_arguments(self):
+        function = self.encoder.get_function('collectEstimation')
+        with self.assertRaises(EncodingError):
+            function.encode()
+        with self.assertRaises(EncodingError):
+            function.encode(_amount=1)
+        with self.assertRaises(EncodingError):
+            self.encoder.get_function('accept')
+
+    def test_only_selected_functions(self):
+        encoder = ContractEncoder(
+            self.service.web3,
+            self.service.currency_contract_data['address'],
+            self.service.currency_contract_data['abi'],
+            function_names=('collectEstimation',))
+        self.assertEqual(['collectEstimation'], list(encoder.functions))
+
+    def test_web3_fallback_sends_same_transaction(self):
+        sent = []
+        self.service.send_transaction = sent.append
+        options = {'from': ID_ADDRESS}
+        kwargs = {'_expectedAmount': 100}
+        self.service._transact_currency_contract('collectEstimation', options, **kwargs)
+        self.service.use_precompiled_encoders = False
+        self.service._transact_currency_contract('collectEstimation', options, **kwargs)
+        self.assertEqual(2, len(sent))
+        self.assertEqual(sent[0], sent[1])
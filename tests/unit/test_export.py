@@ -0,0 +1,221 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import (
+    mock,
+)
+
+from web3 import Web3
+
+from request_network.artifact_manager import (
+    ArtifactManager,
+)
+from request_network.export import (
+    PAYMENT_FIELDS,
+    CsvWriter,
+    RequestExporter,
+    decode_created_log,
+    decode_update_balance_log,
+)
+from request_network.recording import (
+    Fixture,
+    ReplayProvider,
+)
+
+REQUEST_ID = '0x' + 'aa' * 32
+TRANSACTION_HASH = '0x' + 'cc' * 32
+PAYEE = Web3.toChecksumAddress('0x821aea9a577a9b44299b9c15c88cf3087f3b5544')
+PAYER = Web3.toChecksumAddress('0x6330a553fc93768f612722bb8c2ec78ac90b3bbc')
+IPFS_HASH = 'QmbFpULNpMJEj9LfvhH4hSTfTse5YrS2JvhbHW6bRSo9n7'
+
+
+def address_topic(address):
+    return '0x' + '00' * 12 + address[2:].lower()
+
+
+def make_created_data(creator, ipfs_hash, padded=True):
+    string = ipfs_hash.encode('utf-8')
+    if padded:
+        string += b'\x00' * (-len(string) % 32)
+    return '0x' + (
+        bytes(12) + Web3.toBytes(hexstr=creator) + (64).to_bytes(32, 'big') +
+        len(ipfs_hash).to_bytes(32, 'big') + string).hex()
+
+
+def make_log(address, topics, data, block_number, log_index=0):
+    return {
+        'address': address,
+        'blockNumber': hex(block_number),
+        'data': data,
+        'logIndex': hex(log_index),
+        'topics': topics,
+        'transactionHash': '0x' + '{:064x}'.format(block_number),
+        'transactionIndex': '0x0',
+    }
+
+
+class ExportTestCase(unittest.TestCase):
+    def test_decode_update_balance_log(self):
+        data = (2).to_bytes(32, 'big') + (-5).to_bytes(32, 'big', signed=True)
+        row = decode_update_balance_log({
+            'topics': ['0x' + '00' * 32, REQUEST_ID],
+            'data': '0x' + data.hex(),
+            'blockNumber': 10,
+            'logIndex': 1,
+            'transactionHash': TRANSACTION_HASH,
+        })
+        self.assertEqual(REQUEST_ID, row['request_id'])
+        self.assertEqual(2, row['payee_index'])
+        self.assertEqual('-5', row['delta_amount'])
+
+    def test_decode_created_log(self):
+        for padded in (True, False):
+            row = decode_created_log({
+                'address': PAYEE.lower(),
+                'topics': [
+                    '0x' + '00' * 32, REQUEST_ID, address_topic(PAYEE), address_topic(PAYER)],
+                'data': make_created_data(PAYER, IPFS_HASH, padded),
+                'blockNumber': 10,
+                'logIndex': 1,
+                'transactionHash': TRANSACTION_HASH,
+            })
+            self.assertEqual({
+                'request_id': REQUEST_ID,
+                'core_contract_address': PAYEE,
+                'payee': PAYEE,
+                'payer': PAYER,
+                'creator': PAYER,
+                'ipfs_hash': IPFS_HASH,
+                'block_number': 10,
+                'log_index': 1,
+                'transaction_hash': TRANSACTION_HASH,
+            }, row)
+
+        row = decode_created_log({
+            'address': PAYEE,
+            'topics': ['0x' + '00' * 32, REQUEST_ID, address_topic(PAYEE), address_topic(PAYER)],
+            'data': make_created_data(PAYER, ''),
+            'blockNumber': 10,
+            'logIndex': 1,
+            'transactionHash': TRANSACTION_HASH,
+        })
+        self.assertIsNone(row['ipfs_hash'])
+
+    def test_resume_truncates_uncheckpointed_rows(self):
+        row = dict(request_id=REQUEST_ID, payee_index=0, delta_amount='1', block_number=1,
+                   log_index=0, transaction_hash=TRANSACTION_HASH)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'payments.csv')
+            writer = CsvWriter(path, PAYMENT_FIELDS)
+            writer.write_rows([row], 1)
+            offset = writer.flush()
+            # Rows written after the last checkpoint are discarded when resuming
+            writer.write_rows([row], 2)
+            writer.close()
+
+            writer = CsvWriter(path, PAYMENT_FIELDS, offset=offset)
+            writer.write_rows([row], 2)
+            writer.close()
+            with open(path) as f:
+                self.assertEqual(3, len(f.readlines()))
+
+
+class RequestExporterTestCase(unittest.TestCase):
+    """ Exports replayed logs from blocks 0 to 34, in chunks of 10 blocks.
+    """
+    created_blocks = [3, 12, 12, 25, 33]
+    payment_blocks = [5, 12, 27, 34]
+
+    def setUp(self):
+        super().setUp()
+        self.fixture = Fixture()
+        self.web3 = Web3(ReplayProvider(self.fixture))
+        self.artifact_manager = ArtifactManager(web3=self.web3, ethereum_network='private')
+        exporter = self.get_exporter('unused')
+        core_contract_address = exporter.core_contract_data['address']
+
+        created_logs = [
+            make_log(core_contract_address, [
+                exporter.created_topic, '0x' + '{:064x}'.format(index),
+                address_topic(PAYEE), address_topic(PAYER)],
+                make_created_data(PAYER, IPFS_HASH if index % 2 else ''), block_number, index)
+            for index, block_number in enumerate(self.created_blocks)]
+        payment_logs = [
+            make_log(core_contract_address, [
+                exporter.update_balance_topic, '0x' + '{:064x}'.format(index)],
+                '0x' + ((0).to_bytes(32, 'big') + (index + 1).to_bytes(32, 'big')).hex(),
+                block_number, index)
+            for index, block_number in enumerate(self.payment_blocks)]
+
+        self.fixture.record_rpc('eth_blockNumber', [], {'jsonrpc': '2.0', 'result': hex(34)})
+        for chunk_start in range(0, 35, 10):
+            chunk_end = min(chunk_start + 9, 34)
+            for topic, logs in ((exporter.created_topic, created_logs),
+                                (exporter.update_balance_topic, payment_logs)):
+                self.fixture.record_rpc('eth_getLogs', [{
+                    'fromBlock': hex(chunk_start),
+                    'toBlock': hex(chunk_end),
+                    'address': core_contract_address,
+                    'topics': [topic],
+                }], {'jsonrpc': '2.0', 'result': [
+                    log for log in logs
+                    if chunk_start <= int(log['blockNumber'], 16) <= chunk_end]})
+
+    def get_exporter(self, directory):
+        return RequestExporter(
+            directory, chunk_size=10, web3=self.web3, artifact_manager=self.artifact_manager)
+
+    @staticmethod
+    def read_rows(path):
+        with open(path) as f:
+            return [json.loads(line) for line in f]
+
+    def assert_exported(self, directory):
+        requests = self.read_rows(os.path.join(directory, 'requests.jsonl'))
+        payments = self.read_rows(os.path.join(directory, 'payments.jsonl'))
+        self.assertEqual(list(range(len(self.created_blocks))), [
+            int(row['request_id'], 16) for row in requests])
+        self.assertEqual(self.created_blocks, [row['block_number'] for row in requests])
+        self.assertEqual([None, IPFS_HASH], [row['ipfs_hash'] for row in requests[:2]])
+        self.assertEqual(list(range(len(self.payment_blocks))), [
+            int(row['request_id'], 16) for row in payments])
+        self.assertEqual(
+            [str(i + 1) for i in range(len(self.payment_blocks))],
+            [row['delta_amount'] for row in payments])
+
+    def test_export(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertEqual(
+                (len(self.created_blocks), len(self.payment_blocks)),
+                self.get_exporter(directory).export())
+            self.assert_exported(directory)
+
+    def test_resume_after_interruption(self):
+        with tempfile.TemporaryDirectory() as directory:
+            exporter = self.get_exporter(directory)
+            save_checkpoint = exporter.save_checkpoint
+            saved = []
+
+            def interrupt(checkpoint):
+                # Stop after the third chunk's rows are written, but before its checkpoint
+                if len(saved) == 2:
+                    raise KeyboardInterrupt
+                saved.append(checkpoint)
+                save_checkpoint(checkpoint)
+
+            with mock.patch.object(exporter, 'save_checkpoint', side_effect=interrupt):
+                with self.assertRaises(KeyboardInterrupt):
+                    exporter.export()
+            self.assertEqual(20, exporter.load_checkpoint()['next_block'])
+
+            # Only the rows after the checkpoint are exported again
+            self.assertEqual((2, 2), self.get_exporter(directory).export())
+            self.assert_exported(directory)
+
+    def test_resume_with_different_to_block(self):
+        with tempfile.TemporaryDirectory() as directory:
+            exporter = self.get_exporter(directory)
+            exporter.save_checkpoint({'next_block': 10, 'to_block': 34, 'offsets': {}})
+            with self.assertRaises(ValueError):
+                exporter.export(to_block=20)
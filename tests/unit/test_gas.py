@@ -0,0 +1,204 @@
+import threading
+import unittest
+
+from web3 import Web3
+from web3.providers.base import (
+    BaseProvider,
+)
+
+from request_network.api import (
+    RequestNetwork,
+)
+from request_network.artifact_manager import (
+    ArtifactManager,
+)
+from request_network.currencies import (
+    currencies_by_symbol,
+)
+from request_network.gas import (
+    GasEstimateCache,
+    GasKey,
+    GasPriceOracle,
+)
+from request_network.services import (
+    ServiceRegistry,
+)
+from request_network.utils import (
+    get_request_bytes_representation,
+)
+
+ID_ADDRESS = Web3.toChecksumAddress('0x821aea9a577a9b44299b9c15c88cf3087f3b5544')
+CONTRACT_ADDRESS = Web3.toChecksumAddress('0xf12b5dd4ead5f743c6baa640b0216200e89b60da')
+KEY = GasKey(CONTRACT_ADDRESS, 'createRequestAsPayee', 1, True)
+TRANSACTION_HASH = '0x' + '12' * 32
+
+
+class EstimatingProvider(BaseProvider):
+    def __init__(self, estimate):
+        self.estimate = estimate
+        self.estimate_count = 0
+
+    def make_request(self, method, params):
+        assert method == 'eth_estimateGas'
+        self.estimate_count += 1
+        return {'result': hex(self.estimate)}
+
+
+def get_receipt(gas_used, status=1, transaction_hash=TRANSACTION_HASH):
+    return {
+        'transactionHash': Web3.toBytes(hexstr=transaction_hash),
+        'gasUsed': gas_used,
+        'status': status,
+    }
+
+
+class GasEstimateCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.provider = EstimatingProvider(100000)
+        self.cache = GasEstimateCache(Web3(self.provider), margin=0.5)
+
+    def send(self, data='0x01', transaction_hash=TRANSACTION_HASH):
+        transaction = self.cache.fill_gas(
+            {'from': ID_ADDRESS, 'to': CONTRACT_ADDRESS, 'data': data}, KEY)
+        self.cache.record_transaction(transaction_hash, transaction)
+        return transaction
+
+    def test_estimates_once_per_key(self):
+        self.assertEqual(150000, self.send()['gas'])
+        self.assertEqual(150000, self.send()['gas'])
+        self.assertEqual(1, self.provider.estimate_count)
+        self.assertEqual((1, 1), (self.cache.hits, self.cache.misses))
+
+    def test_refined_from_receipts(self):
+        self.send()
+        self.cache.record_receipt(get_receipt(60000))
+        self.assertEqual(90000, self.cache.get_gas(KEY))
+        # Receipts of transactions which were not sent with a cached gas limit are ignored
+        self.cache.record_receipt(get_receipt(80000, transaction_hash='0x' + '34' * 32))
+        self.assertEqual(90000, self.cache.get_gas(KEY))
+
+    def test_out_of_gas(self):
+        gas = self.send()['gas']
+        self.assertTrue(self.cache.record_receipt(get_receipt(gas, status=0)))
+        self.assertIsNone(self.cache.get_gas(KEY))
+        self.assertEqual(1, self.cache.out_of_gas_count)
+        self.assertEqual(200000, self.send()['gas'])
+        self.assertEqual(2, self.provider.estimate_count)
+
+    def test_revert_keeps_estimate(self):
+        self.send()
+        self.assertFalse(self.cache.record_receipt(get_receipt(30000, status=0)))
+        self.assertEqual(150000, self.cache.get_gas(KEY))
+        self.assertEqual(0, self.cache.out_of_gas_count)
+
+
+class GasKeyTestCase(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        registry = ServiceRegistry(artifact_manager=ArtifactManager(ethereum_network='private'))
+        self.service = registry.get_service(currencies_by_symbol['ETH'])
+
+    def test_create_request_key(self):
+        key = self.service._get_gas_key(
+            'createRequestAsPayee', {'_payeesIdAddress': [ID_ADDRESS] * 3, '_data': ''})
+        self.assertEqual(3, key.payee_count)
+        self.assertFalse(key.has_data)
+
+    def test_broadcast_signed_request_key(self):
+        for ipfs_hash in (None, 'QmUuHsTJdB6bVdmVW2qEbyTdWYBnPSAWpfiTkqsbjG9krq'):
+            request_data = Web3.toBytes(hexstr=get_request_bytes_representation(
+                payee_id_addresses=[ID_ADDRESS] * 2,
+                amounts=[1, 2],
+                payer=None,
+                ipfs_hash=ipfs_hash))
+            key = self.service._get_gas_key(
+                'broadcastSignedRequestAsPayer', {'_requestData': request_data})
+            self.assertEqual(2, key.payee_count)
+            self.assertEqual(bool(ipfs_hash), key.has_data)
+
+
+class BlockProvider(BaseProvider):
+    """ Provider serving blocks whose transactions have the given gas prices.
+    """
+
+    def __init__(self, blocks):
+        self.blocks = blocks
+        self.calls = []
+        # If set, requests wait for this event
+        self.gate = None
+
+    def make_request(self, method, params):
+        if self.gate:
+            self.gate.wait(5)
+        self.calls.append(method)
+        if method == 'eth_blockNumber':
+            return {'result': hex(len(self.blocks) - 1)}
+        if method == 'eth_getBlockByNumber':
+            number = int(params[0], 16)
+            return {'result': {
+                'number': hex(number),
+                'transactions': [{'gasPrice': hex(p)} for p in self.blocks[number]],
+            }}
+        if method == 'eth_gasPrice':
+            return {'result': hex(7)}
+        raise NotImplementedError(method)
+
+
+class GasPriceOracleTestCase(unittest.TestCase):
+    def get_oracle(self, blocks, **kwargs):
+        self.provider = BlockProvider(blocks)
+        return GasPriceOracle(Web3(self.provider), **kwargs)
+
+    def test_tiers(self):
+        oracle = self.get_oracle([list(range(1, 51)), list(range(51, 101))])
+        self.assertEqual(60, oracle.get_gas_price())
+        self.assertEqual(30, oracle.get_gas_price('slow'))
+        self.assertEqual(90, oracle.get_gas_price('fast'))
+        distribution = oracle.get_distribution()
+        self.assertEqual(100, distribution['transactions'])
+        self.assertEqual((1, 100), (distribution['min'], distribution['max']))
+
+    def test_samples_are_reused(self):
+        oracle = self.get_oracle([[10, 20, 30]], max_age=60)
+        for _ in range(10):
+            oracle.get_gas_price()
+        self.assertEqual(['eth_blockNumber', 'eth_getBlockByNumber'], self.provider.calls)
+
+    def test_stale_samples_are_refreshed_in_background(self):
+        oracle = self.get_oracle([[10]] * 5, sample_blocks=3, max_age=0)
+        oracle.get_gas_price()
+        self.provider.blocks.append([50])
+        self.provider.calls = []
+        self.provider.gate = threading.Event()
+        # The last prices are used while the samples are refreshed
+        self.assertEqual(10, oracle.get_gas_price('fast'))
+        refresh_thread = oracle._refresh_thread
+        self.provider.gate.set()
+        refresh_thread.join()
+        # Only the new block is fetched
+        self.assertEqual(['eth_blockNumber', 'eth_getBlockByNumber'], self.provider.calls[:2])
+        self.assertEqual(10, oracle.get_gas_price('standard'))
+        self.assertEqual(50, oracle.get_gas_price('fast'))
+        self.assertEqual(3, oracle.get_distribution()['blocks'])
+
+    def test_started_by_client(self):
+        self.provider = BlockProvider([[10, 20, 30]])
+        client = RequestNetwork(
+            network='private', provider=self.provider,
+            gas_price_oracle_config={'start': True, 'max_age': 60})
+        oracle = client.gas_price_oracle
+        self.addCleanup(oracle.stop)
+        self.assertIsNotNone(oracle._thread)
+        self.assertEqual(['eth_blockNumber', 'eth_getBlockByNumber'], self.provider.calls)
+        self.provider.calls = []
+        self.assertEqual(30, oracle.get_gas_price('fast'))
+        self.assertEqual([], self.provider.calls)
+
+    def test_falls_back_to_node_gas_price(self):
+        oracle = self.get_oracle([[], []])
+        self.assertEqual(7, oracle.get_gas_price())
+
+    def test_unknown_tier(self):
+        with self.assertRaises(ValueError):
+            self.get_oracle([[]], default_tier='urgent')
@@ -0,0 +1,41 @@
+import json
+import subprocess
+import sys
+import unittest
+
+CHECK_IMPORT = '''
+import json, sys
+import {module}
+print(json.dumps([m for m in {modules!r} if m in sys.modules]))
+'''
+
+
+class LazyImportTestCase(unittest.TestCase):
+    def get_loaded_modules(self, module, modules):
+        """ Import `module` in a new interpreter, and return which of `modules` it loaded.
+        """
+        output = subprocess.check_output([
+            sys.executable, '-c', CHECK_IMPORT.format(module=module, modules=modules)])
+        return json.loads(output.decode())
+
+    def test_types_does_not_import_web3(self):
+        self.assertEqual(
+            [],
+            self.get_loaded_modules(
+                'request_network.types', ('web3', 'ipfsapi', 'pyqrcode')))
+
+    def test_api_defers_optional_dependencies(self):
+        self.assertEqual(
+            [],
+            self.get_loaded_modules(
+                'request_network.api', ('web3.auto', 'unittest.mock', 'ipfsapi', 'pyqrcode')))
+
+    def test_api_does_not_import_web3(self):
+        self.assertEqual(
+            [],
+            self.get_loaded_modules('request_network.api', ('web3', 'eth_abi', 'eth_utils')))
+
+    def test_qr_code_script_defers_api(self):
+        self.assertEqual(
+            [],
+            self.get_loaded_modules('request_network.scripts.create_qr_code', ('web3',)))
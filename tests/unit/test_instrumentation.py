@@ -0,0 +1,68 @@
+import unittest
+
+from request_network import (
+    instrumentation,
+)
+from request_network.instrumentation import (
+    InstrumentationHook,
+    PrometheusExporter,
+    add_hook,
+    instrumentation_middleware,
+    ipfs_operation,
+    remove_hook,
+    span,
+)
+
+
+class RecordingHook(InstrumentationHook):
+    def __init__(self):
+        self.spans = []
+
+    def on_span(self, operation, phase, duration, error=None):
+        self.spans.append((operation, phase, error))
+
+
+class InstrumentationTestCase(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.exporter = PrometheusExporter()
+        add_hook(self.exporter)
+
+    def tearDown(self):
+        remove_hook(self.exporter)
+        super().tearDown()
+
+    def test_no_hooks_is_a_no_op(self):
+        remove_hook(self.exporter)
+        try:
+            self.assertIs(span('op', 'phase'), instrumentation._NULL_TIMER)
+        finally:
+            add_hook(self.exporter)
+
+    def test_span_reports_errors(self):
+        hook = RecordingHook()
+        add_hook(hook)
+        try:
+            with self.assertRaises(ValueError):
+                with span('get_request_by_id', 'log_scan'):
+                    raise ValueError()
+        finally:
+            remove_hook(hook)
+        self.assertEqual('log_scan', hook.spans[0][1])
+        self.assertIsInstance(hook.spans[0][2], ValueError)
+
+    def test_prometheus_render(self):
+        middleware = instrumentation_middleware(lambda method, params: {'result': 1}, None)
+        middleware('eth_call', [])
+        middleware('eth_call', [])
+        with ipfs_operation('cat'):
+            pass
+        with span('get_request_by_id', 'contract_reads'):
+            pass
+
+        output = self.exporter.render()
+        self.assertIn('request_network_rpc_total{method="eth_call"} 2', output)
+        self.assertIn('request_network_ipfs_errors_total{operation="cat"} 0', output)
+        self.assertIn(
+            'request_network_span_total{operation="get_request_by_id",phase="contract_reads"} 1',
+            output)
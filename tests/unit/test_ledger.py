@@ -0,0 +1,84 @@
+import random
+import unittest
+
+from request_network.ledger import (
+    PaymentLedger,
+)
+
+REQUEST_ID_1 = '0x' + 'aa' * 32
+REQUEST_ID_2 = '0x' + 'bb' * 32
+
+
+def make_log(request_id, payee_index, delta_amount, block_number, log_index=0):
+    data = payee_index.to_bytes(32, 'big') + delta_amount.to_bytes(32, 'big', signed=True)
+    return {
+        'topics': ['0x' + '00' * 32, request_id],
+        'data': '0x' + data.hex(),
+        'blockNumber': block_number,
+        'logIndex': log_index,
+    }
+
+
+class PaymentLedgerTestCase(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.ledger = PaymentLedger.from_logs([
+            make_log(REQUEST_ID_1, 0, 100, 10),
+            make_log(REQUEST_ID_1, 1, 2 ** 200, 11),
+            make_log(REQUEST_ID_2, 0, 50, 12),
+            make_log(REQUEST_ID_1, 0, -30, 13),
+        ])
+
+    def test_columns(self):
+        self.assertEqual(4, len(self.ledger))
+        self.assertEqual(2, len(self.ledger.request_ids))
+        self.assertEqual([0, 1, 0, 0], list(self.ledger.payee_indexes))
+        self.assertEqual(-30, self.ledger.get_amount(3))
+
+    def test_totals_by_request(self):
+        self.assertEqual(
+            {REQUEST_ID_1: 70 + 2 ** 200, REQUEST_ID_2: 50},
+            self.ledger.totals_by_request())
+
+    def test_totals_by_payee(self):
+        self.assertEqual({
+            (REQUEST_ID_1, 0): 70,
+            (REQUEST_ID_1, 1): 2 ** 200,
+            (REQUEST_ID_2, 0): 50,
+        }, self.ledger.totals_by_payee())
+
+    def test_filter(self):
+        filtered = self.ledger.filter(request_id=REQUEST_ID_1, from_block=11)
+        self.assertEqual(2, len(filtered))
+        self.assertEqual(2 ** 200 - 30, filtered.total())
+        self.assertEqual([11, 13], list(filtered.block_numbers))
+
+    def test_append_matches_append_log(self):
+        ledger = PaymentLedger()
+        ledger.append(REQUEST_ID_1, 0, -30, block_number=13)
+        self.assertEqual(self.ledger.filter(from_block=13).amounts, ledger.amounts)
+
+    def test_matches_row_by_row_sums(self):
+        random_state = random.Random(1)
+        ledger = PaymentLedger()
+        expected = {}
+        for row in range(200):
+            request_id = '0x' + '{:064x}'.format(random_state.randrange(5))
+            payee_index = random_state.randrange(3)
+            amount = random_state.choice([
+                random_state.randrange(-2 ** 255, 2 ** 255),
+                random_state.randrange(-100, 100)])
+            ledger.append(request_id, payee_index, amount, block_number=row)
+            key = (request_id, payee_index)
+            expected[key] = expected.get(key, 0) + amount
+        self.assertEqual(expected, ledger.totals_by_payee())
+        self.assertEqual(sum(expected.values()), ledger.total())
+        self.assertEqual(sum(ledger.iter_amounts()), ledger.total())
+
+        filtered = ledger.filter(payee_index=1, from_block=50, to_block=149)
+        self.assertEqual([
+            ledger.get_amount(row) for row in range(50, 150) if ledger.payee_indexes[row] == 1
+        ], list(filtered.iter_amounts()))
+
+    def test_filter_unknown_request(self):
+        self.assertEqual(0, len(self.ledger.filter(request_id='0x' + 'cc' * 32)))
@@ -0,0 +1,147 @@
+import threading
+import time
+import unittest
+
+from request_network.api import (
+    RequestCreationItem,
+    RequestNetwork,
+)
+from request_network.currencies import (
+    currencies_by_symbol,
+)
+from request_network.exceptions import (
+    InvalidRequestParameters,
+    RoleNotSupported,
+)
+from request_network.pipeline import (
+    Pipeline,
+    PipelineItem,
+    Stage,
+)
+from request_network.recording import (
+    Fixture,
+    ReplayProvider,
+)
+from request_network.types import (
+    Payee,
+    Payer,
+    Roles,
+)
+
+ID_ADDRESS = '0x821aea9a577a9b44299b9c15c88cf3087f3b5544'
+PAYER_ADDRESS = '0x6330a553fc93768f612722bb8c2ec78ac90b3bbc'
+
+
+class Item(PipelineItem):
+    def __init__(self, value):
+        super().__init__()
+        self.value = value
+        self.stages = []
+
+
+class PipelineTestCase(unittest.TestCase):
+    def test_items_pass_through_every_stage(self):
+        def double(item):
+            item.stages.append('double')
+            item.value *= 2
+
+        def increment(item):
+            item.stages.append('increment')
+            item.value += 1
+
+        items = [Item(i) for i in range(50)]
+        stats = Pipeline([
+            Stage('double', double, max_workers=4),
+            Stage('increment', increment),
+        ]).run(items)
+        self.assertEqual([2 * i + 1 for i in range(50)], [item.value for item in items])
+        self.assertTrue(all(item.stages == ['double', 'increment'] for item in items))
+        self.assertEqual(50, stats['double'].items)
+        self.assertEqual(50, stats['increment'].items)
+        self.assertGreater(stats['increment'].throughput, 0)
+
+    def test_failed_items_skip_later_stages(self):
+        def check(item):
+            if item.value % 2:
+                raise RoleNotSupported('odd')
+
+        items = [Item(i) for i in range(10)]
+        stats = Pipeline([
+            Stage('check', check, max_workers=2),
+            Stage('record', lambda item: item.stages.append('record')),
+        ]).run(items)
+        for item in items:
+            if item.value % 2:
+                self.assertIsInstance(item.error, RoleNotSupported)
+                self.assertEqual('check', item.failed_stage)
+                self.assertEqual([], item.stages)
+            else:
+                self.assertIsNone(item.error)
+                self.assertEqual(['record'], item.stages)
+        self.assertEqual(5, stats['check'].errors)
+        self.assertEqual(5, stats['record'].items)
+
+    def test_system_exit_stops_pipeline(self):
+        def check(item):
+            if item.value == 3:
+                raise SystemExit(1)
+
+        items = [Item(i) for i in range(20)]
+        with self.assertRaises(SystemExit):
+            Pipeline([
+                Stage('check', check, max_workers=2),
+                Stage('record', lambda item: item.stages.append('record')),
+            ]).run(items)
+        self.assertIsInstance(items[3].error, SystemExit)
+        self.assertEqual([], items[3].stages)
+
+    def test_backpressure(self):
+        in_progress = []
+        maximum = []
+        lock = threading.Lock()
+
+        def fast(item):
+            with lock:
+                in_progress.append(item)
+                maximum.append(len(in_progress))
+
+        def slow(item):
+            time.sleep(0.001)
+            with lock:
+                in_progress.remove(item)
+
+        Pipeline([
+            Stage('fast', fast, max_workers=4),
+            Stage('slow', slow, max_queued=2),
+        ]).run([Item(i) for i in range(50)])
+        # Items started by the fast stage are bounded by the slow stage's queue, its
+        # worker, and the fast stage's workers
+        self.assertLessEqual(max(maximum), 2 + 1 + 4)
+
+
+class CreateRequestsTestCase(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        # Only invalid Requests are created, so no requests are made
+        self.client = RequestNetwork(network='private', provider=ReplayProvider(Fixture()))
+
+    def test_invalid_requests(self):
+        result = self.client.create_requests([{
+            'role': Roles.PAYEE,
+            'currency': currencies_by_symbol['ETH'],
+            'payees': [Payee(id_address=ID_ADDRESS, amount=-1)],
+            'payer': Payer(PAYER_ADDRESS),
+        }, {
+            'role': 'observer',
+            'currency': currencies_by_symbol['ETH'],
+            'payees': [Payee(id_address=ID_ADDRESS, amount=1)],
+            'payer': Payer(PAYER_ADDRESS),
+        }])
+        self.assertEqual([0, 1], [item.index for item in result.items])
+        self.assertIsInstance(result.items[0], RequestCreationItem)
+        self.assertIsInstance(result.items[0].error, InvalidRequestParameters)
+        self.assertIsInstance(result.items[1].error, RoleNotSupported)
+        self.assertTrue(all(item.failed_stage == 'validation' for item in result.items))
+        self.assertTrue(all(item.transaction_hash is None for item in result.items))
+        self.assertEqual(2, result.stages['validation'].errors)
+        self.assertEqual(0, result.stages['submission'].items)
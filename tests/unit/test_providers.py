@@ -0,0 +1,146 @@
+from http.server import (
+    BaseHTTPRequestHandler,
+    HTTPServer,
+)
+import json
+from socketserver import (
+    ThreadingMixIn,
+)
+import threading
+import time
+import unittest
+
+from request_network.providers import (
+    EndpointUnavailable,
+    PooledHTTPProvider,
+)
+
+
+class StubJSONRPCServer(ThreadingMixIn, HTTPServer):
+    """ Local JSON-RPC server which answers every request with its own name,
+        optionally after a delay or with an HTTP error.
+    """
+    daemon_threads = True
+
+    def __init__(self, name, delay=0, fail=False):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.request_count = 0
+        super().__init__(('127.0.0.1', 0), StubJSONRPCHandler)
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{}'.format(self.server_address[1])
+
+
+class StubJSONRPCHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.request_count += 1
+        time.sleep(self.server.delay)
+        if self.server.fail:
+            self.send_response(500)
+            self.end_headers()
+            return
+        body = json.dumps(
+            {'jsonrpc': '2.0', 'id': request['id'], 'result': self.server.name}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class PooledHTTPProviderTestCase(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.servers = []
+
+    def tearDown(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+        super().tearDown()
+
+    def make_server(self, name, **kwargs):
+        server = StubJSONRPCServer(name, **kwargs)
+        self.servers.append(server)
+        return server
+
+    def test_routes_to_lowest_latency_endpoint(self):
+        slow = self.make_server('slow', delay=0.05)
+        fast = self.make_server('fast')
+        provider = PooledHTTPProvider([slow.url, fast.url])
+        # The first requests measure each endpoint
+        provider.make_request('eth_blockNumber', [])
+        provider.make_request('eth_blockNumber', [])
+        for _ in range(5):
+            self.assertEqual('fast', provider.make_request('eth_blockNumber', [])['result'])
+
+    def test_failing_endpoint_is_ejected(self):
+        broken = self.make_server('broken', fail=True)
+        working = self.make_server('working', delay=0.01)
+        provider = PooledHTTPProvider([broken.url, working.url], max_failures=1)
+        self.assertEqual('working', provider.make_request('eth_blockNumber', [])['result'])
+        self.assertEqual('working', provider.make_request('eth_blockNumber', [])['result'])
+        self.assertEqual(1, broken.request_count)
+
+    def test_all_endpoints_failing(self):
+        broken = self.make_server('broken', fail=True)
+        provider = PooledHTTPProvider([broken.url])
+        with self.assertRaises(EndpointUnavailable):
+            provider.make_request('eth_blockNumber', [])
+
+    def test_hedged_read(self):
+        stalled = self.make_server('stalled', delay=1)
+        fast = self.make_server('fast')
+        provider = PooledHTTPProvider([stalled.url, fast.url], hedge_after=0.05)
+        provider.endpoints[0].latency = 0.001
+        provider.endpoints[1].latency = 0.002
+        start = time.monotonic()
+        self.assertEqual('fast', provider.make_request('eth_call', [])['result'])
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    def test_writes_are_not_hedged(self):
+        slow = self.make_server('slow', delay=0.1)
+        other = self.make_server('other')
+        provider = PooledHTTPProvider([slow.url, other.url], hedge_after=0.01)
+        provider.endpoints[0].latency = 0.001
+        provider.endpoints[1].latency = 0.002
+        self.assertEqual(
+            'slow', provider.make_request('eth_sendRawTransaction', [])['result'])
+        self.assertEqual(0, other.request_count)
+
+    def test_write_timeout_is_not_retried(self):
+        stalled = self.make_server('stalled', delay=0.5)
+        other = self.make_server('other')
+        provider = PooledHTTPProvider([stalled.url, other.url], timeout=0.1)
+        provider.endpoints[0].latency = 0.001
+        provider.endpoints[1].latency = 0.002
+        with self.assertRaises(EndpointUnavailable):
+            provider.make_request('eth_sendRawTransaction', [])
+        self.assertEqual(0, other.request_count)
+
+    def test_read_timeout_is_retried(self):
+        stalled = self.make_server('stalled', delay=0.5)
+        other = self.make_server('other')
+        provider = PooledHTTPProvider([stalled.url, other.url], timeout=0.1)
+        provider.endpoints[0].latency = 0.001
+        provider.endpoints[1].latency = 0.002
+        self.assertEqual('other', provider.make_request('eth_call', [])['result'])
+
+    def test_write_is_retried_if_not_sent(self):
+        refused = self.make_server('refused')
+        refused.shutdown()
+        refused.server_close()
+        other = self.make_server('other')
+        provider = PooledHTTPProvider([refused.url, other.url])
+        provider.endpoints[0].latency = 0.001
+        provider.endpoints[1].latency = 0.002
+        self.assertEqual(
+            'other', provider.make_request('eth_sendRawTransaction', [])['result'])
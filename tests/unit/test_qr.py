@@ -0,0 +1,79 @@
+from io import (
+    BytesIO,
+)
+import unittest
+
+from request_network.qr import (
+    QRCodeCache,
+    render_qr_code,
+    render_qr_codes,
+)
+from request_network.types import (
+    Payee,
+    Request,
+)
+
+CALLBACK_URL = 'https://example.com'
+
+
+def make_signed_request(i=0):
+    return Request(
+        currency_contract_address='0xf12b5dd4ead5f743c6baa640b0216200e89b60da',
+        payees=[Payee(id_address='0x821aea9a577a9b44299b9c15c88cf3087f3b5544', amount=100 + i)],
+        ipfs_hash=None,
+        expiration_date=7952342400000,
+        signature='0x' + '11' * 65,
+        _hash='0x{:064x}'.format(i))
+
+
+class QRCodeTestCase(unittest.TestCase):
+    def test_render_formats(self):
+        self.assertTrue(render_qr_code('https://example.com').startswith(b'\x89PNG'))
+        self.assertIn(b'<svg', render_qr_code('https://example.com', 'svg'))
+        with self.assertRaises(ValueError):
+            render_qr_code('https://example.com', 'gif')
+
+    def test_request_qr_code(self):
+        request = make_signed_request()
+        f = BytesIO()
+        request.write_qr_code(f, CALLBACK_URL, 4)
+        self.assertEqual(request.get_qr_code(CALLBACK_URL, 4), f.read())
+        self.assertTrue(request.get_qr_code_data_uri(CALLBACK_URL, 4).startswith(
+            'data:text/png;base64,iVBORw0KGgo'))
+        self.assertTrue(request.get_qr_code_data_uri(
+            CALLBACK_URL, 4, image_format='svg').startswith('data:image/svg+xml;base64,'))
+
+    def test_cache(self):
+        cache = QRCodeCache(max_size=2)
+        request = make_signed_request()
+        image = cache.get(request, CALLBACK_URL, 4)
+        self.assertIs(image, cache.get(request, CALLBACK_URL, '4'))
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
+
+        # Different render options and networks are cached separately
+        self.assertIsNot(image, cache.get(request, CALLBACK_URL, 4, pyqrcode_kwargs={'scale': 3}))
+        cache.get(request, CALLBACK_URL, 1)
+        self.assertEqual(2, len(cache._entries))
+        cache.get(request, CALLBACK_URL, 4)
+        self.assertEqual(4, cache.misses)
+
+    def test_cache_list_options(self):
+        cache = QRCodeCache()
+        request = make_signed_request()
+        kwargs = {'module_color': [0, 0, 0, 255], 'background': [255, 255, 255, 255]}
+        image = cache.get(request, CALLBACK_URL, 4, pyqrcode_kwargs=kwargs)
+        self.assertEqual(
+            render_qr_code(
+                request.get_payment_gateway_url(CALLBACK_URL, 4), pyqrcode_kwargs=kwargs),
+            image)
+        self.assertIs(image, cache.get(
+            request, CALLBACK_URL, 4,
+            pyqrcode_kwargs={'module_color': (0, 0, 0, 255), 'background': [255, 255, 255, 255]}))
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
+
+    def test_render_qr_codes(self):
+        requests = [make_signed_request(i) for i in range(3)]
+        images = render_qr_codes(requests, CALLBACK_URL, 4, max_workers=2)
+        self.assertEqual(
+            [render_qr_code(r.get_payment_gateway_url(CALLBACK_URL, 4)) for r in requests],
+            images)
@@ -0,0 +1,90 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from web3 import Web3
+from web3.providers.base import (
+    BaseProvider,
+)
+
+from request_network.recording import (
+    Fixture,
+    FixtureMissing,
+    RecordingIPFSClient,
+    RecordingProvider,
+    ReplayIPFSClient,
+    ReplayProvider,
+)
+
+
+class CountingProvider(BaseProvider):
+    """ Provider which answers `eth_blockNumber` with an increasing block number.
+    """
+
+    def __init__(self):
+        self.block_number = 0
+
+    def make_request(self, method, params):
+        self.block_number += 1
+        return {'jsonrpc': '2.0', 'id': 1, 'result': hex(self.block_number)}
+
+
+class FakeIPFS(object):
+    def add_json(self, data):
+        return 'QmHash'
+
+    def cat(self, ipfs_hash):
+        return b'{"reason": "test"}'
+
+
+class RecordReplayTestCase(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        super().tearDown()
+
+    def record(self):
+        fixture = Fixture()
+        web3 = Web3(RecordingProvider(CountingProvider(), fixture))
+        self.assertEqual(1, web3.eth.blockNumber)
+        self.assertEqual(2, web3.eth.blockNumber)
+        ipfs = RecordingIPFSClient(FakeIPFS(), fixture)
+        self.assertEqual('QmHash', ipfs.add_json({'reason': 'test'}))
+        self.assertEqual('{"reason": "test"}', ipfs.cat('QmHash'))
+        return fixture
+
+    def test_replay_rpc_in_recorded_order(self):
+        path = os.path.join(self.directory, 'fixture.json')
+        self.record().save(path)
+
+        web3 = Web3(ReplayProvider(Fixture.load(path)))
+        self.assertEqual(1, web3.eth.blockNumber)
+        self.assertEqual(2, web3.eth.blockNumber)
+        # The last response is repeated once the recording is exhausted
+        self.assertEqual(2, web3.eth.blockNumber)
+
+    def test_replay_ipfs(self):
+        path = os.path.join(self.directory, 'fixture.json.gz')
+        self.record().save(path)
+
+        ipfs = ReplayIPFSClient(Fixture.load(path))
+        self.assertEqual('QmHash', ipfs.add_json({'reason': 'test'}))
+        self.assertEqual('{"reason": "test"}', ipfs.cat('QmHash'))
+        with self.assertRaises(FixtureMissing):
+            ipfs.cat('QmOther')
+
+    def test_unrecorded_call_raises(self):
+        web3 = Web3(ReplayProvider(self.record()))
+        with self.assertRaises(FixtureMissing):
+            web3.eth.gasPrice
+
+    def test_replay_latency(self):
+        provider = ReplayProvider(self.record(), latency=0.05)
+        start = time.perf_counter()
+        provider.make_request('eth_blockNumber', [])
+        self.assertGreaterEqual(time.perf_counter() - start, 0.05)
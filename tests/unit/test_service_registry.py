@@ -0,0 +1,53 @@
+import unittest
+
+from request_network.artifact_manager import (
+    ArtifactManager,
+)
+from request_network.currencies import (
+    currencies_by_symbol,
+)
+from request_network.exceptions import (
+    ArtifactNotFound,
+)
+from request_network.services import (
+    RequestERC20Service,
+    RequestEthereumService,
+    ServiceRegistry,
+)
+from request_network.utils import (
+    get_service_for_currency,
+)
+
+# Currency contracts on the private network
+ETHEREUM_CURRENCY_CONTRACT_ADDRESS = '0xf12b5dd4ead5f743c6baa640b0216200e89b60da'
+ERC20_CURRENCY_CONTRACT_ADDRESS = '0xf25186B5081Ff5cE73482AD761DB0eB0d25abfBF'
+
+
+class ServiceRegistryTestCase(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.registry = ServiceRegistry(
+            artifact_manager=ArtifactManager(ethereum_network='private'))
+
+    def test_ethereum_service(self):
+        service = self.registry.get_service(currencies_by_symbol['ETH'])
+        self.assertIsInstance(service, RequestEthereumService)
+        self.assertIs(
+            service, self.registry.get_service_by_address(ETHEREUM_CURRENCY_CONTRACT_ADDRESS))
+
+    def test_erc20_service(self):
+        service = self.registry.get_service(currencies_by_symbol['DAI'])
+        self.assertIsInstance(service, RequestERC20Service)
+        self.assertEqual(ERC20_CURRENCY_CONTRACT_ADDRESS, service.currency_contract_data['address'])
+        self.assertIs(
+            service, self.registry.get_service_by_address(ERC20_CURRENCY_CONTRACT_ADDRESS.lower()))
+
+    def test_unknown_address(self):
+        with self.assertRaises(ArtifactNotFound):
+            self.registry.get_service_by_address('0x0000000000000000000000000000000000000001')
+        with self.assertRaises(ArtifactNotFound):
+            self.registry.get_service_by_address('foo')
+
+    def test_get_service_for_currency_reuses_services(self):
+        currency = currencies_by_symbol['ETH']
+        self.assertIs(get_service_for_currency(currency), get_service_for_currency(currency))
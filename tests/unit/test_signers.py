@@ -0,0 +1,29 @@
+import os
+import unittest
+from unittest import (
+    mock,
+)
+
+from eth_account import (
+    Account,
+)
+from eth_account.messages import (
+    defunct_hash_message,
+)
+
+from request_network.signers import (
+    private_key_environment_variable_signer,
+)
+
+ADDRESS = '0x821aEa9a577a9b44299B9c15c88cf3087F3b5544'
+
+
+class EnvironmentSignerTestCase(unittest.TestCase):
+    def test_signature_matches_sign_hash(self):
+        message_hash = defunct_hash_message(hexstr='0x' + 'ab' * 32)
+        for private_key in ('0x' + '12' * 32, '0x' + '34' * 32):
+            with mock.patch.dict(
+                    os.environ, {'REQUEST_NETWORK_PRIVATE_KEY_{}'.format(ADDRESS): private_key}):
+                self.assertEqual(
+                    dict(Account.signHash(message_hash, private_key)),
+                    dict(private_key_environment_variable_signer(message_hash, ADDRESS)))
@@ -0,0 +1,119 @@
+import asyncio
+from concurrent.futures import (
+    ThreadPoolExecutor,
+)
+import threading
+import time
+import unittest
+from unittest import (
+    mock,
+)
+
+from request_network.api import (
+    RequestNetwork,
+)
+from request_network.exceptions import (
+    RequestNotFound,
+)
+from request_network.recording import (
+    Fixture,
+    ReplayProvider,
+)
+from request_network.single_flight import (
+    SingleFlight,
+)
+
+REQUEST_ID = '0x' + 'aa' * 32
+
+
+class BlockingFunction(object):
+    """ Blocks every call until `release` is set, counting the calls.
+    """
+
+    def __init__(self, result=None, exception=None):
+        self.result = result
+        self.exception = exception
+        self.calls = 0
+        self.release = threading.Event()
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        self.release.wait(5)
+        if self.exception:
+            raise self.exception
+        return self.result
+
+
+class SingleFlightTestCase(unittest.TestCase):
+    def call_concurrently(self, single_flight, function, count=8, key='key'):
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            futures = [
+                executor.submit(single_flight.call, key, function) for _ in range(count)]
+            while single_flight.calls < count:
+                time.sleep(0.01)
+            function.release.set()
+        return futures
+
+    def test_concurrent_calls_share_result(self):
+        single_flight = SingleFlight()
+        result = object()
+        function = BlockingFunction(result=result)
+        futures = self.call_concurrently(single_flight, function)
+        self.assertTrue(all(f.result() is result for f in futures))
+        self.assertEqual(1, function.calls)
+        self.assertEqual({'calls': 8, 'coalesced': 7, 'in_flight': 0}, single_flight.stats())
+
+        # Results are not cached once the call has finished
+        single_flight.call('key', function)
+        self.assertEqual(2, function.calls)
+
+    def test_concurrent_calls_share_base_exception(self):
+        single_flight = SingleFlight()
+        function = BlockingFunction(exception=RequestNotFound(REQUEST_ID))
+        for future in self.call_concurrently(single_flight, function):
+            with self.assertRaises(RequestNotFound):
+                future.result()
+        self.assertEqual(1, function.calls)
+        self.assertEqual(0, single_flight.in_flight_count)
+
+    def test_async_calls_share_result(self):
+        single_flight = SingleFlight()
+        function = BlockingFunction(result=1)
+
+        async def call_all():
+            tasks = [single_flight.call_async('key', function) for _ in range(4)]
+            # Release the function once every call has joined the flight
+            asyncio.get_event_loop().call_later(0.1, function.release.set)
+            return await asyncio.gather(*tasks)
+
+        loop = asyncio.new_event_loop()
+        try:
+            asyncio.set_event_loop(loop)
+            self.assertEqual([1] * 4, loop.run_until_complete(call_all()))
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+        self.assertEqual(1, function.calls)
+        self.assertEqual(3, single_flight.coalesced)
+
+
+class CoalescedReadsTestCase(unittest.TestCase):
+    def test_get_request_by_id_is_coalesced(self):
+        client = RequestNetwork(
+            network='private', provider=ReplayProvider(Fixture()), coalesce_reads=True)
+        function = BlockingFunction(result=object())
+        with mock.patch.object(client, '_get_request', function):
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                # IDs are compared case-insensitively
+                futures = [
+                    executor.submit(client.get_request_by_id, request_id)
+                    for request_id in (REQUEST_ID, REQUEST_ID.upper().replace('0X', '0x'))]
+                # A different block is a different lookup
+                futures.append(
+                    executor.submit(client.get_request_by_id, REQUEST_ID, block_identifier=1))
+                while client.read_calls.calls < 3:
+                    time.sleep(0.01)
+                function.release.set()
+        self.assertEqual(2, function.calls)
+        self.assertEqual(1, client.read_calls.coalesced)
+        self.assertIs(futures[0].result(), futures[1].result())
@@ -0,0 +1,123 @@
+import threading
+import time
+import unittest
+
+from eth_account import (
+    Account,
+)
+import rlp
+from web3 import Web3
+from web3.providers.base import (
+    BaseProvider,
+)
+
+from request_network.transactions import (
+    LocalSigningPool,
+)
+
+PRIVATE_KEY = '0x' + '11' * 32
+ADDRESS = Account.privateKeyToAccount(PRIVATE_KEY).address
+TO_ADDRESS = Web3.toChecksumAddress('0x6330a553fc93768f612722bb8c2ec78ac90b3bbc')
+
+
+class NodeProvider(BaseProvider):
+    """ Provider which accepts raw transactions only in nonce order, like a node does.
+    """
+
+    def __init__(self, transaction_count=3, fail_nonce=None):
+        self.transaction_count = transaction_count
+        self.fail_nonce = fail_nonce
+        self.nonces = []
+        self.hashes = []
+        self.lock = threading.Lock()
+
+    def make_request(self, method, params):
+        if method == 'eth_getTransactionCount':
+            return {'result': hex(self.transaction_count)}
+        if method == 'eth_estimateGas':
+            return {'result': hex(50000)}
+        if method == 'eth_gasPrice':
+            return {'result': hex(10 ** 9)}
+        if method == 'eth_sendRawTransaction':
+            # Simulate network latency, so signing and submission overlap
+            time.sleep(0.001)
+            raw_transaction = Web3.toBytes(hexstr=params[0])
+            nonce = Web3.toInt(rlp.decode(raw_transaction)[0])
+            with self.lock:
+                if nonce == self.fail_nonce or nonce != self.transaction_count:
+                    return {'error': {'code': -32000, 'message': 'invalid nonce'}}
+                self.transaction_count += 1
+                self.nonces.append(nonce)
+                self.hashes.append(Web3.toHex(Web3.sha3(raw_transaction)))
+            return {'result': self.hashes[-1]}
+        raise NotImplementedError(method)
+
+
+class LocalSigningPoolTestCase(unittest.TestCase):
+    def get_pool(self, provider, **kwargs):
+        return LocalSigningPool(
+            web3=Web3(provider),
+            get_private_key=lambda address: PRIVATE_KEY,
+            **kwargs)
+
+    def get_transaction(self, value=0):
+        return {'from': ADDRESS, 'to': TO_ADDRESS, 'value': value}
+
+    def test_submit(self):
+        provider = NodeProvider()
+        with self.get_pool(provider) as pool:
+            tx_hash = pool.submit(self.get_transaction()).result()
+        self.assertEqual([3], provider.nonces)
+        self.assertEqual(66, len(tx_hash))
+
+    def test_send_returns_hash_before_submission(self):
+        provider = NodeProvider()
+        with self.get_pool(provider, max_workers=4, max_in_flight=4) as pool:
+            tx_hashes = [pool.send(self.get_transaction(value=i)) for i in range(20)]
+            pool.flush()
+        self.assertEqual(list(range(3, 23)), provider.nonces)
+        self.assertEqual(20, len(set(tx_hashes)))
+
+    def test_hash_matches_node(self):
+        provider = NodeProvider()
+        with self.get_pool(provider) as pool:
+            tx_hash = pool.send(self.get_transaction())
+        self.assertEqual([tx_hash], provider.hashes)
+
+    def test_submission_error(self):
+        provider = NodeProvider(fail_nonce=4)
+        pool = self.get_pool(provider, max_workers=1)
+        futures = [pool.submit(self.get_transaction()) for _ in range(3)]
+        self.assertIsNotNone(futures[0].result())
+        with self.assertRaises(ValueError):
+            futures[1].result()
+        # The errors were delivered through the futures, so they are not raised again
+        pool.close()
+
+        # The nonce is fetched again after an error
+        provider.fail_nonce = None
+        with self.get_pool(provider) as pool:
+            pool.submit(self.get_transaction()).result()
+        self.assertEqual([3, 4], provider.nonces)
+
+    def test_errors_are_raised_once(self):
+        provider = NodeProvider()
+        keys = {ADDRESS: PRIVATE_KEY}
+        pool = LocalSigningPool(web3=Web3(provider), get_private_key=lambda a: keys[a])
+        with self.assertRaises(KeyError):
+            pool.send(dict(self.get_transaction(), **{'from': TO_ADDRESS}))
+        # The signing error was raised by `send`, so it does not fail the next one
+        tx_hash = pool.send(self.get_transaction())
+        pool.flush()
+        self.assertEqual([3], provider.nonces)
+        self.assertEqual([tx_hash], provider.hashes)
+
+        # An error from the node is raised by the next `flush`, and only once
+        provider.fail_nonce = 4
+        pool.send(self.get_transaction())
+        with self.assertRaises(ValueError):
+            pool.flush()
+        provider.fail_nonce = None
+        pool.send(self.get_transaction())
+        pool.close()
+        self.assertEqual([3, 4], provider.nonces)
@@ -0,0 +1,149 @@
+from base64 import (
+    b64encode,
+)
+import json
+import unittest
+from unittest import (
+    mock,
+)
+
+from web3 import Web3
+
+from request_network.exceptions import (
+    RequestNotFound,
+)
+from request_network.types import (
+    Payee,
+    Payment,
+    Request,
+    get_payment_gateway_urls,
+)
+
+
+class PayeeTestCase(unittest.TestCase):
+    def test_payee_checksums_addresses(self):
+        payee = Payee(
+            id_address='0x821aea9a577a9b44299b9c15c88cf3087f3b5544',
+            payment_address='0x6330a553fc93768f612722bb8c2ec78ac90b3bbc',
+            amount=100)
+        self.assertEqual('0x821aEa9a577a9b44299B9c15c88cf3087F3b5544', payee.id_address)
+        self.assertEqual(
+            Web3.toChecksumAddress('0x6330a553fc93768f612722bb8c2ec78ac90b3bbc'),
+            payee.payment_address)
+
+    def test_from_normalized_matches_constructor(self):
+        id_address = Web3.toChecksumAddress('0x821aea9a577a9b44299b9c15c88cf3087f3b5544')
+        payee = Payee.from_normalized(id_address=id_address, amount=100, payment_address='')
+        self.assertEqual(id_address, payee.id_address)
+        self.assertIsNone(payee.payment_address)
+        self.assertEqual(0, payee.paid_amount)
+        self.assertFalse(payee.is_paid)
+
+    def test_types_have_no_instance_dict(self):
+        payee = Payee('0x821aea9a577a9b44299b9c15c88cf3087f3b5544', amount=1)
+        request = Request(currency_contract_address=None, payees=[payee], ipfs_hash=None)
+        for obj in (payee, Payment(payee_index=0, delta_amount=1), request):
+            self.assertFalse(hasattr(obj, '__dict__'))
+            with self.assertRaises(AttributeError):
+                obj.unknown_attribute = 1
+
+
+class RequestIsBroadcastTestCase(unittest.TestCase):
+    def make_request(self, client, transaction_hash='0x' + '33' * 32):
+        payee = Payee('0x821aea9a577a9b44299b9c15c88cf3087f3b5544', amount=1)
+        return Request(
+            currency_contract_address=None, payees=[payee], ipfs_hash=None,
+            id='0x' + '44' * 32, transaction_hash=transaction_hash, client=client)
+
+    def test_uses_client(self):
+        client = mock.Mock()
+        request = self.make_request(client)
+        client.get_request_by_transaction_hash.return_value = request
+        with mock.patch('request_network.api.RequestNetwork') as request_network:
+            self.assertTrue(request.is_broadcast)
+        request_network.assert_not_called()
+        client.get_request_by_transaction_hash.assert_called_once_with('0x' + '33' * 32)
+
+        client.get_request_by_transaction_hash.side_effect = RequestNotFound
+        self.assertFalse(request.is_broadcast)
+
+    def test_no_transaction_hash(self):
+        client = mock.Mock()
+        self.assertFalse(self.make_request(client, transaction_hash=None).is_broadcast)
+        client.get_request_by_transaction_hash.assert_not_called()
+
+
+class PaymentGatewayPayloadTestCase(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.request = Request(
+            currency_contract_address=Web3.toChecksumAddress(
+                '0xf12b5dd4ead5f743c6baa640b0216200e89b60da'),
+            payees=[
+                Payee('0x821aea9a577a9b44299b9c15c88cf3087f3b5544', amount=100),
+                Payee('0x6330a553fc93768f612722bb8c2ec78ac90b3bbc', amount=200,
+                      payment_address='0x821aea9a577a9b44299b9c15c88cf3087f3b5544'),
+            ],
+            ipfs_hash='QmbFpULNpMJEj9LfvhH4hSTfTse5YrS2JvhbHW6bRSo9n7',
+            expiration_date=7952342400000,
+            signature='0x' + '11' * 65,
+            _hash='0x' + '22' * 32)
+
+    def get_expected_payload(self, callback_url, ethereum_network_id):
+        return b64encode(json.dumps({
+            'signedRequest': {
+                'currencyContract': self.request.currency_contract_address,
+                'data': self.request.ipfs_hash,
+                'expectedAmounts': self.request.amounts,
+                'expirationDate': self.request.expiration_date,
+                'hash': self.request.hash,
+                'payeesIdAddress': self.request.id_addresses,
+                'payeesPaymentAddress': self.request.payment_addresses,
+                'signature': self.request.signature
+            },
+            'callbackUrl': callback_url,
+            'networkId': ethereum_network_id
+        }).encode('utf-8')).decode()
+
+    def test_as_base64_matches_json_encoding(self):
+        for callback_url, ethereum_network_id in [
+                ('https://example.com', 4), ('https://example.com/é?a="b"', '1'), (None, 1)]:
+            self.assertEqual(
+                self.get_expected_payload(callback_url, ethereum_network_id),
+                self.request.as_base64(callback_url, ethereum_network_id))
+
+    def test_as_base64_is_memoised(self):
+        payload = self.request.as_base64('https://example.com', 4)
+        self.assertIs(payload, self.request.as_base64('https://example.com', 4))
+        self.assertIsNot(payload, self.request.as_base64('https://example.com', 1))
+
+    def test_as_base64_is_recomputed_when_fields_change(self):
+        payload = self.request.as_base64('https://example.com', 4)
+        self.request.signature = '0x' + '33' * 65
+        self.assertNotEqual(payload, self.request.as_base64('https://example.com', 4))
+        self.assertEqual(
+            self.get_expected_payload('https://example.com', 4),
+            self.request.as_base64('https://example.com', 4))
+
+        # Payees changed in place
+        self.request.payees[1].amount = 300
+        self.assertEqual(
+            self.get_expected_payload('https://example.com', 4),
+            self.request.as_base64('https://example.com', 4))
+
+    def test_as_base64_requires_signature(self):
+        self.request.signature = None
+        with self.assertRaises(Exception):
+            self.request.as_base64('https://example.com', 4)
+
+    def test_get_payment_gateway_urls(self):
+        other_request = Request(
+            currency_contract_address=self.request.currency_contract_address,
+            payees=[Payee('0x821aea9a577a9b44299b9c15c88cf3087f3b5544', amount=1)],
+            ipfs_hash=None,
+            signature='0x' + '44' * 65,
+            _hash='0x' + '55' * 32)
+        requests = [self.request, other_request]
+        self.assertEqual(
+            [r.get_payment_gateway_url('https://example.com', 4) for r in requests],
+            get_payment_gateway_urls(requests, 'https://example.com', 4))
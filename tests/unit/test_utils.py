@@ -0,0 +1,28 @@
+import unittest
+from unittest import (
+    mock,
+)
+
+from request_network.utils import (
+    get_request_bytes_representation,
+)
+
+PAYEE_1 = '0x821aEa9a577a9b44299B9c15c88cf3087F3b5544'
+PAYEE_2 = '0x6330A553Fc93768F612722BB8c2eC78aC90B3bbc'
+IPFS_HASH = 'QmbFpULNpMJEj9LfvhH4hSTfTse5YrS2JvhbHW6bRSo9n7'
+
+
+class RequestBytesTestCase(unittest.TestCase):
+    def test_does_not_use_default_web3(self):
+        with mock.patch(
+                'request_network.utils.get_default_web3', side_effect=AssertionError):
+            request_bytes = get_request_bytes_representation(
+                [PAYEE_1, PAYEE_2], [100, -5], None, IPFS_HASH)
+        self.assertEqual(
+            '0x821aea9a577a9b44299b9c15c88cf3087f3b554400000000000000000000000000000000000000'
+            '0002821aea9a577a9b44299b9c15c88cf3087f3b5544000000000000000000000000000000000000'
+            '00000000000000000000000000646330a553fc93768f612722bb8c2ec78ac90b3bbcffffffffffff'
+            'fffffffffffffffffffffffffffffffffffffffffffffffffffb2e516d624670554c4e704d4a456a'
+            '394c66766848346853546654736535597253324a'
+            '7668624857366252536f396e37',
+            request_bytes)
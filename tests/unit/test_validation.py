@@ -0,0 +1,77 @@
+import time
+import unittest
+from unittest import (
+    mock,
+)
+
+from web3 import Web3
+
+from request_network.exceptions import (
+    InvalidRequestParameters,
+)
+from request_network.services.ethereum import (
+    RequestEthereumService,
+)
+from request_network.validation import (
+    is_address,
+    validate_request_parameters,
+    validate_requests,
+)
+
+ID_ADDRESS = '0x821aEa9a577a9b44299B9c15c88cf3087F3b5544'
+PAYMENT_ADDRESS = '0x6330a553fc93768f612722bb8c2ec78ac90b3bbc'
+
+
+class ValidationTestCase(unittest.TestCase):
+    def test_is_address_matches_web3(self):
+        for address in [
+                ID_ADDRESS, ID_ADDRESS.lower(), ID_ADDRESS.upper().replace('0X', '0x'),
+                ID_ADDRESS[2:], ID_ADDRESS.replace('a', 'A', 1), ID_ADDRESS[:-1],
+                ID_ADDRESS.lower().replace('0x', '0X'), ID_ADDRESS.replace('0x', '0X'),
+                '0x' + '12' * 20, 'not an address', '0x' + 'zz' * 20,
+                b'\x12' * 20, b'\x12' * 19]:
+            self.assertEqual(Web3.isAddress(address), is_address(address), address)
+        self.assertFalse(is_address(None))
+        self.assertFalse(is_address(1))
+
+    def test_validate_request_parameters(self):
+        validate_request_parameters(
+            [ID_ADDRESS, PAYMENT_ADDRESS], [1, '2'], [None, ID_ADDRESS],
+            creation_payments=[0], expiration_date=int(time.time()) + 60)
+
+        for arguments in [
+                dict(id_addresses=[ID_ADDRESS], amounts=[1, 2]),
+                dict(id_addresses=[ID_ADDRESS], amounts=[1],
+                     payment_addresses=[PAYMENT_ADDRESS, PAYMENT_ADDRESS]),
+                dict(id_addresses=[ID_ADDRESS], amounts=[1], creation_payments=[1, 1]),
+                dict(id_addresses=[ID_ADDRESS], amounts=[1], additional_payments=[1, 1]),
+                dict(id_addresses=[ID_ADDRESS], amounts=[-1]),
+                dict(id_addresses=[ID_ADDRESS], amounts=['one']),
+                dict(id_addresses=[ID_ADDRESS], amounts=[1], creation_payments=[-1]),
+                dict(id_addresses=['0x1234'], amounts=[1]),
+                dict(id_addresses=[ID_ADDRESS], amounts=[1], payment_addresses=['0x1234']),
+                dict(id_addresses=[ID_ADDRESS], amounts=[1], expiration_date=time.time() - 1)]:
+            with self.assertRaises(InvalidRequestParameters):
+                validate_request_parameters(**arguments)
+
+    def test_validate_requests(self):
+        errors = validate_requests([
+            dict(id_addresses=[ID_ADDRESS], amounts=[1]),
+            dict(id_addresses=[ID_ADDRESS], amounts=[-1]),
+        ])
+        self.assertIsNone(errors[0])
+        self.assertIsInstance(errors[1], InvalidRequestParameters)
+
+    @mock.patch('request_network.services.core.store_ipfs_data')
+    def test_validation_runs_before_ipfs_upload(self, store_ipfs_data):
+        service = RequestEthereumService()
+        with self.assertRaises(InvalidRequestParameters):
+            service.sign_request_as_payee(
+                id_addresses=['0x1234'], amounts=[1], payment_addresses=[None],
+                expiration_date=int(time.time()) + 60, data={'reason': 'test'})
+        with self.assertRaises(InvalidRequestParameters):
+            service.create_request_as_payee(
+                id_addresses=[ID_ADDRESS], amounts=[-1], payment_addresses=[None],
+                payer_refund_address=PAYMENT_ADDRESS, payer_id_address=PAYMENT_ADDRESS,
+                data={'reason': 'test'})
+        store_ipfs_data.assert_not_called()